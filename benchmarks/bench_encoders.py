@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Encode throughput, size and bitrate for every encoder profile.
+
+A synthetic voiced signal (harmonics + syllable-rate envelope + pauses) is exported
+through `audio_io.export_segment` once per profile, into the container each profile
+targets (.mp3, .ogg, .m4a). For each profile the script reports wall time,
+throughput (audio seconds per wall second), output size and average bitrate.
+Results are printed as JSON.
+
+Requirements: FFmpeg with libmp3lame and libopus on PATH.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from pydub import AudioSegment  # noqa: E402
+
+from speech_audio_tools.audio_io import export_segment  # noqa: E402
+from speech_audio_tools.encoders import PROFILES, container_for  # noqa: E402
+
+EXTENSIONS = {"opus": ".ogg", "aac": ".m4a"}
+
+
+def make_speech_like_segment(seconds: float, frame_rate: int) -> AudioSegment:
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    harmonics = sum(np.sin(2 * np.pi * 160.0 * k * t) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4.0 * t), 0, None) * (np.sin(2 * np.pi * 0.2 * t) > -0.5)
+    noise = np.random.default_rng(0).normal(scale=0.02, size=t.size)
+    pcm = ((harmonics * envelope / 2.6 + noise) * 20000).astype(np.int16)
+    return AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the synthetic clip")
+    parser.add_argument("--frame-rate", type=int, default=44100)
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma separated profile names")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per profile (best is kept)")
+    args = parser.parse_args()
+
+    source = make_speech_like_segment(args.seconds, args.frame_rate)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.profiles.split(","):
+            output = Path(tmp) / f"{name}{EXTENSIONS.get(name, '.mp3')}"
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                export_segment(source, output, format=container_for(output), encoder=name)
+                best = min(best, time.perf_counter() - start)
+            size = output.stat().st_size
+            results.append(
+                {
+                    "profile": name,
+                    "container": container_for(output),
+                    "wall_seconds": round(best, 4),
+                    "throughput_x": round(args.seconds / best, 1),
+                    "bytes": size,
+                    "kbps": round(size * 8 / args.seconds / 1000, 1),
+                }
+            )
+    print(json.dumps({"seconds": args.seconds, "frame_rate": args.frame_rate, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for the audio pipeline.
+
+Generates a synthetic corpus (Q/A tone clips via beep.make_beep and an hour-long-capable
+tone/silence file built with NumPy), then times `combine`, `join`, `split-*`,
+`trim-silence`, `speed` and `add-number`. Every case runs in a fresh worker process
+and records wall time, CPU time (including ffmpeg children), peak RSS and the number
+of subprocesses spawned. Results are written as JSON so runs can be compared across
+commits with --compare.
+
+Requirements: FFmpeg/ffprobe on PATH. No network access is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+CASES = (
+    "combine",
+    "combine-ffmpeg",
+    "join",
+    "split-silence",
+    "split-duration",
+    "trim-silence",
+    "speed",
+    "add-number",
+)
+ADD_NUMBER_MAX = 100  # bundled number audio; larger numbers would need TTS
+JOIN_MAX = 200
+
+
+#
+# Corpus
+#
+def _write_long_file(path: Path, minutes: float, frame_rate: int = 22050) -> None:
+    """Write alternating 2-4 s tone bursts and 1 s silences, in one-minute blocks."""
+    import numpy as np
+    from pydub import AudioSegment
+
+    rng = np.random.default_rng(0)
+    samples_per_block = 60 * frame_rate
+    pcm = bytearray()
+    for _ in range(max(1, int(round(minutes)))):
+        block = np.zeros(samples_per_block, dtype=np.float32)
+        pos = 0
+        while pos < samples_per_block:
+            burst = int(rng.uniform(2.0, 4.0) * frame_rate)
+            t = np.arange(min(burst, samples_per_block - pos)) / frame_rate
+            block[pos : pos + len(t)] = 0.4 * np.sin(2 * np.pi * rng.uniform(150, 400) * t)
+            pos += burst + frame_rate
+        pcm += (block * 32767).astype(np.int16).tobytes()
+    AudioSegment(bytes(pcm), frame_rate=frame_rate, sample_width=2, channels=1).export(path, format="mp3")
+
+
+def build_corpus(workdir: Path, clips: int, long_minutes: float) -> dict:
+    """Create (or reuse) the corpus under ``workdir`` and return its manifest."""
+    from speech_audio_tools.beep import make_beep
+
+    manifest_path = workdir / "corpus.json"
+    manifest = {"clips": clips, "long_minutes": long_minutes}
+    if manifest_path.exists() and json.loads(manifest_path.read_text()) == manifest:
+        return manifest
+
+    raw = workdir / "raw"
+    shutil.rmtree(raw, ignore_errors=True)
+    raw.mkdir(parents=True)
+    width = len(str(clips))
+    for number in range(1, clips + 1):
+        make_beep(str(raw / f"{number:0{width}d}-Q-synth.mp3"), frequency=300 + number % 7 * 40, duration=1.0, gain_db=0)
+        make_beep(str(raw / f"{number:0{width}d}-A-synth.mp3"), frequency=500 + number % 5 * 40, duration=1.5, gain_db=0)
+    _write_long_file(workdir / "long.mp3", long_minutes)
+    manifest_path.write_text(json.dumps(manifest))
+    return manifest
+
+
+#
+# Cases (run inside a worker process)
+#
+def _run_case(case: str, workdir: Path, out: Path) -> list:
+    """Run one case and return the list of input files it processed."""
+    raw = workdir / "raw"
+    long_file = workdir / "long.mp3"
+    clips = sorted(str(p) for p in raw.glob("*.mp3"))
+    if case in ("combine", "combine-ffmpeg"):
+        from speech_audio_tools.audio import make_section_mp3_files
+
+        backend = "ffmpeg" if case == "combine-ffmpeg" else "pydub"
+        make_section_mp3_files(str(raw), str(out), speed=(1.2, 1.0), repeat_question=True, backend=backend)
+        return clips
+    if case == "join":
+        from speech_audio_tools.audio import join_files
+
+        inputs = clips[:JOIN_MAX]
+        join_files(inputs, str(out / "joined.mp3"), "bench", "bench", "bench", 300)
+        return inputs
+    if case == "split-silence":
+        from speech_audio_tools.split_audio import split_by_silence
+
+        split_by_silence(str(long_file), str(out), 800, -30, "bench")
+        return [str(long_file)]
+    if case == "split-duration":
+        from speech_audio_tools.split_audio import split_by_duration
+
+        split_by_duration(str(long_file), 1.0, str(out), 5, "bench")
+        return [str(long_file)]
+    if case == "trim-silence":
+        from speech_audio_tools.trim_silence import trim_with_ffmpeg
+
+        trim_with_ffmpeg(str(long_file), str(out / "trimmed.mp3"), min_silence=0.5, threshold_db=-30)
+        return [str(long_file)]
+    if case == "speed":
+        from speech_audio_tools.change_speed import process_speed
+
+        process_speed(long_file, out, 1.5)
+        return [str(long_file)]
+    if case == "add-number":
+        from speech_audio_tools.add_number import process_audio_files
+
+        inputs = clips[:ADD_NUMBER_MAX]
+        staged = out / "input"
+        staged.mkdir()
+        for path in inputs:
+            os.link(path, staged / os.path.basename(path))
+        rendered = out / "numbered"
+        rendered.mkdir()
+        process_audio_files(str(staged), str(rendered))
+        return inputs
+    raise ValueError(f"Unknown case: {case}")
+
+
+def worker(case: str, workdir: Path) -> dict:
+    from speech_audio_tools.probe import probe_many
+
+    spawned = []
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self, *args, **kwargs):
+        spawned.append(1)
+        original_init(self, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        # Probe inputs before timing so cached metadata does not skew any case.
+        inputs = sorted(str(p) for p in (workdir / "raw").glob("*.mp3")) + [str(workdir / "long.mp3")]
+        durations = {path: info.duration or 0.0 for path, info in probe_many(inputs).items()}
+
+        self_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        subprocess.Popen.__init__ = counting_init
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                processed = _run_case(case, workdir, Path(tmp))
+        finally:
+            wall = time.perf_counter() - start
+            subprocess.Popen.__init__ = original_init
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    def cpu(before, after):
+        return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+    audio_seconds = sum(durations.get(path, 0.0) for path in processed)
+    return {
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu(self_before, self_after) + cpu(children_before, children_after), 3),
+        "cpu_seconds_children": round(cpu(children_before, children_after), 3),
+        "peak_rss_mb": round(self_after.ru_maxrss / 1024, 1),
+        "peak_rss_children_mb": round(children_after.ru_maxrss / 1024, 1),
+        "subprocesses": len(spawned),
+        "input_files": len(processed),
+        "audio_seconds": round(audio_seconds, 1),
+        "realtime_factor": round(audio_seconds / wall, 1) if wall else None,
+    }
+
+
+#
+# Driver
+#
+def _metadata(manifest: dict) -> dict:
+    def output_of(cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT).stdout.strip()
+        except OSError:
+            return None
+
+    ffmpeg_version = output_of(["ffmpeg", "-version"])
+    return {
+        "commit": output_of(["git", "rev-parse", "--short", "HEAD"]),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg_version.splitlines()[0] if ffmpeg_version else None,
+        "corpus": manifest,
+    }
+
+
+def run_worker(case: str, workdir: Path) -> dict:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(ROOT / "src")
+    cmd = [sys.executable, __file__, "--worker", case, "--workdir", str(workdir)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_comparison(baseline: dict, current: dict) -> None:
+    print(f"{'case':<16}{'metric':<14}{'baseline':>12}{'current':>12}{'change':>10}")
+    for case, stats in current["results"].items():
+        old = baseline.get("results", {}).get(case)
+        if not old or "error" in old or "error" in stats:
+            continue
+        for metric in ("wall_seconds", "cpu_seconds", "peak_rss_mb", "subprocesses"):
+            before, after = old[metric], stats[metric]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"{case:<16}{metric:<14}{before:>12}{after:>12}{change:>10}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clips", type=int, default=200, help="Number of Q/A pairs in the corpus")
+    parser.add_argument("--long-minutes", type=float, default=10.0, help="Length of the long input file")
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma separated subset of cases")
+    parser.add_argument("--workdir", type=Path, help="Corpus directory (kept and reused between runs)")
+    parser.add_argument("--output", type=Path, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to print a comparison against")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.workdir)))
+        return 0
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        workdir.mkdir(parents=True, exist_ok=True)
+        manifest = build_corpus(workdir, args.clips, args.long_minutes)
+        results = {}
+        for case in cases:
+            results[case] = run_worker(case, workdir)
+            print(f"{case}: {results[case]}", file=sys.stderr)
+
+    report = {"meta": _metadata(manifest), "results": results}
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload)
+    else:
+        print(payload)
+    if args.compare:
+        print_comparison(json.loads(args.compare.read_text()), report)
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
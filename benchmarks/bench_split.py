@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Trim/split of a long recording: in-memory decode vs memory-mapped PCM cache.
+
+A synthetic speech-like MP3 (tone bursts separated by pauses) is trimmed and split
+by duration and by silence with `mmap=False` (decode into the heap) and with
+`mmap=True` (decode once into the PCM cache, then map it; the first call pays the
+decode, later calls reuse it). For each run the script reports wall time and peak
+Python/NumPy heap allocation (tracemalloc; mapped pages are not heap). It also
+times pydub's `detect_silence` against the vectorized one on a short excerpt.
+Results are printed as JSON.
+
+Requirements: FFmpeg on PATH.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from pydub import AudioSegment  # noqa: E402
+from pydub import silence as pydub_silence  # noqa: E402
+
+from speech_audio_tools.buffer import AudioBuffer  # noqa: E402
+from speech_audio_tools.silence import detect_silence  # noqa: E402
+from speech_audio_tools.split_audio import split_by_duration, split_by_silence  # noqa: E402
+from speech_audio_tools.trim_audio import clip_audio  # noqa: E402
+
+
+def make_recording(seconds: float, frame_rate: int = 44100) -> AudioSegment:
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    voiced = (t % 7.0) < 5.5
+    pcm = (np.sin(2 * np.pi * 180.0 * t) * 9000 * voiced).astype(np.int16)
+    return AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=1)
+
+
+def measure(label: str, fn) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"run": label, "wall_seconds": round(wall, 3), "peak_heap_mb": round(peak / 2**20, 1)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=30.0, help="Length of the synthetic recording")
+    parser.add_argument("--silence-seconds", type=float, default=60.0, help="Excerpt used for detect_silence timing")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SAT_CACHE_DIR"] = os.path.join(tmp, "cache")
+        recording = make_recording(args.minutes * 60)
+        source = os.path.join(tmp, "long.mp3")
+        recording.export(source, format="mp3")
+        for mmap in (False, True):
+            mode = "mmap" if mmap else "heap"
+            out = os.path.join(tmp, mode)
+            runs = [
+                ("trim", lambda: clip_audio(source, os.path.join(tmp, f"{mode}.mp3"), 60_000, 60_000, mmap=mmap)),
+                ("split-duration", lambda: split_by_duration(source, 10, out, overlap=0, mmap=mmap)),
+                ("split-silence", lambda: split_by_silence(source, out, 800, -30, mmap=mmap)),
+            ]
+            for name, fn in runs:
+                results.append(measure(f"{name} ({mode})", fn))
+
+        excerpt = recording[: int(args.silence_seconds * 1000)]
+        buffer = AudioBuffer.from_segment(excerpt)
+        results.append(measure("detect_silence (pydub)", lambda: pydub_silence.detect_silence(excerpt, 800, -30)))
+        results.append(measure("detect_silence (vectorized)", lambda: detect_silence(buffer, 800, -30)))
+    print(json.dumps({"minutes": args.minutes, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
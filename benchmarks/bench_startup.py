@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Track `python -X importtime` startup cost of every `sat` subcommand.
+
+Each subcommand is started with `--help` in a fresh interpreter. The script records
+the median wall time, the total import time and the heaviest top-level imports, and
+flags heavy SDKs (boto3, openai, pydub, numpy, mutagen) that leak into the startup
+path. With --baseline it compares against a previous JSON run and exits non-zero
+when a subcommand got slower than the tolerance allows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import typer  # noqa: E402
+
+from speech_audio_tools.cli import app  # noqa: E402
+
+HEAVY_MODULES = ("boto3", "botocore", "openai", "pydub", "numpy", "mutagen")
+
+
+def iter_subcommands() -> List[Tuple[str, ...]]:
+    """Return argv prefixes for the root command and every (nested) subcommand."""
+    commands: List[Tuple[str, ...]] = [()]
+
+    def walk(group, prefix):
+        for name, command in sorted(getattr(group, "commands", {}).items()):
+            commands.append(prefix + (name,))
+            walk(command, prefix + (name,))
+
+    walk(typer.main.get_command(app), ())
+    return commands
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Map top-level imported modules to their cumulative import time (us)."""
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        if name.startswith("  "):
+            continue  # nested import, already counted by its parent
+        top_level[name.strip()] = int(cumulative)
+    return top_level
+
+
+def measure(argv: Tuple[str, ...], repeat: int) -> dict:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(ROOT / "src")
+    cmd = [sys.executable, "-X", "importtime", "-m", "speech_audio_tools.cli", *argv, "--help"]
+    walls, imports = [], []
+    modules: Dict[str, int] = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        walls.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} --help failed: {proc.stderr[-500:]}")
+        modules = parse_importtime(proc.stderr)
+        imports.append(sum(modules.values()))
+    heaviest = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    return {
+        "command": " ".join(("sat",) + argv),
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "import_ms": round(statistics.median(imports) / 1000, 1),
+        "heavy_modules": sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES),
+        "heaviest_imports_ms": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float, slack_ms: float) -> List[str]:
+    previous = {entry["command"]: entry for entry in baseline}
+    problems = []
+    for entry in results:
+        if entry["heavy_modules"]:
+            problems.append(f"{entry['command']}: imports {', '.join(entry['heavy_modules'])} at startup")
+        old = previous.get(entry["command"])
+        if old and entry["import_ms"] > old["import_ms"] * (1 + tolerance) + slack_ms:
+            problems.append(f"{entry['command']}: import time {old['import_ms']}ms -> {entry['import_ms']}ms")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per subcommand (median is kept)")
+    parser.add_argument("--output", type=Path, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative import-time growth")
+    parser.add_argument("--slack-ms", type=float, default=10.0, help="Allowed absolute import-time growth")
+    args = parser.parse_args()
+
+    results = [measure(argv, args.repeat) for argv in iter_subcommands()]
+    payload = json.dumps({"python": sys.version.split()[0], "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(payload)
+    else:
+        print(payload)
+
+    problems = [f"{r['command']}: imports {', '.join(r['heavy_modules'])} at startup" for r in results if r["heavy_modules"]]
+    if args.baseline:
+        problems = compare(results, json.loads(args.baseline.read_text())["results"], args.tolerance, args.slack_ms)
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compare the in-process phase-vocoder time stretch with the ffmpeg atempo path.
+
+A synthetic voiced signal (harmonics + syllable-rate envelope) is stretched at several
+speeds. For each path the script reports wall time, throughput (audio seconds per
+wall second), duration error, pitch error of the fundamental (cents) and the
+log-spectral distance between both outputs. Results are printed as JSON.
+
+Requirements: FFmpeg on PATH (for the atempo reference).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from pydub import AudioSegment  # noqa: E402
+
+from speech_audio_tools.change_speed import build_speed_filters  # noqa: E402
+from speech_audio_tools.time_stretch import stretch_segment  # noqa: E402
+
+FUNDAMENTAL_HZ = 180.0
+
+
+def make_voiced_segment(seconds: float, frame_rate: int) -> AudioSegment:
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    harmonics = sum(np.sin(2 * np.pi * FUNDAMENTAL_HZ * k * t) / k for k in range(1, 8))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * t)  # ~4 syllables per second
+    pcm = (harmonics * envelope / 2.6 * 20000).astype(np.int16)
+    return AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=1)
+
+
+def _samples(seg: AudioSegment) -> np.ndarray:
+    return np.frombuffer(seg.raw_data, dtype=np.int16).astype(np.float64)
+
+
+def _fundamental(samples: np.ndarray, frame_rate: int) -> float:
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    freqs = np.fft.rfftfreq(len(samples), 1 / frame_rate)
+    band = (freqs > FUNDAMENTAL_HZ / 2) & (freqs < FUNDAMENTAL_HZ * 1.5)
+    return float(freqs[band][spectrum[band].argmax()])
+
+
+def _log_spectrum(samples: np.ndarray, n_fft: int = 4096) -> np.ndarray:
+    usable = len(samples) // n_fft * n_fft
+    frames = samples[:usable].reshape(-1, n_fft) * np.hanning(n_fft)
+    return 20 * np.log10(np.abs(np.fft.rfft(frames, axis=-1)).mean(axis=0) + 1e-9)
+
+
+def atempo(seg: AudioSegment, speed: float, workdir: Path) -> AudioSegment:
+    src, dst = workdir / "in.wav", workdir / "out.wav"
+    seg.export(src, format="wav")
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", str(src)]
+    cmd += ["-filter:a", ",".join(build_speed_filters(speed)), str(dst)]
+    subprocess.run(cmd, check=True)
+    return AudioSegment.from_file(dst, format="wav")
+
+
+def _measure(fn, source: AudioSegment, speed: float, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(source, speed)
+        best = min(best, time.perf_counter() - start)
+    samples = _samples(out)
+    expected = len(source.raw_data) // 2 / speed
+    f0 = _fundamental(samples, out.frame_rate)
+    return out, {
+        "wall_seconds": round(best, 4),
+        "throughput_x": round(len(source) / 1000 / best, 1),
+        "duration_error_pct": round(abs(len(samples) - expected) / expected * 100, 3),
+        "pitch_error_cents": round(1200 * np.log2(f0 / FUNDAMENTAL_HZ), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0, help="Length of the synthetic clip")
+    parser.add_argument("--frame-rate", type=int, default=44100)
+    parser.add_argument("--speeds", default="0.75,1.25,1.5,2.0")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    source = make_voiced_segment(args.seconds, args.frame_rate)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for speed in (float(s) for s in args.speeds.split(",")):
+            vocoded, vocoder_stats = _measure(stretch_segment, source, speed, args.repeat)
+            reference, atempo_stats = _measure(lambda s, f: atempo(s, f, workdir), source, speed, args.repeat)
+            lsd = np.sqrt(np.mean((_log_spectrum(_samples(vocoded)) - _log_spectrum(_samples(reference))) ** 2))
+            results.append(
+                {
+                    "speed": speed,
+                    "phase_vocoder": vocoder_stats,
+                    "ffmpeg_atempo": atempo_stats,
+                    "log_spectral_distance_db": round(float(lsd), 2),
+                }
+            )
+    print(json.dumps({"seconds": args.seconds, "frame_rate": args.frame_rate, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Time AWS transcript post-processing (prepare_segments) on synthetic diarized JSON.
+
+Builds a transcript with N pronunciation items (plus punctuation every few words)
+split into alternating-speaker segments, then times the columnar parser against
+the previous dict-based implementation kept below for reference. The legacy
+parser keys items by start time and rescans dict keys for every punctuation mark,
+so it is quadratic and drops items that share a start time; the comparison uses
+unique start times so both produce the same text. Results are printed as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from copy import deepcopy
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from speech_audio_tools.transcribe_aws import _REPLACE_LIST, prepare_segments  # noqa: E402
+
+WORDS = ("hello", "lesson", "less", "than", "what", "is", "this", "it", "a", "pen", "et", "cetera", "book")
+
+
+def make_transcript(n_items: int, words_per_segment: int = 12, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    items, segments = [], []
+    t = 0.0
+    for first in range(0, n_items, words_per_segment):
+        speaker = f"spk_{(first // words_per_segment) % 2}"
+        refs = []
+        for _ in range(min(words_per_segment, n_items - first)):
+            start, end = f"{t:.3f}", f"{t + 0.25:.3f}"
+            items.append(
+                {
+                    "start_time": start,
+                    "end_time": end,
+                    "type": "pronunciation",
+                    "alternatives": [{"content": rng.choice(WORDS)}],
+                    "speaker_label": speaker,
+                }
+            )
+            refs.append({"start_time": start, "end_time": end, "speaker_label": speaker})
+            if rng.random() < 0.15:
+                items.append({"type": "punctuation", "alternatives": [{"content": rng.choice(".,?")}]})
+            t += 0.3
+        segments.append(
+            {"start_time": refs[0]["start_time"], "end_time": refs[-1]["end_time"], "speaker_label": speaker, "items": refs}
+        )
+    return {"results": {"items": items, "speaker_labels": {"segments": segments}}}
+
+
+#
+# Previous implementation, for comparison
+#
+def _legacy_make_items_dict(data: dict) -> dict:
+    items_dict = {}
+    for item in data["results"]["items"]:
+        if item["type"] == "punctuation":
+            punctuation = item["alternatives"][0]["content"]
+            if not items_dict:
+                continue
+            last_key = list(items_dict.keys())[-1]
+            items_dict[last_key]["content"] = items_dict[last_key]["content"] + punctuation
+        else:
+            item["content"] = " ".join(alt["content"] for alt in item["alternatives"])
+            items_dict[item["start_time"]] = item
+    return items_dict
+
+
+def legacy_prepare_segments(data: dict) -> list:
+    data = deepcopy(data)  # the legacy parser mutates items in place
+    items = _legacy_make_items_dict(data)
+    segments = deepcopy(data["results"]["speaker_labels"]["segments"])
+    labels = list(Counter(seg["speaker_label"] for seg in segments))
+    if not labels:
+        return []
+    prev_teacher_seg = None
+    for seg in segments:
+        content = " ".join(items[itm["start_time"]]["content"] for itm in seg["items"])
+        for src, dst in _REPLACE_LIST:
+            content = content.replace(src, dst)
+        seg["content"] = content
+        seg["speaker_label"] = "teacher" if seg["speaker_label"] == labels[0] else "student"
+        seg.pop("items", None)
+        if seg["speaker_label"] == "student":
+            if len(content.split()) >= 3 and prev_teacher_seg is not None:
+                if "QnA" not in prev_teacher_seg:
+                    prev_teacher_seg["QnA"] = prev_teacher_seg["content"] + " := " + content
+                else:
+                    prev_teacher_seg["QnA"] = prev_teacher_seg["QnA"] + content
+        else:
+            prev_teacher_seg = seg
+    return segments
+
+
+def _best_of(fn, data, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000, help="Pronunciation items in the transcript")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser (best is reported)")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the current parser")
+    args = parser.parse_args()
+
+    data = make_transcript(args.items)
+    current, segments = _best_of(prepare_segments, data, args.repeat)
+    report = {"items": args.items, "segments": len(segments), "current_seconds": round(current, 4)}
+    if not args.skip_legacy:
+        legacy, expected = _best_of(legacy_prepare_segments, data, 1)
+        report["legacy_seconds"] = round(legacy, 4)
+        report["speedup"] = round(legacy / current, 1) if current else None
+        report["identical_output"] = segments == expected
+    print(json.dumps(report, indent=2))
+    return 0 if report.get("identical_output", True) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
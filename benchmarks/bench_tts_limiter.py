@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Throughput of the adaptive TTS limiter against a simulated throttling service.
+
+The fake service answers after `--latency` seconds and raises a Polly-style
+ThrottlingException when more than `--capacity` requests are in flight or more
+than `--tps` requests started within the last second. `--threads` workers push
+`--requests` requests through `ratelimit.AdaptiveLimiter`; the script reports
+achieved requests/s, throttles, and the rate/concurrency the limiter settled
+at. The ideal throughput is min(tps, capacity / latency).
+Results are printed as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from speech_audio_tools.ratelimit import AdaptiveLimiter  # noqa: E402
+
+
+class FakeService:
+    def __init__(self, capacity: int, tps: float, latency: float):
+        self.capacity, self.tps, self.latency = capacity, tps, latency
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._starts: collections.deque = collections.deque()
+
+    def synthesize(self) -> bytes:
+        with self._lock:
+            now = time.monotonic()
+            while self._starts and now - self._starts[0] > 1.0:
+                self._starts.popleft()
+            if self._in_flight >= self.capacity or len(self._starts) >= self.tps:
+                raise ClientError({"Error": {"Code": "ThrottlingException"}}, "SynthesizeSpeech")
+            self._starts.append(now)
+            self._in_flight += 1
+        try:
+            time.sleep(self.latency)
+            return b"audio"
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--capacity", type=int, default=6, help="Concurrent requests the service accepts")
+    parser.add_argument("--tps", type=float, default=20.0, help="Request starts per second the service accepts")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per request")
+    parser.add_argument("--chars", type=int, default=800, help="Characters per request")
+    args = parser.parse_args()
+
+    service = FakeService(args.capacity, args.tps, args.latency)
+    limiter = AdaptiveLimiter(
+        rate=2.0, concurrency=2, max_rate=200.0, max_concurrency=args.threads, retries=50, backoff=0.05
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(lambda _: limiter.call(service.synthesize, chars=args.chars), range(args.requests)))
+    wall = time.perf_counter() - start
+    stats = limiter.stats()
+    result = {
+        "requests": stats.requests,
+        "wall_seconds": round(wall, 2),
+        "requests_per_second": round(stats.requests_per_second, 2),
+        "chars_per_second": round(stats.chars_per_second),
+        "ideal_requests_per_second": round(min(args.tps, args.capacity / args.latency), 2),
+        "throttled": stats.throttled,
+        "settled_rate": round(stats.rate, 2),
+        "settled_concurrency": round(stats.concurrency, 2),
+    }
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,13 +3,24 @@ import re
 from glob import glob
 import json
 import hashlib
-from pydub import AudioSegment
+import sqlite3
 from collections import OrderedDict
+from contextlib import suppress
+
+from .audio_io import atomic_output, export_buffer, export_segment, load_buffer, load_segment
+from .buffer import AudioBuffer, concatenate
+from .filtergraph import render_section
+from .loudness import default_cache as loudness_cache
+from .profiling import span
+from .time_stretch import stretch_segment
 
 PARENT_DIR = os.path.dirname(os.path.realpath(__file__))
 # Pre-bundled number audio lives in-package under number_audio (1-100).
 NUMBER_AUDIO_DIR = os.path.join(PARENT_DIR, "number_audio")
 NUMBER_AUDIO_MAX_BUILTIN = 100
+COMBINE_BACKENDS = ("pydub", "ffmpeg")
+QA_FILE_PATTERN = re.compile(r"(\d+)-([QA])-(.+)\.mp3$")
+CLIP_CACHE_BYTES = 256 * 1024 * 1024
 
 
 def speed_change(sound, speed=1.0):
@@ -18,25 +29,55 @@ def speed_change(sound, speed=1.0):
     return sound_with_altered_frame_rate.set_frame_rate(sound.frame_rate)
 
 
+def _apply_speed(sound, speed, preserve_pitch=False):
+    with span("process", "time_stretch" if preserve_pitch else "speed_change") as sp:
+        sp.audio_seconds = sound.duration_seconds
+        if preserve_pitch:
+            return stretch_segment(sound, speed)
+        return speed_change(sound, speed)
+
+
 def speed_change_file(file_path, speed=1.0):
-    sound = AudioSegment.from_file(file_path, "mp3")
+    sound = load_segment(file_path, "mp3")
     sound = speed_change(sound, speed)
-    sound.export(file_path, format="mp3")
-
-
-def _combine_QA(file_Q, file_A, speed, repeat_question, pause_duration=500, end_duration=2000):
-    seg_Q = AudioSegment.from_file(file_Q, "mp3")
-    seg_A = AudioSegment.from_file(file_A, "mp3")
-    pause = AudioSegment.silent(duration=pause_duration)
-    if speed[0] != 1.0:
-        seg_Q = speed_change(seg_Q, speed[0])
-    if speed[1] != 1.0:
-        seg_A = speed_change(seg_A, speed[1])
-    seg = seg_Q
+    export_segment(sound, file_path, format="mp3")
+
+
+def _load_clip(file_path, speed=1.0, preserve_pitch=False, normalize=None, gain=0.0):
+    """Decode and speed-adjust a clip; with ``normalize`` (LUFS) apply its own loudness gain plus ``gain``."""
+    sound = load_segment(file_path, "mp3")
+    if normalize is not None:
+        # measured on the decoded clip we already hold; cached by path, size and mtime
+        gain += loudness_cache().get(file_path, AudioBuffer.from_segment(sound)).gain_to(normalize)
+    if speed != 1.0:
+        sound = _apply_speed(sound, speed, preserve_pitch)
+    return AudioBuffer.from_segment(sound).apply_gain(gain)
+
+
+def _clip_loader(preserve_pitch=False, normalize=None, gain=0.0):
+    """``loader(path, speed)`` for ``_qa_parts``; when normalizing, the section gain is folded into each clip."""
+    clip_gain = gain if normalize is not None else 0.0
+    return lambda path, speed: _load_clip(path, speed, preserve_pitch, normalize, clip_gain)
+
+
+def _section_gain(gain, normalize):
+    return 0.0 if normalize is not None else gain
+
+
+def _qa_parts(
+    file_Q, file_A, speed, repeat_question, pause_duration=500, end_duration=2000, preserve_pitch=False, loader=None
+):
+    """Q, pause, [Q, pause], A, end silence as ``concatenate`` parts.
+
+    ``loader(path, speed)`` may supply cached clips.
+    """
+    load = loader or _clip_loader(preserve_pitch)
+    buf_Q = load(file_Q, speed[0])
+    buf_A = load(file_A, speed[1])
+    parts = [buf_Q, pause_duration]
     if repeat_question:
-        seg += pause + seg_Q
-    seg += pause + seg_A + AudioSegment.silent(duration=end_duration)
-    return seg
+        parts += [buf_Q, pause_duration]
+    return parts + [buf_A, end_duration]
 
 
 def _collect_ordinal_numbers(input_directory):
@@ -68,13 +109,6 @@ def _find_answer_file(input_directory, number):
     return _find_mp3_file(input_directory, number, "-A-*")
 
 
-def _combine_audio_list(audio_list):
-    seg = AudioSegment.empty()
-    for a in audio_list:
-        seg = seg + a
-    return seg
-
-
 def _make_number_audio(number):
     from .tts import SimpleTTS
 
@@ -92,6 +126,30 @@ def _make_number_audio(number):
     return filename
 
 
+def _render_section(
+    qa_files,
+    section_filename,
+    speed=(1.0, 1.0),
+    gain=0.0,
+    repeat_question=True,
+    pause_duration=500,
+    number_file=None,
+    tags=None,
+    preserve_pitch=False,
+    normalize=None,
+    loader=None,
+):
+    load = loader or _clip_loader(preserve_pitch, normalize, gain)
+    parts = []
+    if number_file:
+        parts += [load(number_file, 1.0), 500]
+    for (file_Q, file_A) in qa_files:
+        parts += _qa_parts(file_Q, file_A, speed, repeat_question, pause_duration, loader=load)
+
+    section_audio = concatenate(parts).apply_gain_inplace(_section_gain(gain, normalize))
+    export_buffer(section_audio, section_filename, format="mp3", tags=tags, id3v2_version="3")
+
+
 def make_section_mp3_files(
     input_directory,
     output_directory,
@@ -103,62 +161,214 @@ def make_section_mp3_files(
     section_unit=10,
     artist="Homebrew",
     album=None,
+    preserve_pitch=False,
+    backend="pydub",
+    normalize=None,
 ):
-    """Make section mp3 files by combining raw Q & A mp3 files made by TTS."""
-    signatures = SignatureList(output_directory)
-    numbers = _collect_ordinal_numbers(input_directory)
-
-    # separate numbers into sections
-    for i in range(0, len(numbers), section_unit):
-        numbers_in_section = numbers[i : i + section_unit]
-        start, end = numbers_in_section[0], numbers_in_section[-1]
-        section_filename = os.path.join(output_directory, "{}-{}.mp3".format(start, end))
-        section_audio_QA_files = []
-        section_audio_files = []
-        for number in numbers_in_section:
-            file_Q = _find_question_file(input_directory, number)
-            file_A = _find_answer_file(input_directory, number)
-            if not (file_Q and file_A):
-                print("WARN: Corresponding files not found for ", number)
+    """Make section mp3 files by combining raw Q & A mp3 files made by TTS.
+
+    backend="pydub" assembles sections in Python; backend="ffmpeg" renders each
+    section with a single ffmpeg filtergraph process. ``normalize`` (LUFS)
+    gives every clip its own gain to that integrated loudness, on top of ``gain``.
+    """
+    builder = SectionBuilder(
+        input_directory,
+        output_directory,
+        speed=speed,
+        gain=gain,
+        repeat_question=repeat_question,
+        pause_duration=pause_duration,
+        add_number_audio=add_number_audio,
+        section_unit=section_unit,
+        artist=artist,
+        album=album,
+        preserve_pitch=preserve_pitch,
+        backend=backend,
+        normalize=normalize,
+        clip_cache_bytes=0,
+    )
+    try:
+        builder.build()
+    finally:
+        builder.signatures.close()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (path, st.st_size, st.st_mtime_ns)
+
+
+class SectionBuilder:
+    """Renders combine sections and keeps state between builds (``combine --watch``).
+
+    The Q/A index comes from one directory scan and is patched from changed
+    paths; sections whose member files still have the size and mtime of their
+    last render are skipped without rehashing; decoded, speed-adjusted clips
+    are kept in a bounded LRU so a rebuild only decodes files that changed.
+    """
+
+    def __init__(
+        self,
+        input_directory,
+        output_directory,
+        speed=(1.0, 1.0),
+        gain=0.0,
+        repeat_question=True,
+        pause_duration=500,
+        add_number_audio=False,
+        section_unit=10,
+        artist="Homebrew",
+        album=None,
+        preserve_pitch=False,
+        backend="pydub",
+        normalize=None,
+        clip_cache_bytes=CLIP_CACHE_BYTES,
+    ):
+        if backend not in COMBINE_BACKENDS:
+            raise ValueError(f'Invalid backend: "{backend}" (expected one of {", ".join(COMBINE_BACKENDS)})')
+        self.input_directory = input_directory
+        self.output_directory = output_directory
+        self.speed = speed
+        self.gain = gain
+        self.repeat_question = repeat_question
+        self.pause_duration = pause_duration
+        self.add_number_audio = add_number_audio
+        self.section_unit = section_unit
+        self.artist = artist
+        self.album = album
+        self.preserve_pitch = preserve_pitch
+        self.backend = backend
+        self.normalize = normalize
+        self.clip_cache_bytes = clip_cache_bytes
+        self.signatures = SignatureList(output_directory)
+        self._index = {}  # number -> {"Q": set of paths, "A": set of paths}
+        self._rendered = {}  # section filename -> member (path, size, mtime_ns) at last render
+        self._load = _clip_loader(preserve_pitch, normalize, gain)
+        self._clips = OrderedDict()
+        self._clip_bytes = 0
+        self.rescan()
+
+    def rescan(self):
+        self._index = {}
+        with os.scandir(self.input_directory) as entries:
+            for entry in entries:
+                self._add(entry.path)
+
+    def _add(self, path):
+        name = os.path.basename(path)
+        m = QA_FILE_PATTERN.match(name)
+        if not m:
+            if "-Q-" in name and name.endswith(".mp3"):
+                print("WARN: Unexpected file", path)
+            return
+        number, kind = m.group(1), m.group(2)
+        self._index.setdefault(number, {"Q": set(), "A": set()})[kind].add(path)
+
+    def update(self, changed_paths):
+        """Patch the index for added, modified or removed files."""
+        for path in changed_paths:
+            for kinds in self._index.values():
+                kinds["Q"].discard(path)
+                kinds["A"].discard(path)
+            if os.path.isfile(path):
+                self._add(path)
+        self._index = {n: kinds for n, kinds in self._index.items() if kinds["Q"] or kinds["A"]}
+
+    def numbers(self):
+        return sorted(number for number, kinds in self._index.items() if kinds["Q"])
+
+    def _find(self, number, kind):
+        paths = self._index.get(number, {}).get(kind)
+        return min(paths) if paths else None
+
+    def _clip(self, path, speed):
+        key = _stat_key(path) + (speed,)
+        clip = self._clips.get(key)
+        if clip is not None:
+            self._clips.move_to_end(key)
+            return clip
+        clip = self._load(path, speed)
+        if self.clip_cache_bytes:
+            self._clips[key] = clip
+            self._clip_bytes += clip.samples.nbytes
+            while self._clip_bytes > self.clip_cache_bytes and self._clips:
+                _, evicted = self._clips.popitem(last=False)
+                self._clip_bytes -= evicted.samples.nbytes
+        return clip
+
+    def build(self, changed_paths=None):
+        """Render outdated sections and return the files created."""
+        if changed_paths is not None:
+            self.update(changed_paths)
+        numbers = self.numbers()
+        created = []
+
+        # separate numbers into sections
+        for i in range(0, len(numbers), self.section_unit):
+            numbers_in_section = numbers[i : i + self.section_unit]
+            start, end = numbers_in_section[0], numbers_in_section[-1]
+            section_filename = os.path.join(self.output_directory, "{}-{}.mp3".format(start, end))
+            section_audio_QA_files = []
+            section_audio_files = []
+            for number in numbers_in_section:
+                file_Q = self._find(number, "Q")
+                file_A = self._find(number, "A")
+                if not (file_Q and file_A):
+                    print("WARN: Corresponding files not found for ", number)
+                    continue
+                section_audio_QA_files.append((file_Q, file_A))
+                section_audio_files.extend([file_Q, file_A])
+            members = tuple(_stat_key(f) for f in section_audio_files)
+            if self._rendered.get(section_filename) == members and os.path.exists(section_filename):
                 continue
-            section_audio_QA_files.append((file_Q, file_A))
-            section_audio_files.extend([file_Q, file_A])
-        section_updated = signatures.updated(section_filename, section_audio_files)
-        if os.path.exists(section_filename):
-            if section_updated:
-                print(f"Removing outdated file: {section_filename}")
-                os.remove(section_filename)
-            else:
+            signature = self.signatures.signature(section_audio_files)
+            if os.path.exists(section_filename):
+                if self.signatures.is_current(section_filename, signature):
+                    self._rendered[section_filename] = members
+                    continue
+                print(f"Replacing outdated file: {section_filename}")
+            if not (section_audio_QA_files or self.add_number_audio):
+                with suppress(FileNotFoundError):
+                    os.remove(section_filename)
+                self.signatures.forget(section_filename)
                 continue
-        section_audio_segments = []
-        if add_number_audio:
-            os.makedirs(NUMBER_AUDIO_DIR, exist_ok=True)
-            number = int(start)
-            number_filename = _make_number_audio(number)
-            number_audio = AudioSegment.from_file(number_filename)
-            pause = AudioSegment.silent(duration=500)
-            section_audio_segments.append(number_audio + pause)
-        for (file_Q, file_A) in section_audio_QA_files:
-            file_QA = _combine_QA(file_Q, file_A, speed, repeat_question, pause_duration)
-            section_audio_segments.append(file_QA)
-
-        if not section_audio_segments:
-            continue
-
-        section_audio = _combine_audio_list(section_audio_segments)
-        if gain != 0.0:
-            section_audio = section_audio.apply_gain(gain)
-        album_name = album or os.path.basename(output_directory).replace("_", " ").replace("-", " ").title()
-        tags = {"title": "{}-{} {}".format(start, end, album_name), "album": album_name, "artist": artist}
-        section_audio.export(section_filename, format="mp3", tags=tags, id3v2_version="3")
-        print('Created "{}"'.format(section_filename))
-
-        cleanup_glob_pattern = os.path.join(output_directory, "{}-*.mp3".format(start))
-        for target_file in glob(cleanup_glob_pattern):
-            if target_file != section_filename:
-                os.remove(target_file)
-                print('Removed "{}"'.format(target_file))
-    signatures.save()
+            # written to a temporary file and renamed, then journaled: a crash leaves either
+            # the old file or the new one, and a rerun redoes at most the section in progress
+            with atomic_output(section_filename) as tmp_filename:
+                self._render(tmp_filename, section_audio_QA_files, start, end)
+            self.signatures.record(section_filename, signature)
+            self._rendered[section_filename] = members
+            created.append(section_filename)
+            print('Created "{}"'.format(section_filename))
+
+            cleanup_glob_pattern = os.path.join(self.output_directory, "{}-*.mp3".format(start))
+            for target_file in glob(cleanup_glob_pattern):
+                if target_file != section_filename:
+                    with suppress(FileNotFoundError):  # another process may have cleaned it up
+                        os.remove(target_file)
+                    self._rendered.pop(target_file, None)
+                    self.signatures.forget(target_file)
+                    print('Removed "{}"'.format(target_file))
+        return created
+
+    def _render(self, section_filename, qa_files, start, end):
+        number_filename = _make_number_audio(int(start)) if self.add_number_audio else None
+        album_name = self.album or os.path.basename(self.output_directory).replace("_", " ").replace("-", " ").title()
+        tags = {"title": "{}-{} {}".format(start, end, album_name), "album": album_name, "artist": self.artist}
+        options = dict(
+            speed=self.speed,
+            gain=self.gain,
+            repeat_question=self.repeat_question,
+            pause_duration=self.pause_duration,
+            number_file=number_filename,
+            tags=tags,
+            preserve_pitch=self.preserve_pitch,
+            normalize=self.normalize,
+        )
+        if self.backend == "ffmpeg":
+            render_section(qa_files, section_filename, **options)
+        else:
+            _render_section(qa_files, section_filename, loader=self._clip, **options)
 
 
 def make_single_mp3_file(
@@ -172,6 +382,8 @@ def make_single_mp3_file(
     pause_duration=500,
     add_number_audio=False,
     artist="Homebrew",
+    preserve_pitch=False,
+    normalize=None,
 ):
     """Combine all QA pairs into a single MP3."""
     numbers = _collect_ordinal_numbers(input_directory)
@@ -179,13 +391,12 @@ def make_single_mp3_file(
         print("No QA audio found in " + input_directory)
         return 1
 
-    segments = []
+    load = _clip_loader(preserve_pitch, normalize, gain)
+    parts = []
     if add_number_audio:
         os.makedirs(NUMBER_AUDIO_DIR, exist_ok=True)
         number_filename = _make_number_audio(int(numbers[0]))
-        number_audio = AudioSegment.from_file(number_filename)
-        pause = AudioSegment.silent(duration=500)
-        segments.append(number_audio + pause)
+        parts += [load(number_filename, 1.0), 500]
 
     for number in numbers:
         file_Q = _find_question_file(input_directory, number)
@@ -193,75 +404,114 @@ def make_single_mp3_file(
         if not (file_Q and file_A):
             print("WARN: Corresponding files not found for " + number)
             continue
-        segments.append(_combine_QA(file_Q, file_A, speed, repeat_question, pause_duration))
+        parts += _qa_parts(file_Q, file_A, speed, repeat_question, pause_duration, loader=load)
 
-    if not segments:
+    if not parts:
         print("No segments to combine; aborting single-file export")
         return 1
 
-    audio = _combine_audio_list(segments)
-    if gain != 0.0:
-        audio = audio.apply_gain(gain)
+    audio = concatenate(parts).apply_gain_inplace(_section_gain(gain, normalize))
 
     album_name = album or os.path.basename(output_directory).replace("_", " ").replace("-", " ").title()
     out_filename = os.path.join(output_directory, f"{title}.mp3")
     tags = {"title": title, "album": album_name, "artist": artist}
-    audio.export(out_filename, format="mp3", tags=tags, id3v2_version="3")
+    with atomic_output(out_filename) as tmp_filename:
+        export_buffer(audio, tmp_filename, format="mp3", tags=tags, id3v2_version="3")
     print('Created "{}"'.format(out_filename))
     return 0
 
 
 def join_files(filenames, output_filename, title, album, artist, silence):
-    silent_segment = None
-    if silence > 0:
-        silent_segment = AudioSegment.silent(duration=silence)
-
-    audio_segments = []
+    parts = []
     for file in filenames:
         print(file)
-        audio_segments.append(AudioSegment.from_file(file))
+        parts.append(load_buffer(file))
         if os.path.splitext(file)[0].endswith("+"):
             continue
-        if silent_segment:
-            audio_segments.append(silent_segment)
+        if silence > 0:
+            parts.append(silence)
 
-    audio = _combine_audio_list(audio_segments)
+    audio = concatenate(parts)
     tags = {"title": title, "album": album, "artist": artist}
-    audio.export(output_filename, format="mp3", tags=tags, id3v2_version="3")
+    export_buffer(audio, output_filename, format="mp3", tags=tags, id3v2_version="3")
 
 
 class SignatureList:
-    _SIGNATURE_FILENAME = ".signatures.json"
+    """Content signature of each rendered output, kept in SQLite inside the output directory.
+
+    ``record`` commits as soon as a section has been written, so an interrupted
+    build resumes with the sections it finished. WAL mode and a busy timeout let
+    several ``sat`` processes share one output directory. A legacy
+    ``.signatures.json`` is imported on first use and then renamed to
+    ``.signatures.json.bak``. ``updated`` and ``save`` keep the old API working.
+    """
+
+    _DB_FILENAME = ".signatures.sqlite3"
+    _LEGACY_FILENAME = ".signatures.json"
+    _SCHEMA = "CREATE TABLE IF NOT EXISTS signatures (filename TEXT PRIMARY KEY, signature TEXT NOT NULL)"
 
     def __init__(self, output_dir):
-        self.signature_filename = os.path.join(output_dir, self._SIGNATURE_FILENAME)
-        if os.path.exists(self.signature_filename):
-            with open(self.signature_filename) as f:
-                self.signatures_dict = json.load(f)
-        else:
-            self.signatures_dict = {}
+        self.signature_filename = os.path.join(output_dir, self._DB_FILENAME)
+        self._conn = sqlite3.connect(self.signature_filename, timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(self._SCHEMA)
+        self._import_legacy(os.path.join(output_dir, self._LEGACY_FILENAME))
+
+    def _import_legacy(self, legacy_filename):
+        if not os.path.exists(legacy_filename):
+            return
+        with open(legacy_filename) as f:
+            signatures = json.load(f)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany("INSERT OR IGNORE INTO signatures VALUES (?, ?)", sorted(signatures.items()))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        try:
+            os.replace(legacy_filename, legacy_filename + ".bak")
+        except OSError:
+            pass
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, filename):
+        name = os.path.basename(filename)
+        row = self._conn.execute("SELECT signature FROM signatures WHERE filename = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def is_current(self, filename, signature):
+        return self.get(filename) == signature
+
+    def record(self, filename, signature):
+        """Store ``signature`` for ``filename`` (committed immediately)."""
+        self._conn.execute("INSERT OR REPLACE INTO signatures VALUES (?, ?)", (os.path.basename(filename), signature))
+
+    def forget(self, filename):
+        self._conn.execute("DELETE FROM signatures WHERE filename = ?", (os.path.basename(filename),))
 
     def updated(self, filename, content_files):
-        filename = os.path.basename(filename)
-        signature = self._calc_signature(content_files)
-        if filename in self.signatures_dict:
-            if self.signatures_dict[filename] == signature:
-                return False
-        self.signatures_dict[filename] = signature
+        """Record the signature of ``content_files``; True if it differs from the stored one."""
+        signature = self.signature(content_files)
+        if self.is_current(filename, signature):
+            return False
+        self.record(filename, signature)
         return True
 
     def save(self):
-        with open(self.signature_filename, "w") as f:
-            json.dump(self.signatures_dict, f, indent=4)
+        """No-op kept for callers of the JSON store; ``record`` already commits."""
 
     @staticmethod
-    def _calc_signature(file_list):
-        hasher = hashlib.md5()
-        for file_name in file_list:
-            with open(file_name, "rb") as file:
-                while True:
-                    buf = file.read(1024)
-                    if not buf:
-                        break
-                    hasher.update(buf)
-        return hasher.hexdigest()
+    def signature(file_list):
+        with span("hash", "signature", files=len(file_list)):
+            hasher = hashlib.md5()
+            for file_name in file_list:
+                with open(file_name, "rb") as file:
+                    while True:
+                        buf = file.read(1024)
+                        if not buf:
+                            break
+                        hasher.update(buf)
+            return hasher.hexdigest()
@@ -0,0 +1,307 @@
+"""Lazy audio operations rendered with one decode per input and one encode per output.
+
+Operations (clip, speed, gain, join) only record a graph; ``render`` decodes
+each input file once, applies the operations in memory and encodes each output
+once, instead of writing an intermediate MP3 after every step. With
+``preview`` only the first N seconds are rendered: the requested time range is
+pushed down through the graph so inputs are decoded only as far as needed.
+
+    from speech_audio_tools.audio_graph import join, load
+
+    talk = load("talk.mp3").clip(offset=500).speed(1.25).gain(-3)
+    join([load("intro.mp3"), talk], silence=300).render("lesson.mp3", tags={"title": "Lesson 1"})
+"""
+from __future__ import annotations
+
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydub import AudioSegment
+
+from .audio_io import export_segment, load_segment
+from .encoders import container_for
+from .profiling import span
+
+_OPS = ("load", "clip", "speed", "gain", "join")
+
+
+class Node(ABC):
+    """An audio value in the graph; methods return new nodes and do no work."""
+
+    def clip(self, offset: int = 0, tail_offset: int = 0) -> "Node":
+        """Drop ``offset`` ms from the start and ``tail_offset`` ms from the end (as ``sat audio trim``)."""
+        return Clip(self, offset, tail_offset)
+
+    def speed(self, factor: float, preserve_pitch: bool = True) -> "Node":
+        """Change playback speed; keeps pitch by default (as ``sat audio speed``)."""
+        return Speed(self, factor, preserve_pitch)
+
+    def gain(self, db: float) -> "Node":
+        return Gain(self, db)
+
+    def render(self, output, preview: Optional[float] = None, **export_kwargs) -> str:
+        return render(self, output, preview=preview, **export_kwargs)
+
+    @abstractmethod
+    def duration_ms(self) -> float:
+        ...
+
+    @abstractmethod
+    def child_ranges(self, start: float, end: Optional[float]) -> List[Tuple["Node", float, Optional[float]]]:
+        """Time ranges of the inputs needed to produce ``[start, end)`` of this node."""
+
+    @abstractmethod
+    def combine(self, segments: List[AudioSegment], start: float, end: Optional[float]) -> AudioSegment:
+        """Produce ``[start, end)`` of this node from its inputs' ranges (in ``child_ranges`` order)."""
+
+    def _demand(self, renderer: "_Renderer", start: float, end: Optional[float]) -> None:
+        for child, child_start, child_end in self.child_ranges(start, end):
+            child._demand(renderer, child_start, child_end)
+
+    def _evaluate(self, renderer: "_Renderer", start: float, end: Optional[float]) -> AudioSegment:
+        segments = [renderer.evaluate(child, s, e) for child, s, e in self.child_ranges(start, end)]
+        return self.combine(segments, start, end)
+
+
+class Source(Node):
+    """A decoded input file; the renderer supplies ``[start, end)`` of it as the only segment."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+
+    def duration_ms(self) -> float:
+        from .probe import probe
+
+        duration = probe(self.path).duration
+        return duration * 1000 if duration is not None else float("inf")
+
+    def child_ranges(self, start, end):
+        return []
+
+    def combine(self, segments, start, end):
+        return segments[0]
+
+    def _demand(self, renderer, start, end):
+        renderer.request(self.path, start, end)
+
+    def _evaluate(self, renderer, start, end):
+        return self.combine([renderer.decoded(self.path, start, end)], start, end)
+
+
+class Clip(Node):
+    def __init__(self, child: Node, offset: int = 0, tail_offset: int = 0):
+        if offset < 0 or tail_offset < 0:
+            raise ValueError("Clip offsets must not be negative.")
+        self.child, self.offset, self.tail_offset = child, offset, tail_offset
+
+    def duration_ms(self) -> float:
+        return max(self.child.duration_ms() - self.offset - self.tail_offset, 0)
+
+    def child_ranges(self, start, end):
+        child_end = None if end is None else self.offset + end
+        if end is not None and self.tail_offset:
+            child_end = min(child_end, self.child.duration_ms() - self.tail_offset)
+        return [(self.child, self.offset + start, child_end)]
+
+    def combine(self, segments, start, end):
+        seg = segments[0]
+        if end is None and self.tail_offset:
+            seg = seg[: max(len(seg) - self.tail_offset, 0)]
+        return seg
+
+
+class Speed(Node):
+    def __init__(self, child: Node, factor: float, preserve_pitch: bool = True):
+        if factor <= 0:
+            raise ValueError("Speed must be greater than zero.")
+        self.child, self.factor, self.preserve_pitch = child, factor, preserve_pitch
+
+    def duration_ms(self) -> float:
+        return self.child.duration_ms() / self.factor
+
+    def child_ranges(self, start, end):
+        return [(self.child, start * self.factor, None if end is None else end * self.factor)]
+
+    def combine(self, segments, start, end):
+        from .audio import _apply_speed
+
+        seg = segments[0] if self.factor == 1.0 else _apply_speed(segments[0], self.factor, self.preserve_pitch)
+        return seg if end is None else seg[: int(end - start)]
+
+
+class Gain(Node):
+    def __init__(self, child: Node, db: float):
+        self.child, self.db = child, db
+
+    def duration_ms(self) -> float:
+        return self.child.duration_ms()
+
+    def child_ranges(self, start, end):
+        return [(self.child, start, end)]
+
+    def combine(self, segments, start, end):
+        if self.db == 0.0:
+            return segments[0]
+        with span("process", "gain"):
+            return segments[0].apply_gain(self.db)
+
+
+class Join(Node):
+    """Children in order, each followed by ``silence`` ms (as ``sat audio join``)."""
+
+    def __init__(self, children: Sequence[Node], silence: int = 0):
+        if not children:
+            raise ValueError("join needs at least one input.")
+        self.children, self.silence = list(children), silence
+
+    def duration_ms(self) -> float:
+        return sum(child.duration_ms() + self.silence for child in self.children)
+
+    def _layout(self, start, end) -> List[Tuple[Optional[Node], float, Optional[float], float]]:
+        """(child or None, child start, child end, trailing silence) for the parts overlapping the range."""
+        if start == 0 and end is None:
+            return [(child, 0, None, self.silence) for child in self.children]
+        parts = []
+        position = 0.0
+        for child in self.children:
+            if end is not None and position >= end:
+                break
+            length = child.duration_ms()
+            child_start, child_end = max(start - position, 0), length if end is None else min(end - position, length)
+            silence_start = max(start, position + length)
+            silence_end = position + length + self.silence if end is None else min(end, position + length + self.silence)
+            if child_start < child_end:
+                parts.append((child, child_start, child_end, max(silence_end - silence_start, 0)))
+            elif silence_end > silence_start:
+                parts.append((None, 0, 0, silence_end - silence_start))
+            position += length + self.silence
+        return parts
+
+    def child_ranges(self, start, end):
+        return [(child, s, e) for child, s, e, _ in self._layout(start, end) if child is not None]
+
+    def combine(self, segments, start, end):
+        pieces = iter(segments)
+        with span("process", "concatenate") as sp:
+            seg = AudioSegment.empty()
+            for child, _, _, silence in self._layout(start, end):
+                if child is not None:
+                    seg += next(pieces)
+                if silence:
+                    seg += AudioSegment.silent(duration=silence)
+            sp.audio_seconds = seg.duration_seconds
+        return seg
+
+
+def load(path) -> Node:
+    return Source(path)
+
+
+def join(nodes: Sequence[Node], silence: int = 0) -> Node:
+    return Join(nodes, silence)
+
+
+class _Renderer:
+    """Decodes every source once (over the union of requested ranges), then evaluates nodes."""
+
+    def __init__(self):
+        self._windows: Dict[str, List[Optional[float]]] = {}
+        self._decoded: Dict[str, Tuple[float, AudioSegment]] = {}
+        self._memo: Dict[Tuple[int, float, Optional[float]], AudioSegment] = {}
+
+    def demand(self, node: Node, start: float, end: Optional[float]) -> None:
+        node._demand(self, start, end)
+
+    def request(self, path: str, start: float, end: Optional[float]) -> None:
+        """Widen the decode window of ``path`` to cover ``[start, end)``."""
+        window = self._windows.setdefault(path, [start, end])
+        window[0] = min(window[0], start)
+        window[1] = None if window[1] is None or end is None else max(window[1], end)
+
+    def decode(self) -> None:
+        for path, (start, end) in self._windows.items():
+            options = {}
+            if start > 0:
+                options["start_second"] = start / 1000
+            if end is not None:
+                options["duration"] = (end - start) / 1000
+            self._decoded[path] = (start, load_segment(path, **options))
+
+    def decoded(self, path: str, start: float, end: Optional[float]) -> AudioSegment:
+        offset, seg = self._decoded[path]
+        return seg[int(start - offset) : None if end is None else int(end - offset)]
+
+    def evaluate(self, node: Node, start: float, end: Optional[float]) -> AudioSegment:
+        key = (id(node), start, end)
+        if key in self._memo:
+            return self._memo[key]
+        result = node._evaluate(self, start, end)
+        self._memo[key] = result
+        return result
+
+
+def render_many(outputs: Sequence[Tuple[Node, object, dict]], preview: Optional[float] = None) -> List[str]:
+    """Render ``(node, output path, export kwargs)`` jobs, decoding inputs shared between them once."""
+    end = None if preview is None else preview * 1000
+    renderer = _Renderer()
+    for node, _, _ in outputs:
+        renderer.demand(node, 0, end)
+    renderer.decode()
+    created = []
+    for node, output, export_kwargs in outputs:
+        output = os.fspath(output)
+        options = dict(export_kwargs)
+        options.setdefault("format", container_for(output))
+        if options.get("tags") and options["format"] == "mp3":
+            options.setdefault("id3v2_version", "3")
+        export_segment(renderer.evaluate(node, 0, end), output, **options)
+        created.append(output)
+    return created
+
+
+def render(node: Node, output, preview: Optional[float] = None, **export_kwargs) -> str:
+    """Render ``node`` to ``output``; ``preview`` limits it to the first N seconds."""
+    return render_many([(node, output, export_kwargs)], preview)[0]
+
+
+def _parse_node(spec, inputs: Dict[str, Node], base: Path) -> Node:
+    if isinstance(spec, str):
+        return inputs[spec] if spec in inputs else Source(base / spec)
+    if not isinstance(spec, dict):
+        raise ValueError(f"Expected an input name, path or operation, got {spec!r}")
+    ops = [op for op in _OPS if op in spec]
+    if len(ops) != 1:
+        raise ValueError(f"Each operation needs exactly one of {', '.join(_OPS)}: {spec}")
+    op = ops[0]
+    if op == "load":
+        return Source(base / spec["load"])
+    if op == "join":
+        return Join([_parse_node(child, inputs, base) for child in spec["join"]], spec.get("silence", 0))
+    child = _parse_node(spec[op], inputs, base)
+    if op == "clip":
+        return child.clip(spec.get("offset", 0), spec.get("tail_offset", 0))
+    if op == "speed":
+        return child.speed(float(spec["factor"]), spec.get("preserve_pitch", True))
+    return child.gain(float(spec["db"]))
+
+
+def load_recipe(recipe_path) -> List[Tuple[Node, str, dict]]:
+    """Parse a render recipe into ``(node, output path, export kwargs)`` jobs.
+
+    ``{"inputs": {"talk": "talk.mp3"}, "outputs": [{"output": "out.mp3", "tags": {...},
+    "graph": {"gain": {"speed": {"clip": "talk", "offset": 500}, "factor": 1.25}, "db": -3}}]}``
+    """
+    recipe_path = Path(recipe_path)
+    recipe = json.loads(recipe_path.read_text())
+    base = recipe_path.resolve().parent
+    inputs = {name: Source(base / path) for name, path in recipe.get("inputs", {}).items()}
+    jobs = []
+    for entry in recipe.get("outputs", []):
+        if "output" not in entry or "graph" not in entry:
+            raise ValueError(f"Each output needs 'output' and 'graph': {entry}")
+        export_kwargs = {"tags": entry["tags"]} if entry.get("tags") else {}
+        jobs.append((_parse_node(entry["graph"], inputs, base), str(base / entry["output"]), export_kwargs))
+    return jobs
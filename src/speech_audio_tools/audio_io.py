@@ -0,0 +1,81 @@
+"""Decode/encode entry points shared by all commands (instrumented with profiling spans)."""
+from __future__ import annotations
+
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+from pydub import AudioSegment
+
+from .buffer import AudioBuffer
+from .encoders import active_profile
+from .profiling import span
+
+_DEFAULT_MODE = 0o644
+
+
+@contextmanager
+def atomic_output(path):
+    """Yield a unique temporary path next to ``path``; it replaces ``path`` only if the block succeeds.
+
+    Readers (and concurrent writers) never see a partly written file. The
+    result keeps the mode of the file it replaces (0644 for a new file).
+    """
+    directory, name = os.path.split(os.fspath(path))
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = _DEFAULT_MODE
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+    os.close(fd)
+    os.chmod(tmp, mode)  # mkstemp creates 0600
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def load_segment(source, format=None, **kwargs) -> AudioSegment:
+    """Decode ``source`` (path or file object) into an AudioSegment."""
+    name = os.fspath(source) if isinstance(source, (str, os.PathLike)) else "<stream>"
+    with span("decode", name) as sp:
+        seg = AudioSegment.from_file(source, format, **kwargs)
+        sp.audio_seconds = seg.duration_seconds
+    return seg
+
+
+def export_segment(seg: AudioSegment, output, format="mp3", encoder=None, **kwargs):
+    """Encode ``seg`` to ``output`` (path or file object) with the active encoder profile.
+
+    Explicit ``codec``/``bitrate``/``parameters`` arguments take precedence over the profile.
+    """
+    name = os.fspath(output) if isinstance(output, (str, os.PathLike)) else "<stream>"
+    profile = active_profile(encoder)
+    for key, value in profile.export_kwargs(format).items():
+        kwargs.setdefault(key, value)
+    with span("encode", name, format=format, encoder=profile.name) as sp:
+        sp.audio_seconds = seg.duration_seconds
+        return seg.export(output, format=format, **kwargs)
+
+
+def load_buffer(source, format=None, mmap=False, **kwargs) -> AudioBuffer:
+    """Decode ``source`` into an AudioBuffer (sharing the decoded bytes).
+
+    With ``mmap=True`` a file path is decoded once into the PCM cache and memory-mapped (see ``pcm_cache``).
+    """
+    if mmap and isinstance(source, (str, os.PathLike)):
+        from .pcm_cache import open_pcm
+
+        return open_pcm(source)
+    return AudioBuffer.from_segment(load_segment(source, format, **kwargs))
+
+
+def export_buffer(buf: AudioBuffer, output, format="mp3", encoder=None, **kwargs):
+    """Encode an AudioBuffer; see ``export_segment``."""
+    return export_segment(buf.to_segment(), output, format=format, encoder=encoder, **kwargs)
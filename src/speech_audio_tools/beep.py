@@ -1,6 +1,8 @@
 import numpy as np
 from pydub import AudioSegment
 
+from .audio_io import export_segment
+
 
 def make_beep(
     output_file="beep.mp3",
@@ -19,6 +21,6 @@ def make_beep(
         channels=1,
     )
     audio_segment = audio_segment.apply_gain(volume_change=gain_db)
-    audio_segment.export(output_file, format="mp3")
+    export_segment(audio_segment, output_file, format="mp3")
     return output_file
 
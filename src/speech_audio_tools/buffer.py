@@ -0,0 +1,186 @@
+"""NumPy-backed PCM buffer used for in-memory processing between decode and encode.
+
+``AudioSegment`` keeps immutable ``bytes``, so every slice, gain change and
+``+`` copies the whole clip. ``AudioBuffer`` wraps a ``(frames, channels)``
+integer array instead: slicing returns views, gain can be applied in place (``apply_gain_inplace``) and
+``concatenate`` writes all parts into one preallocated array. Conversion to and
+from ``AudioSegment`` happens only at the decode/encode edges (``from_segment``
+shares the segment's bytes without copying).
+"""
+from __future__ import annotations
+
+from typing import Iterable, Sequence, Tuple, Union
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.utils import db_to_float
+
+from .profiling import span
+
+_SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+_GAIN_BLOCK_FRAMES = 1 << 18  # bounds the float scratch space used by apply_gain
+
+
+class AudioBuffer:
+    """PCM samples shaped ``(frames, channels)`` with a frame rate; slices are in milliseconds, like pydub."""
+
+    __slots__ = ("samples", "frame_rate")
+
+    def __init__(self, samples: np.ndarray, frame_rate: int):
+        if samples.ndim != 2:
+            raise ValueError("AudioBuffer samples must be shaped (frames, channels).")
+        self.samples = samples
+        self.frame_rate = frame_rate
+
+    @classmethod
+    def from_segment(cls, seg: AudioSegment) -> "AudioBuffer":
+        """Wrap ``seg`` without copying its data (the result is read-only until written via ``writable``)."""
+        if seg.sample_width not in _SAMPLE_DTYPES:
+            seg = seg.set_sample_width(2)
+        samples = np.frombuffer(seg.raw_data, dtype=_SAMPLE_DTYPES[seg.sample_width]).reshape(-1, seg.channels)
+        return cls(samples, seg.frame_rate)
+
+    @classmethod
+    def silent(cls, duration_ms: float, frame_rate: int = 44100, channels: int = 1, sample_width: int = 2):
+        frames = int(duration_ms * frame_rate / 1000)
+        return cls(np.zeros((frames, channels), dtype=_SAMPLE_DTYPES[sample_width]), frame_rate)
+
+    def to_segment(self) -> AudioSegment:
+        return AudioSegment(
+            data=self.samples.tobytes(),
+            sample_width=self.sample_width,
+            frame_rate=self.frame_rate,
+            channels=self.channels,
+        )
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[1]
+
+    @property
+    def sample_width(self) -> int:
+        return self.samples.dtype.itemsize
+
+    @property
+    def frame_count(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frame_count / self.frame_rate
+
+    def __len__(self) -> int:
+        return round(self.duration_seconds * 1000)
+
+    def _frame(self, ms: float) -> int:
+        if ms < 0:
+            ms += len(self)
+        return min(max(int(ms * self.frame_rate / 1000), 0), self.frame_count)
+
+    def __getitem__(self, key: slice) -> "AudioBuffer":
+        """``buf[start_ms:end_ms]`` as a view; negative positions count from the end."""
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("AudioBuffer supports millisecond slices only")
+        start = 0 if key.start is None else self._frame(key.start)
+        end = self.frame_count if key.stop is None else self._frame(key.stop)
+        return AudioBuffer(self.samples[start:max(start, end)], self.frame_rate)
+
+    def writable(self) -> "AudioBuffer":
+        """This buffer if its samples can be modified in place, else a copy."""
+        if self.samples.flags.writeable:
+            return self
+        return AudioBuffer(self.samples.copy(), self.frame_rate)
+
+    def apply_gain(self, db: float) -> "AudioBuffer":
+        """A copy scaled by ``db`` (``self`` when ``db`` is 0); same rounding as pydub."""
+        if db == 0.0 or self.frame_count == 0:
+            return self
+        return AudioBuffer(self.samples.copy(), self.frame_rate).apply_gain_inplace(db)
+
+    def apply_gain_inplace(self, db: float) -> "AudioBuffer":
+        """Scale by ``db`` in place and return ``self``.
+
+        Only for buffers that own their samples, such as ``concatenate`` results:
+        on a slice this would also change the buffer it is a view of.
+        """
+        if not self.samples.flags.writeable:
+            raise ValueError("Buffer is read-only; use apply_gain")
+        if db == 0.0 or self.frame_count == 0:
+            return self
+        factor = db_to_float(db)
+        limits = np.iinfo(self.samples.dtype)
+        with span("process", "gain") as sp:
+            sp.audio_seconds = self.duration_seconds
+            for start in range(0, self.frame_count, _GAIN_BLOCK_FRAMES):
+                block = self.samples[start : start + _GAIN_BLOCK_FRAMES]
+                block[...] = np.floor(np.clip(block * factor, limits.min, limits.max))
+        return self
+
+    def conform(self, frame_rate: int, channels: int, sample_width: int) -> "AudioBuffer":
+        """Convert to another format (through pydub, so results match ``AudioSegment`` arithmetic)."""
+        if (frame_rate, channels, sample_width) == (self.frame_rate, self.channels, self.sample_width):
+            return self
+        seg = self.to_segment().set_sample_width(sample_width).set_channels(channels).set_frame_rate(frame_rate)
+        return AudioBuffer.from_segment(seg)
+
+    def mono_float(self) -> np.ndarray:
+        """Samples mixed to mono and scaled to [-1, 1)."""
+        full_scale = float(2 ** (8 * self.sample_width - 1))
+        samples = self.samples if self.channels == 1 else self.samples.mean(axis=1, keepdims=True)
+        return samples[:, 0].astype(np.float64) / full_scale
+
+    def window_dbfs(self, window_ms: int, floor_db: float = -60.0) -> np.ndarray:
+        """RMS level (dBFS) of the non-zero mono samples in each ``window_ms`` window; ``floor_db`` if all zero."""
+        x = self.mono_float()
+        window = max(int(window_ms * self.frame_rate / 1000), 1)
+        starts = np.arange(0, len(x), window)
+        if len(starts) == 0:
+            return np.empty(0)
+        nonzero = x != 0
+        energy = np.add.reduceat(np.where(nonzero, x * x, 0.0), starts)
+        counts = np.add.reduceat(nonzero.astype(np.int64), starts)
+        levels = np.full(len(starts), floor_db)
+        has_audio = counts > 0
+        rms = np.sqrt(energy[has_audio] / counts[has_audio])
+        with np.errstate(divide="ignore"):
+            levels[has_audio] = np.where(rms > 0, 20 * np.log10(rms), floor_db)
+        return levels
+
+
+Part = Union[AudioBuffer, int, float]
+
+
+def _target_format(buffers: Iterable[AudioBuffer]) -> Tuple[int, int, int]:
+    # Same rule as pydub's AudioSegment._sync: the highest rate, channel count and width win.
+    buffers = list(buffers)
+    return (
+        max(b.frame_rate for b in buffers),
+        max(b.channels for b in buffers),
+        max(b.sample_width for b in buffers),
+    )
+
+
+def concatenate(parts: Sequence[Part]) -> AudioBuffer:
+    """Join buffers and silences (numbers, in ms) into one preallocated buffer.
+
+    Parts in a different format are converted to the highest frame rate,
+    channel count and sample width among them, as ``AudioSegment.__add__`` does.
+    """
+    buffers = [p for p in parts if isinstance(p, AudioBuffer)]
+    if not buffers:
+        raise ValueError("concatenate needs at least one AudioBuffer")
+    frame_rate, channels, sample_width = _target_format(buffers)
+    conformed = [p.conform(frame_rate, channels, sample_width) if isinstance(p, AudioBuffer) else p for p in parts]
+    lengths = [p.frame_count if isinstance(p, AudioBuffer) else int(p * frame_rate / 1000) for p in conformed]
+    with span("process", "concatenate") as sp:
+        out = np.empty((sum(lengths), channels), dtype=_SAMPLE_DTYPES[sample_width])
+        position = 0
+        for part, length in zip(conformed, lengths):
+            if isinstance(part, AudioBuffer):
+                out[position : position + length] = part.samples
+            else:
+                out[position : position + length] = 0
+            position += length
+        result = AudioBuffer(out, frame_rate)
+        sp.audio_seconds = result.duration_seconds
+    return result
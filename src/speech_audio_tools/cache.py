@@ -0,0 +1,27 @@
+"""Location of the per-user cache directory shared by persistent stores."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+CACHE_DIR_ENV = "SAT_CACHE_DIR"
+
+
+def cache_dir() -> Path:
+    """Return the cache directory, honoring $SAT_CACHE_DIR and $XDG_CACHE_HOME."""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "speech-audio-tools"
+
+
+def cache_path(name: str) -> str:
+    """Return a path inside the cache directory, or ':memory:' if it cannot be created."""
+    directory = cache_dir()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return ":memory:"
+    return str(directory / name)
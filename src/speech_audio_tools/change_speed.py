@@ -7,7 +7,9 @@ import subprocess
 from pathlib import Path
 from typing import Iterable, List
 
-from pydub.utils import mediainfo
+from .encoders import active_profile, container_for
+from .probe import probe
+from .profiling import is_enabled as profiling_enabled, span
 
 
 def ensure_ffmpeg(binary: str) -> None:
@@ -18,10 +20,10 @@ def ensure_ffmpeg(binary: str) -> None:
 
 
 def read_sample_rate(path: Path) -> int:
-    info = mediainfo(str(path))
-    if "sample_rate" not in info:
+    sample_rate = probe(path).sample_rate
+    if sample_rate is None:
         raise SystemExit(f"Could not determine sample rate for {path} via ffprobe.")
-    return int(info["sample_rate"])
+    return sample_rate
 
 
 def _split_tempo_factor(value: float) -> List[float]:
@@ -68,9 +70,14 @@ def run_ffmpeg(ffmpeg_binary: str, input_path: Path, output_path: Path, filters:
         str(input_path),
         "-filter:a",
         filter_arg,
+        *active_profile().ffmpeg_args(container_for(output_path)),
         str(output_path),
     ]
-    subprocess.run(cmd, check=True)
+    # probing costs an ffprobe run, so only do it when the span is recorded
+    audio_seconds = (probe(input_path).duration or 0.0) if profiling_enabled() else 0.0
+    with span("subprocess", "ffmpeg atempo", input=str(input_path)) as sp:
+        sp.audio_seconds = audio_seconds
+        subprocess.run(cmd, check=True)
 
 
 def process_speed(
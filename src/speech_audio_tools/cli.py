@@ -8,23 +8,10 @@ import typer
 from dotenv import load_dotenv
 
 from . import __version__
-from .tts import list_speakers, synthesize_speech
-from .audio import make_section_mp3_files, join_files
-from .change_speed import process_speed
-from .split_audio import split_by_silence, split_by_duration
-from .trim_audio import clip_audio
-from .trim_silence import trim_with_ffmpeg
-from .add_number import process_audio_files
-from .tag_album import tag_album
-from .beep import make_beep
-from .transcribe_openai import DEFAULT_MODEL as OPENAI_DEFAULT_MODEL, transcribe_file
-from .transcribe_aws import (
-    list_s3_objects,
-    upload_file,
-    delete_file,
-    transcribe_s3_object,
-)
+from .transcribe_openai import DEFAULT_MODEL as OPENAI_DEFAULT_MODEL
 
+# Command implementations (and pydub/numpy/boto3/openai behind them) are imported
+# inside each command so `sat --help` and light commands start quickly.
 
 app = typer.Typer(help="Speech & audio utilities (TTS + post-processing).", add_completion=False)
 tts_app = typer.Typer(help="Text-to-speech helpers.")
@@ -36,6 +23,43 @@ app.add_typer(audio_app, name="audio")
 app.add_typer(transcribe_app, name="transcribe")
 
 
+@app.callback()
+def main_options(
+    ctx: typer.Context,
+    profile: Optional[Path] = typer.Option(
+        None, "--profile", dir_okay=False, help="Write a JSON timing trace and print a per-stage summary (also $SAT_PROFILE)"
+    ),
+    encoder: Optional[str] = typer.Option(
+        None, "--encoder", help="Encoder profile for all exports: default, mp3-v2, mp3-v5, mp3-cbr128, mp3-fast, opus, aac"
+    ),
+):
+    if profile:
+        from . import profiling
+
+        profiling.enable(profile)
+        ctx.call_on_close(profiling.finish)
+    _use_encoder(encoder)
+
+
+def _use_encoder(name: Optional[str]) -> None:
+    if name is None:
+        return
+    from .encoders import set_profile
+
+    try:
+        set_profile(name)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--encoder")
+
+
+def _echo_tts_stats() -> None:
+    """Print what each TTS service limiter achieved in this process (once, after all steps ran)."""
+    from .ratelimit import summaries
+
+    for service, summary in summaries().items():
+        typer.echo(f"TTS ({service}): {summary}")
+
+
 def _parse_speed_pair(speed_str: str) -> Tuple[float, float]:
     if ":" in speed_str:
         left, right = speed_str.split(":")
@@ -44,6 +68,35 @@ def _parse_speed_pair(speed_str: str) -> Tuple[float, float]:
     return value, value
 
 
+@app.command("build")
+def build(
+    recipe: Path = typer.Argument(..., exists=True, dir_okay=False, help="JSON recipe of pipeline steps"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Show which steps are stale without running them"),
+    jobs: int = typer.Option(4, "--jobs", "-j", help="Independent steps run concurrently"),
+    env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
+):
+    """Run a recipe (tts/combine/speed/add-number/tag-album), rebuilding only stale steps."""
+
+    from .pipeline import UP_TO_DATE, Pipeline
+
+    try:
+        pipeline = Pipeline.load(recipe)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="RECIPE")
+    if dry_run:
+        plan = pipeline.plan()
+        for step, status in plan:
+            deps = ", ".join(pipeline.deps[step.id])
+            typer.echo(f"{status:<17} {step.id}  ({step.type} -> {step.output})" + (f"  after {deps}" if deps else ""))
+        stale = sum(status != UP_TO_DATE for _, status in plan)
+        typer.echo(f"{stale} of {len(plan)} step(s) to build")
+        return
+    load_dotenv(env_file, override=True)
+    for step, status in pipeline.run(max_workers=jobs):
+        typer.echo(f"{'Built' if status != UP_TO_DATE else 'Up to date'} {step.id}")
+    _echo_tts_stats()
+
+
 #
 # TTS commands
 #
@@ -53,6 +106,8 @@ def tts_speakers(
     engine: str = typer.Option("neural", "--engine", help="Engine name (neural, long-form, openai-tts-1, etc.)"),
     env_file: Path = typer.Option(".env", "--env-file", exists=False, help="Environment file to load"),
 ):
+    from .tts import list_speakers
+
     load_dotenv(env_file, override=True)
     speakers = list_speakers(lang, engine)
     for s in speakers:
@@ -69,11 +124,16 @@ def tts_synthesize(
     speed: Optional[float] = typer.Option(None, "--speed"),
     gain: float = typer.Option(0.0, "--gain"),
     env_file: Path = typer.Option(".env", "--env-file", exists=False),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .tts import synthesize_speech
+
+    _use_encoder(encoder)
     load_dotenv(env_file, override=True)
     output = output_file or Path(input_file).with_suffix(".mp3")
     synthesize_speech(lang, speaker, input_file, output, engine, speed, gain)
     typer.echo(f"Created {output}")
+    _echo_tts_stats()
 
 
 #
@@ -81,43 +141,171 @@ def tts_synthesize(
 #
 @transcribe_app.command("openai")
 def transcribe_openai_file(
-    input_file: Path = typer.Argument(..., exists=True, dir_okay=False),
-    output_file: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False),
+    inputs: List[str] = typer.Argument(..., help="Audio files, directories or glob patterns"),
+    output_file: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False, help="Single input only"),
+    output_dir: Optional[Path] = typer.Option(None, "--output-dir", "-d", file_okay=False, help="Default: next to input"),
     language: Optional[str] = typer.Option(None, "--language", "-l"),
     model: str = typer.Option(OPENAI_DEFAULT_MODEL, "--model"),
+    response_format: str = typer.Option("text", "--response-format", help="text, json, verbose_json, srt or vtt"),
+    jobs: int = typer.Option(4, "--jobs", "-j", help="Files transcribed concurrently"),
+    force: bool = typer.Option(False, "--force", help="Re-transcribe even if the .txt is newer than the audio"),
+    chunked: Optional[bool] = typer.Option(
+        None, "--chunked/--no-chunked", help="Split at silences and transcribe chunks concurrently (default: when over 25 MB)"
+    ),
+    chunk_seconds: float = typer.Option(600, "--chunk-seconds", help="Maximum chunk length in long-file mode"),
+    workers: int = typer.Option(4, "--workers", help="Chunks transcribed concurrently in long-file mode"),
+    transcode: Optional[str] = typer.Option(
+        None, "--transcode", help="Send a mono 16 kHz opus or mp3 rendition streamed from ffmpeg"
+    ),
+    transcode_bitrate: Optional[str] = typer.Option(None, "--transcode-bitrate", help="e.g. 24k (opus), 32k (mp3)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore and do not update the transcript cache"),
     env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
 ):
-    """Transcribe a local audio file using OpenAI Whisper."""
-
+    """Transcribe local audio files (or directories/globs, concurrently) using OpenAI Whisper."""
+
+    from .transcribe_openai import expand_inputs, transcribe_file, transcribe_files, transcript_path
+
+    if transcode and transcode not in ("opus", "mp3"):
+        raise typer.BadParameter("Choose opus or mp3", param_hint="--transcode")
+    try:
+        files = expand_inputs(inputs)
+    except FileNotFoundError as exc:
+        raise typer.BadParameter(f"No such file or directory: {exc}", param_hint="INPUTS")
+    if not files:
+        raise typer.BadParameter("No audio files matched", param_hint="INPUTS")
     load_dotenv(env_file, override=True)
-    out_path = transcribe_file(input_file, language=language, model=model, output_path=output_file)
-    typer.echo(f"Created {out_path}")
+    options = dict(
+        language=language,
+        model=model,
+        response_format=response_format,
+        chunked=chunked,
+        max_chunk_seconds=chunk_seconds,
+        max_workers=workers,
+        transcode=transcode,
+        transcode_bitrate=transcode_bitrate,
+        use_cache=not no_cache,
+    )
+    single = len(inputs) == 1 and len(files) == 1 and Path(inputs[0]) == files[0]
+    if single:
+        if output_dir:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        out_path = transcribe_file(files[0], output_path=output_file or transcript_path(files[0], output_dir), **options)
+        typer.echo(f"Created {out_path}")
+        return
+    if output_file:
+        raise typer.BadParameter("--output needs a single input file; use --output-dir", param_hint="--output")
+    if output_dir:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    options["chunk_workers"] = options.pop("max_workers")
+    results = transcribe_files(files, output_dir=output_dir, max_workers=jobs, force=force, **options)
+    try:
+        for path, out_path in results:
+            typer.echo(f"Created {out_path}" if out_path else f"Up to date {path}")
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="INPUTS")
+
+
+def _parse_timestamp(value: Optional[str]):
+    if value is None:
+        return None
+    from datetime import datetime, timezone
+
+    try:
+        stamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise typer.BadParameter(f"Expected an ISO date or datetime, got {value!r}")
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
 
 
 @transcribe_app.command("aws-list")
 def transcribe_aws_s3_list(
     bucket: str = typer.Option(..., "--bucket"),
     prefix: str = typer.Option(..., "--prefix"),
+    min_size: Optional[int] = typer.Option(None, "--min-size", help="Only objects of at least this many bytes"),
+    max_size: Optional[int] = typer.Option(None, "--max-size", help="Only objects of at most this many bytes"),
+    since: Optional[str] = typer.Option(None, "--since", help="Modified at or after (ISO date, UTC if no zone)"),
+    until: Optional[str] = typer.Option(None, "--until", help="Modified before (ISO date, UTC if no zone)"),
+    long: bool = typer.Option(False, "--long", "-l", help="Also print size and last-modified time"),
+    env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
+):
+    """List objects under an S3 prefix (streamed page by page)."""
+
+    from .transcribe_aws import iter_s3_objects
+
+    load_dotenv(env_file, override=True)
+    objects = iter_s3_objects(
+        bucket,
+        prefix,
+        min_size=min_size,
+        max_size=max_size,
+        modified_after=_parse_timestamp(since),
+        modified_before=_parse_timestamp(until),
+    )
+    for obj in objects:
+        uri = f"s3://{bucket}/{obj['Key']}"
+        if long:
+            modified = obj.get("LastModified")
+            typer.echo(f"{obj.get('Size', 0):>12}  {modified.isoformat() if modified else '-':<25}  {uri}")
+        else:
+            typer.echo(uri)
+
+
+@transcribe_app.command("aws-delete-prefix")
+def transcribe_aws_s3_delete_prefix(
+    bucket: str = typer.Option(..., "--bucket"),
+    prefix: str = typer.Option(..., "--prefix"),
+    keep_transcripts: bool = typer.Option(False, "--keep-transcripts", help="Leave <prefix>-transcript/ alone"),
+    workers: int = typer.Option(4, "--workers", help="Delete batches (1000 keys each) in flight"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask for confirmation"),
     env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
 ):
-    """List objects under an S3 prefix."""
+    """Delete every object under an S3 prefix (and its transcripts) in batches."""
+
+    from .transcribe_aws import delete_prefix
 
     load_dotenv(env_file, override=True)
-    for obj in list_s3_objects(bucket, prefix):
-        typer.echo(obj)
+    folder = prefix.strip("/")
+    targets = f"s3://{bucket}/{folder}/" + ("" if keep_transcripts else f" and s3://{bucket}/{folder}-transcript/")
+    if not yes:
+        typer.confirm(f"Delete everything under {targets}?", abort=True)
+    try:
+        deleted = delete_prefix(bucket, prefix, include_transcripts=not keep_transcripts, max_workers=workers)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc), param_hint="--prefix")
+    typer.echo(f"Deleted {deleted} objects")
 
 
 @transcribe_app.command("aws-upload")
 def transcribe_aws_s3_upload(
     bucket: str = typer.Option(..., "--bucket"),
     prefix: str = typer.Option(..., "--prefix"),
-    filename: Path = typer.Argument(..., exists=True, dir_okay=False),
+    filename: Path = typer.Argument(..., exists=True, help="File, or directory to sync"),
+    workers: int = typer.Option(8, "--workers", help="Files uploaded concurrently (directory sync)"),
+    chunk_size_mb: int = typer.Option(16, "--chunk-size-mb", help="Multipart chunk size (directory sync)"),
+    transcode: Optional[str] = typer.Option(
+        None, "--transcode", help="Stream a mono 16 kHz opus or mp3 rendition instead of the original (single file)"
+    ),
+    transcode_bitrate: Optional[str] = typer.Option(None, "--transcode-bitrate", help="e.g. 24k (opus), 32k (mp3)"),
     env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
 ):
-    """Upload a local file to S3 under prefix."""
+    """Upload a local file to S3 under prefix, or sync a directory (skipping unchanged objects)."""
+
+    from .transcribe_aws import sync_directory, upload_file
 
+    if transcode and transcode not in ("opus", "mp3"):
+        raise typer.BadParameter("Choose opus or mp3", param_hint="--transcode")
     load_dotenv(env_file, override=True)
-    key = upload_file(bucket, prefix, str(filename))
+    if filename.is_dir():
+        if transcode:
+            raise typer.BadParameter("--transcode applies to single files, not directory sync", param_hint="--transcode")
+        uploaded, skipped = sync_directory(
+            bucket, prefix, str(filename), max_workers=workers, chunksize=chunk_size_mb * 1024 * 1024
+        )
+        for key in uploaded:
+            typer.echo(f"Uploaded to s3://{bucket}/{key}")
+        typer.echo(f"{len(uploaded)} uploaded, {len(skipped)} unchanged")
+        return
+    key = upload_file(bucket, prefix, str(filename), transcode=transcode, transcode_bitrate=transcode_bitrate)
     typer.echo(f"Uploaded to s3://{bucket}/{key}")
 
 
@@ -131,10 +319,14 @@ def transcribe_aws_s3_transcribe(
     region: str = typer.Option("ap-northeast-1", "--region"),
     output_file: Optional[Path] = typer.Option(None, "--output", "-o", dir_okay=False),
     wait_seconds: int = typer.Option(5, "--wait-seconds", help="Polling interval"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore and do not update the transcript cache"),
+    no_ledger: bool = typer.Option(False, "--no-ledger", help="Do not resume or record jobs in the local job ledger"),
     env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
 ):
     """Start AWS Transcribe on an S3 object and fetch transcript."""
 
+    from .transcribe_aws import transcribe_s3_object
+
     load_dotenv(env_file, override=True)
     langs = [lang.strip() for lang in languages.split(",") if lang.strip()]
     transcript = transcribe_s3_object(
@@ -145,6 +337,8 @@ def transcribe_aws_s3_transcribe(
         media_format=media_format,
         region=region,
         wait_seconds=wait_seconds,
+        use_cache=not no_cache,
+        use_ledger=not no_ledger,
     )
     if output_file:
         output_file.write_text(transcript)
@@ -153,6 +347,51 @@ def transcribe_aws_s3_transcribe(
         typer.echo(transcript)
 
 
+@transcribe_app.command("aws-batch")
+def transcribe_aws_s3_batch(
+    bucket: str = typer.Option(..., "--bucket"),
+    prefix: str = typer.Option(..., "--prefix"),
+    languages: str = typer.Option(..., "--languages", help="Comma separated (e.g. ja-JP,en-US)"),
+    media_format: Optional[str] = typer.Option(None, "--media-format", help="Default: from each object's extension"),
+    region: str = typer.Option("ap-northeast-1", "--region"),
+    output_dir: Path = typer.Option(Path("."), "--output-dir", "-d", file_okay=False),
+    max_concurrent: int = typer.Option(50, "--max-concurrent", help="Jobs in flight (keep below the account quota)"),
+    min_wait: float = typer.Option(2.0, "--min-wait", help="Initial polling interval (seconds)"),
+    max_wait: float = typer.Option(60.0, "--max-wait", help="Polling backoff ceiling (seconds)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore and do not update the transcript cache"),
+    no_ledger: bool = typer.Option(False, "--no-ledger", help="Do not resume or record jobs in the local job ledger"),
+    env_file: Path = typer.Option(Path(".env"), "--env-file", exists=False),
+):
+    """Transcribe every media object under an S3 prefix concurrently."""
+
+    from .transcribe_aws import transcribe_s3_prefix
+
+    load_dotenv(env_file, override=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    langs = [lang.strip() for lang in languages.split(",") if lang.strip()]
+    results = transcribe_s3_prefix(
+        bucket=bucket,
+        prefix=prefix,
+        languages=langs,
+        media_format=media_format,
+        region=region,
+        max_concurrent=max_concurrent,
+        min_wait=min_wait,
+        max_wait=max_wait,
+        use_cache=not no_cache,
+        use_ledger=not no_ledger,
+    )
+    try:
+        for object_name, transcript in results:
+            # keep the extension: a.mp3 and a.wav under one prefix get separate transcripts
+            out_path = output_dir / (object_name + ".txt")
+            out_path.write_text(transcript)
+            typer.echo(f"Created {out_path}")
+    except RuntimeError as exc:  # jobs that failed on AWS, reported after the rest finished
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(code=1)
+
+
 @transcribe_app.command("aws-delete")
 def transcribe_aws_s3_delete(
     bucket: str = typer.Option(..., "--bucket"),
@@ -162,6 +401,8 @@ def transcribe_aws_s3_delete(
 ):
     """Delete an object from S3."""
 
+    from .transcribe_aws import delete_file
+
     load_dotenv(env_file, override=True)
     delete_file(bucket, prefix, object_name)
     typer.echo(f"Deleted s3://{bucket}/{prefix}/{object_name}")
@@ -181,12 +422,23 @@ def audio_combine(
     add_number_audio: bool = typer.Option(False, "--add-number-audio"),
     section_unit: int = typer.Option(10, "--section-unit"),
     artist: str = typer.Option("Homebrew", "--artist"),
+    preserve_pitch: bool = typer.Option(False, "--preserve-pitch", help="Time-stretch Q/A speed without shifting pitch"),
+    backend: str = typer.Option("pydub", "--backend", help="Section renderer: pydub or ffmpeg (one filtergraph per section)"),
+    normalize: Optional[float] = typer.Option(
+        None, "--normalize", help="Bring each Q/A clip to this integrated loudness in LUFS (e.g. -16)"
+    ),
+    watch: bool = typer.Option(False, "--watch", help="Keep running and re-render sections whose files change"),
+    debounce: float = typer.Option(1.0, "--debounce", help="Seconds of quiet before a watch rebuild"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .audio import CLIP_CACHE_BYTES, COMBINE_BACKENDS, SectionBuilder, make_section_mp3_files
+
+    if backend not in COMBINE_BACKENDS:
+        raise typer.BadParameter(f"Choose {' or '.join(COMBINE_BACKENDS)}", param_hint="--backend")
+    _use_encoder(encoder)
     output_directory.mkdir(parents=True, exist_ok=True)
     speed_q, speed_a = _parse_speed_pair(speed)
-    make_section_mp3_files(
-        str(raw_directory),
-        str(output_directory),
+    options = dict(
         speed=(speed_q, speed_a),
         gain=gain,
         repeat_question=repeat_question,
@@ -194,8 +446,33 @@ def audio_combine(
         add_number_audio=add_number_audio,
         section_unit=section_unit,
         artist=artist,
+        preserve_pitch=preserve_pitch,
+        backend=backend,
+        normalize=normalize,
     )
-    typer.echo(f"Combined into {output_directory}")
+    if not watch:
+        make_section_mp3_files(str(raw_directory), str(output_directory), **options)
+        typer.echo(f"Combined into {output_directory}")
+        return
+
+    from .watch import watch_changes
+
+    builder = SectionBuilder(str(raw_directory), str(output_directory), clip_cache_bytes=CLIP_CACHE_BYTES, **options)
+    builder.build()
+    typer.echo(f"Combined into {output_directory}; watching {raw_directory} (Ctrl+C to stop)")
+    try:
+        for changed in watch_changes(raw_directory, debounce=debounce):
+            changed = {path for path in changed if path.endswith(".mp3")}
+            if not changed:
+                continue
+            try:
+                created = builder.build(changed)
+            except Exception as exc:  # keep watching; the next change retries
+                typer.echo(f"Rebuild failed: {exc}", err=True)
+                continue
+            typer.echo(f"Rebuilt {len(created)} section(s)")
+    except KeyboardInterrupt:
+        typer.echo("Stopped watching")
 
 
 @audio_app.command("speed")
@@ -205,7 +482,11 @@ def audio_speed(
     speed: float = typer.Option(..., "--speed", help="Playback speed multiplier"),
     pitch_shift: float = typer.Option(0.0, "--pitch-shift", help="Semitones after speed change"),
     ffmpeg: str = typer.Option("ffmpeg", "--ffmpeg"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .change_speed import process_speed
+
+    _use_encoder(encoder)
     out = process_speed(input_file, output_directory, speed, pitch_shift, ffmpeg)
     typer.echo(f"Created {out}")
 
@@ -218,8 +499,13 @@ def audio_split_silence(
     silence_thresh: int = typer.Option(-20, "--silence-thresh"),
     album: str = typer.Option("Split audio", "--album"),
     title: Optional[str] = typer.Option(None, "--title"),
+    mmap: bool = typer.Option(True, "--mmap/--no-mmap", help="Decode once into the PCM cache and memory-map it"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
-    split_by_silence(input_file, output_dir, min_silence_len, silence_thresh, album, title)
+    from .split_audio import split_by_silence
+
+    _use_encoder(encoder)
+    split_by_silence(input_file, output_dir, min_silence_len, silence_thresh, album, title, mmap=mmap)
 
 
 @audio_app.command("split-duration")
@@ -230,8 +516,13 @@ def audio_split_duration(
     overlap: int = typer.Option(5, "--overlap"),
     album: str = typer.Option("Split audio", "--album"),
     title: Optional[str] = typer.Option(None, "--title"),
+    mmap: bool = typer.Option(True, "--mmap/--no-mmap", help="Decode once into the PCM cache and memory-map it"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
-    split_by_duration(input_file, segment_minutes, output_dir, overlap, album, title)
+    from .split_audio import split_by_duration
+
+    _use_encoder(encoder)
+    split_by_duration(input_file, segment_minutes, output_dir, overlap, album, title, mmap=mmap)
 
 
 @audio_app.command("trim")
@@ -240,9 +531,14 @@ def audio_trim(
     output_file: Optional[Path] = typer.Option(None, "--output", "-o"),
     offset: int = typer.Option(0, "--offset", help="ms to trim from start"),
     tail_offset: int = typer.Option(0, "--tail-offset", help="ms to trim from end"),
+    mmap: bool = typer.Option(True, "--mmap/--no-mmap", help="Decode once into the PCM cache and memory-map it"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .trim_audio import clip_audio
+
+    _use_encoder(encoder)
     out = output_file or input_file.with_suffix(".clipped.mp3")
-    clip_audio(input_file, out, offset, tail_offset)
+    clip_audio(input_file, out, offset, tail_offset, mmap=mmap)
     typer.echo(f"Created {out}")
 
 
@@ -252,7 +548,11 @@ def audio_trim_silence(
     output_file: Optional[Path] = typer.Option(None, "--output", "-o"),
     min_silence: float = typer.Option(1.0, "--min-silence"),
     threshold_db: int = typer.Option(-20, "--threshold-db"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .trim_silence import trim_with_ffmpeg
+
+    _use_encoder(encoder)
     out = output_file or input_file.with_suffix(".trimmed.mp3")
     trim_with_ffmpeg(str(input_file), str(out), min_silence=min_silence, threshold_db=threshold_db)
     typer.echo(f"Created {out}")
@@ -266,16 +566,47 @@ def audio_join(
     album: str = typer.Option(..., "--album"),
     artist: str = typer.Option(..., "--artist"),
     silence: int = typer.Option(0, "--silence", "-s", help="Silence between tracks (ms)"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .audio import join_files
+
+    _use_encoder(encoder)
     join_files([str(p) for p in inputs], str(output_filename), title, album, artist, silence)
     typer.echo(f"Created {output_filename}")
 
 
+@audio_app.command("render")
+def audio_render(
+    recipe: Path = typer.Argument(..., exists=True, dir_okay=False, help="JSON recipe of clip/speed/gain/join graphs"),
+    preview: Optional[float] = typer.Option(
+        None, "--preview", help="Render only the first N seconds, to <output>.preview.<ext>"
+    ),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
+):
+    """Render lazy audio graphs with one decode per input and one encode per output."""
+
+    from .audio_graph import load_recipe, render_many
+
+    _use_encoder(encoder)
+    try:
+        jobs = load_recipe(recipe)
+    except (ValueError, KeyError) as exc:
+        raise typer.BadParameter(str(exc), param_hint="RECIPE")
+    if preview is not None:
+        jobs = [(node, str(Path(out).with_suffix(".preview" + Path(out).suffix)), kw) for node, out, kw in jobs]
+    for out in render_many(jobs, preview=preview):
+        typer.echo(f"Created {out}")
+
+
 @audio_app.command("add-number")
 def audio_add_number(
     input_dir: Path = typer.Argument(..., exists=True, file_okay=False),
     output_dir: Path = typer.Argument(..., file_okay=False),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .add_number import process_audio_files
+
+    _use_encoder(encoder)
     output_dir.mkdir(parents=True, exist_ok=True)
     process_audio_files(str(input_dir), str(output_dir))
 
@@ -287,8 +618,18 @@ def audio_tag_album(
     output_dir: Optional[Path] = typer.Option(None, "--output-dir", "-o"),
     title: Optional[str] = typer.Option(None, "--title", help="Only valid for single-file input"),
     artist: str = typer.Option("Homebrew", "--artist", help="Artist tag to apply"),
+    jobs: int = typer.Option(8, "--jobs", "-j", help="Files tagged concurrently"),
 ):
-    tag_album(str(input_path), album=album, output_dir=str(output_dir) if output_dir else None, title=title, artist=artist)
+    from .tag_album import tag_album
+
+    tag_album(
+        str(input_path),
+        album=album,
+        output_dir=str(output_dir) if output_dir else None,
+        title=title,
+        artist=artist,
+        jobs=jobs,
+    )
 
 
 @audio_app.command("beep")
@@ -299,7 +640,11 @@ def audio_beep(
     amplitude: float = typer.Option(0.5, "--amplitude"),
     sampling_rate: int = typer.Option(44100, "--sampling-rate"),
     gain_db: float = typer.Option(10.0, "--gain-db"),
+    encoder: Optional[str] = typer.Option(None, "--encoder", help="Encoder profile for this command's outputs"),
 ):
+    from .beep import make_beep
+
+    _use_encoder(encoder)
     out = make_beep(
         output_file=str(output_file),
         frequency=frequency,
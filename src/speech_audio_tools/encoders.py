@@ -0,0 +1,105 @@
+"""Named encoder profiles applied to every export (pydub and ffmpeg paths alike).
+
+A profile fixes the ffmpeg encoder, bitrate or VBR quality and extra encoder
+options for the container it targets. MP3 profiles apply to every MP3 output;
+``opus`` and ``aac`` apply to outputs written in their own containers (e.g.
+``sat audio render`` to ``.ogg``/``.m4a``), since most commands name their
+outputs ``*.mp3``. ``default`` keeps ffmpeg's own settings.
+
+The active profile is chosen with ``sat --encoder NAME``, a command's own
+``--encoder`` option, or ``$SAT_ENCODER_PROFILE``.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+PROFILE_ENV = "SAT_ENCODER_PROFILE"
+DEFAULT_PROFILE = "default"
+
+# file extension -> container name for ffmpeg/pydub
+CONTAINERS = {".mp3": "mp3", ".ogg": "ogg", ".opus": "opus", ".m4a": "ipod", ".aac": "adts", ".wav": "wav"}
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    name: str
+    formats: Tuple[str, ...] = ()
+    codec: Optional[str] = None
+    bitrate: Optional[str] = None
+    parameters: Tuple[str, ...] = ()
+    description: str = ""
+
+    def applies_to(self, format: Optional[str]) -> bool:
+        return format in self.formats
+
+    def export_kwargs(self, format: Optional[str]) -> Dict[str, object]:
+        """Keyword arguments for ``AudioSegment.export`` (empty if the profile does not target ``format``)."""
+        if not self.applies_to(format):
+            return {}
+        kwargs: Dict[str, object] = {"codec": self.codec}
+        if self.bitrate:
+            kwargs["bitrate"] = self.bitrate
+        if self.parameters:
+            kwargs["parameters"] = list(self.parameters)
+        return kwargs
+
+    def ffmpeg_args(self, format: Optional[str]) -> List[str]:
+        """Output options for an ffmpeg command line writing ``format``."""
+        if not self.applies_to(format):
+            return []
+        args = ["-c:a", self.codec]
+        if self.bitrate:
+            args += ["-b:a", self.bitrate]
+        return args + list(self.parameters)
+
+
+_MP3 = ("mp3",)
+PROFILES: Dict[str, EncoderProfile] = {
+    profile.name: profile
+    for profile in (
+        EncoderProfile("default", description="ffmpeg's own encoder defaults"),
+        EncoderProfile("mp3-v2", _MP3, "libmp3lame", parameters=("-q:a", "2"), description="LAME VBR V2 (~190 kbps)"),
+        EncoderProfile("mp3-v5", _MP3, "libmp3lame", parameters=("-q:a", "5"), description="LAME VBR V5 (~130 kbps)"),
+        EncoderProfile("mp3-cbr128", _MP3, "libmp3lame", "128k", description="LAME 128 kbps CBR"),
+        EncoderProfile(
+            "mp3-fast",
+            _MP3,
+            "libmp3lame",
+            "128k",
+            ("-compression_level", "9"),
+            description="LAME 128 kbps CBR, fastest algorithm",
+        ),
+        EncoderProfile("opus", ("ogg", "opus"), "libopus", "64k", description="Opus 64 kbps (.ogg/.opus)"),
+        EncoderProfile("aac", ("ipod", "mp4", "adts"), "aac", "128k", description="AAC-LC 128 kbps (.m4a/.aac)"),
+    )
+}
+
+_active: Optional[str] = None
+
+
+def get_profile(name: str) -> EncoderProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f'Unknown encoder profile: "{name}" (choose from {", ".join(PROFILES)})') from None
+
+
+def set_profile(name: Optional[str]) -> None:
+    """Select the profile used by later exports in this process (None: back to $SAT_ENCODER_PROFILE)."""
+    global _active
+    if name is not None:
+        get_profile(name)
+    _active = name
+
+
+def active_profile(name: Optional[str] = None) -> EncoderProfile:
+    """``name`` if given, else the selected profile, else $SAT_ENCODER_PROFILE, else ``default``."""
+    return get_profile(name or _active or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE)
+
+
+def container_for(path) -> str:
+    """Export format for a file name (``.m4a`` -> ``ipod``); unknown extensions are passed through."""
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    return CONTAINERS.get(extension, extension.lstrip(".") or "mp3")
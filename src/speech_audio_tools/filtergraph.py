@@ -0,0 +1,113 @@
+"""Render a combine section with one ffmpeg filter_complex invocation."""
+from __future__ import annotations
+
+import subprocess
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .change_speed import build_speed_filters
+from .encoders import active_profile
+from .loudness import default_cache as loudness_cache
+from .probe import probe_many
+from .profiling import is_enabled as profiling_enabled, span
+
+_LAYOUTS = {1: "mono", 2: "stereo"}
+NUMBER_PAUSE_MS = 500
+
+
+def _speed_filters(speed: float, sample_rate: int, preserve_pitch: bool) -> List[str]:
+    if speed == 1.0:
+        return []
+    if preserve_pitch:
+        return build_speed_filters(speed)
+    # Same effect as audio.speed_change: reinterpret the frame rate, then resample back.
+    return [f"asetrate={int(sample_rate * speed)}", f"aresample={sample_rate}"]
+
+
+def build_section_command(
+    qa_files: Sequence[Tuple[str, str]],
+    output_file: str,
+    *,
+    speed=(1.0, 1.0),
+    gain: float = 0.0,
+    repeat_question: bool = True,
+    pause_duration: int = 500,
+    end_duration: int = 2000,
+    number_file: Optional[str] = None,
+    tags: Optional[Dict[str, str]] = None,
+    preserve_pitch: bool = False,
+    normalize: Optional[float] = None,
+    ffmpeg: str = "ffmpeg",
+) -> List[str]:
+    """Build the ffmpeg command that renders a whole section straight to MP3.
+
+    The layout matches the pydub backend: [number, pause], then per pair
+    Q, pause, [Q, pause], A, end silence; followed by a section-wide gain.
+    With ``normalize`` (LUFS) each input first gets its own loudness gain.
+    """
+    inputs = ([number_file] if number_file else []) + [f for pair in qa_files for f in pair]
+    infos = probe_many(inputs)
+    clip_gains = {}
+    if normalize is not None:
+        clip_gains = {path: m.gain_to(normalize) for path, m in loudness_cache().get_many(inputs).items()}
+
+    def volume(path: str) -> List[str]:
+        return [f"volume={clip_gains[path]:.2f}dB"] if clip_gains.get(path) else []
+
+    sample_rate = max(infos[f].sample_rate or 44100 for f in inputs)
+    channels = min(max(infos[f].channels or 1 for f in inputs), 2)
+    fmt = f"aformat=sample_fmts=s16:sample_rates={sample_rate}:channel_layouts={_LAYOUTS[channels]}"
+    pause = f"apad=pad_dur={pause_duration / 1000:.3f}"
+
+    chains: List[str] = []
+    labels: List[str] = []
+
+    def add_chain(index: int, filters: List[str], label: str) -> None:
+        chains.append(f"[{index}:a]{','.join(filters)}[{label}]")
+        labels.append(label)
+
+    index = 0
+    if number_file:
+        add_chain(index, volume(number_file) + [fmt, f"apad=pad_dur={NUMBER_PAUSE_MS / 1000:.3f}"], "n")
+        index += 1
+    for pair_no, (file_Q, file_A) in enumerate(qa_files):
+        q_filters = volume(file_Q) + _speed_filters(speed[0], infos[file_Q].sample_rate or sample_rate, preserve_pitch)
+        a_filters = volume(file_A) + _speed_filters(speed[1], infos[file_A].sample_rate or sample_rate, preserve_pitch)
+        q_filters.append(fmt)
+        a_filters.append(fmt)
+        if repeat_question:
+            chains.append(f"[{index}:a]{','.join(q_filters)},asplit=2[q{pair_no}x][q{pair_no}y]")
+            chains.append(f"[q{pair_no}x]{pause}[q{pair_no}a]")
+            chains.append(f"[q{pair_no}y]{pause}[q{pair_no}b]")
+            labels.extend([f"q{pair_no}a", f"q{pair_no}b"])
+        else:
+            add_chain(index, q_filters + [pause], f"q{pair_no}")
+        add_chain(index + 1, a_filters + [f"apad=pad_dur={end_duration / 1000:.3f}"], f"a{pair_no}")
+        index += 2
+
+    concat = "".join(f"[{label}]" for label in labels) + f"concat=n={len(labels)}:v=0:a=1"
+    if gain != 0.0:
+        concat += f",volume={gain}dB"
+    chains.append(concat + "[out]")
+
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y"]
+    for path in inputs:
+        cmd += ["-i", path]
+    cmd += ["-filter_complex", ";".join(chains), "-map", "[out]"]
+    cmd += active_profile().ffmpeg_args("mp3") or ["-c:a", "libmp3lame"]
+    for key, value in (tags or {}).items():
+        cmd += ["-metadata", f"{key}={value}"]
+    cmd += ["-id3v2_version", "3", "-f", "mp3", output_file]
+    return cmd
+
+
+def render_section(qa_files: Sequence[Tuple[str, str]], output_file: str, **kwargs) -> None:
+    """Render a section with a single ffmpeg process (decode, filter and encode)."""
+    cmd = build_section_command(qa_files, output_file, **kwargs)
+    number_file = kwargs.get("number_file")
+    inputs = ([number_file] if number_file else []) + [f for pair in qa_files for f in pair]
+    audio_seconds = 0.0
+    if profiling_enabled():  # probing costs an ffprobe run per uncached input
+        audio_seconds = sum(info.duration or 0.0 for info in probe_many(inputs).values())
+    with span("subprocess", "ffmpeg filtergraph", output=output_file) as sp:
+        sp.audio_seconds = audio_seconds
+        subprocess.run(cmd, check=True)
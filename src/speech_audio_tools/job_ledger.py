@@ -0,0 +1,115 @@
+"""Local record of submitted AWS Transcribe jobs, so interrupted runs can resume.
+
+Each job name maps to the object it transcribes, its last known status and,
+once finished, the transcript URI. Reruns resume polling jobs that are still
+running and fetch completed results directly instead of starting over.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from .cache import cache_path
+
+DB_FILENAME = "jobs.sqlite3"
+SUBMITTED = "SUBMITTED"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_name TEXT PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    languages TEXT NOT NULL,
+    etag TEXT,
+    status TEXT NOT NULL,
+    transcript_uri TEXT,
+    failure_reason TEXT,
+    updated REAL NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class JobRecord:
+    job_name: str
+    bucket: str
+    object_key: str
+    languages: str
+    etag: Optional[str]
+    status: str
+    transcript_uri: Optional[str]
+    failure_reason: Optional[str]
+    updated: float
+
+    def matches(self, bucket: str, object_key: str, languages: Iterable[str], etag: Optional[str]) -> bool:
+        """True if this record is for the same object, languages and (when both are known) content."""
+        same_content = self.etag is None or etag is None or self.etag == etag
+        return (
+            self.bucket == bucket
+            and self.object_key == object_key
+            and self.languages == ",".join(languages)
+            and same_content
+        )
+
+
+class JobLedger:
+    """SQLite-backed job table; safe to share between threads."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or cache_path(DB_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, job_name: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_name = ?", (job_name,)).fetchone()
+        return JobRecord(*row) if row else None
+
+    def submitted(
+        self, job_name: str, bucket: str, object_key: str, languages: Iterable[str], etag: Optional[str] = None
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?)",
+                (job_name, bucket, object_key, ",".join(languages), etag, SUBMITTED, time.time()),
+            )
+
+    def completed(self, job_name: str, transcript_uri: str) -> None:
+        self._set_status(job_name, COMPLETED, transcript_uri=transcript_uri)
+
+    def failed(self, job_name: str, reason: Optional[str]) -> None:
+        self._set_status(job_name, FAILED, failure_reason=reason)
+
+    def forget(self, job_name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE job_name = ?", (job_name,))
+
+    def _set_status(
+        self, job_name: str, status: str, transcript_uri: Optional[str] = None, failure_reason: Optional[str] = None
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, transcript_uri = ?, failure_reason = ?, updated = ? WHERE job_name = ?",
+                (status, transcript_uri, failure_reason, time.time(), job_name),
+            )
+
+
+_default_ledgers: Dict[str, JobLedger] = {}
+
+
+def default_ledger() -> JobLedger:
+    """Return the shared ledger for the current cache directory."""
+    path = cache_path(DB_FILENAME)
+    if path not in _default_ledgers:
+        _default_ledgers[path] = JobLedger(path)
+    return _default_ledgers[path]
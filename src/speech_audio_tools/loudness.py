@@ -0,0 +1,187 @@
+"""Integrated loudness (ITU-R BS.1770 / EBU R128) of AudioBuffers, with a persistent cache.
+
+The K-weighting filter is applied in the frequency domain (one real FFT per
+channel), block energies come from a cumulative sum, and the absolute (-70
+LUFS) and relative (-10 LU) gates are array masks, so measuring a clip is a
+handful of NumPy calls. Measurements are cached in
+``$SAT_CACHE_DIR/loudness.sqlite3`` keyed by path, size and mtime.
+"""
+from __future__ import annotations
+
+import math
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .buffer import AudioBuffer
+from .cache import cache_path
+from .profiling import span
+
+DB_FILENAME = "loudness.sqlite3"
+DEFAULT_TARGET_LUFS = -16.0
+PEAK_CEILING_DBFS = -1.0  # normalization never boosts a clip's sample peak above this
+_BLOCK_SECONDS = 0.4
+_STEP_SECONDS = 0.1
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+_TAIL_SECONDS = 0.1  # zero padding so the filters' impulse response does not wrap around
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS loudness (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    lufs REAL,
+    peak_dbfs REAL
+)
+"""
+
+
+@dataclass(frozen=True)
+class Loudness:
+    lufs: float
+    peak_dbfs: float
+
+    def gain_to(self, target_lufs: float) -> float:
+        """Gain (dB) that brings the clip to ``target_lufs`` without pushing its peak over the ceiling."""
+        if not math.isfinite(self.lufs):
+            return 0.0
+        gain = target_lufs - self.lufs
+        if gain > 0:
+            gain = min(gain, max(PEAK_CEILING_DBFS - self.peak_dbfs, 0.0))
+        return gain
+
+
+def _biquad_response(b, a, z: np.ndarray) -> np.ndarray:
+    return (b[0] + b[1] / z + b[2] / z**2) / (a[0] + a[1] / z + a[2] / z**2)
+
+
+def _k_weighting(frame_rate: int, n_fft: int) -> np.ndarray:
+    """Complex response of the BS.1770 pre-filter (high shelf) and RLB high-pass on the rfft grid."""
+    z = np.exp(2j * np.pi * np.arange(n_fft // 2 + 1) / n_fft)
+
+    gain_db, q, fc = 4.0, 1 / math.sqrt(2), 1500.0
+    A = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * fc / frame_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0, sqrt_a = math.cos(w0), math.sqrt(A)
+    shelf_b = (
+        A * ((A + 1) + (A - 1) * cos_w0 + 2 * sqrt_a * alpha),
+        -2 * A * ((A - 1) + (A + 1) * cos_w0),
+        A * ((A + 1) + (A - 1) * cos_w0 - 2 * sqrt_a * alpha),
+    )
+    shelf_a = (
+        (A + 1) - (A - 1) * cos_w0 + 2 * sqrt_a * alpha,
+        2 * ((A - 1) - (A + 1) * cos_w0),
+        (A + 1) - (A - 1) * cos_w0 - 2 * sqrt_a * alpha,
+    )
+
+    q, fc = 0.5, 38.0
+    w0 = 2 * math.pi * fc / frame_rate
+    alpha, cos_w0 = math.sin(w0) / (2 * q), math.cos(w0)
+    highpass_b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+    highpass_a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    return _biquad_response(shelf_b, shelf_a, z) * _biquad_response(highpass_b, highpass_a, z)
+
+
+def integrated_loudness(buf: AudioBuffer) -> float:
+    """Gated integrated loudness in LUFS (``-inf`` for silence); clips under 400 ms count as one block."""
+    if buf.frame_count == 0:
+        return float("-inf")
+    full_scale = float(2 ** (8 * buf.sample_width - 1))
+    n_fft = 1 << int(buf.frame_count + _TAIL_SECONDS * buf.frame_rate).bit_length()
+    spectrum = np.fft.rfft(buf.samples / full_scale, n=n_fft, axis=0)
+    spectrum *= _k_weighting(buf.frame_rate, n_fft)[:, None]
+    weighted = np.fft.irfft(spectrum, n=n_fft, axis=0)[: buf.frame_count]
+
+    # channel weights are 1.0 for mono/stereo, so sum the per-channel energies
+    energy = np.concatenate(([0.0], np.cumsum(np.einsum("ij,ij->i", weighted, weighted))))
+    block = int(_BLOCK_SECONDS * buf.frame_rate)
+    step = int(_STEP_SECONDS * buf.frame_rate)
+    if buf.frame_count < block:
+        starts, block = np.array([0]), buf.frame_count
+    else:
+        starts = np.arange(0, buf.frame_count - block + 1, step)
+    block_energy = (energy[starts + block] - energy[starts]) / block
+
+    with np.errstate(divide="ignore"):
+        levels = -0.691 + 10 * np.log10(block_energy)
+    gated = block_energy[levels > _ABSOLUTE_GATE]
+    if len(gated) == 0:
+        return float("-inf")
+    relative_gate = -0.691 + 10 * math.log10(gated.mean()) + _RELATIVE_GATE
+    gated = block_energy[(levels > _ABSOLUTE_GATE) & (levels > relative_gate)]
+    return -0.691 + 10 * math.log10(gated.mean())
+
+
+def peak_dbfs(buf: AudioBuffer) -> float:
+    if buf.frame_count == 0:
+        return float("-inf")
+    peak = int(np.abs(buf.samples.astype(np.int64)).max())
+    return 20 * math.log10(peak / 2 ** (8 * buf.sample_width - 1)) if peak else float("-inf")
+
+
+def measure(buf: AudioBuffer) -> Loudness:
+    with span("process", "loudness") as sp:
+        sp.audio_seconds = buf.duration_seconds
+        return Loudness(integrated_loudness(buf), peak_dbfs(buf))
+
+
+class LoudnessCache:
+    """SQLite-backed store of per-file loudness measurements; stale rows are replaced on re-measure."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or cache_path(DB_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _key(path) -> Tuple[str, int, int]:
+        real = os.path.realpath(path)
+        st = os.stat(real)
+        return real, st.st_size, st.st_mtime_ns
+
+    def get(self, path, audio: Optional[AudioBuffer] = None) -> Loudness:
+        """Cached measurement of ``path``; on a miss, measure ``audio`` (or decode the file) and store it."""
+        key = self._key(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lufs, peak_dbfs FROM loudness WHERE path = ? AND size = ? AND mtime_ns = ?", key
+            ).fetchone()
+        if row is not None:
+            return Loudness(*(float("-inf") if value is None else value for value in row))
+        if audio is None:
+            from .audio_io import load_buffer
+
+            audio = load_buffer(path)
+        result = measure(audio)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO loudness VALUES (?, ?, ?, ?, ?)", (*key, *_storable(result)))
+        return result
+
+    def get_many(self, paths: Iterable) -> Dict[str, Loudness]:
+        return {os.fspath(path): self.get(path) for path in paths}
+
+
+def _storable(result: Loudness) -> Tuple[Optional[float], Optional[float]]:
+    return tuple(value if math.isfinite(value) else None for value in (result.lufs, result.peak_dbfs))
+
+
+_default_caches: Dict[str, LoudnessCache] = {}
+
+
+def default_cache() -> LoudnessCache:
+    """Process-wide cache for the current cache directory."""
+    path = cache_path(DB_FILENAME)
+    if path not in _default_caches:
+        _default_caches[path] = LoudnessCache(path)
+    return _default_caches[path]
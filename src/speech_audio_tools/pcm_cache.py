@@ -0,0 +1,167 @@
+"""Decode-once PCM cache: sources are decoded to raw PCM on disk and memory-mapped.
+
+``open_pcm(path)`` runs ffmpeg once per source (keyed by path, size and mtime)
+and returns an ``AudioBuffer`` whose samples are a read-only ``np.memmap`` of
+the decoded file. Slices are views into the page cache rather than heap copies,
+so trimming or splitting a long recording only touches the pages it exports,
+and later commands on the same source reuse the decoded file. Sources with more
+than 16 bits per sample (24/32-bit PCM, FLAC, float WAV) are decoded to 32-bit
+samples, everything else (including lossy codecs) to 16-bit, as pydub does.
+
+Decoded files live in ``$SAT_CACHE_DIR/pcm`` and are evicted oldest-first once
+they exceed ``$SAT_PCM_CACHE_MB`` (default 2048). With a limit of 0 nothing is
+kept: the source is decoded to a temporary file that is unlinked once mapped.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .buffer import AudioBuffer
+from .cache import cache_path
+from .probe import probe
+from .profiling import span
+
+PCM_CACHE_ENV = "SAT_PCM_CACHE_MB"
+DEFAULT_PCM_CACHE_MB = 2048
+PCM_DIRNAME = "pcm"
+_FORMATS = {2: ("s16le", "pcm_s16le", "<i2"), 4: ("s32le", "pcm_s32le", "<i4")}  # width -> (suffix, codec, dtype)
+_LOSSY_CODECS = {"mp3", "aac", "opus", "vorbis", "mp2", "ac3", "wmav2"}
+
+
+def _limit_bytes() -> int:
+    try:
+        megabytes = float(os.environ.get(PCM_CACHE_ENV, DEFAULT_PCM_CACHE_MB))
+    except ValueError:
+        megabytes = DEFAULT_PCM_CACHE_MB
+    return int(max(megabytes, 0) * 1024 * 1024)
+
+
+def _cache_directory() -> Optional[Path]:
+    directory = cache_path(PCM_DIRNAME)
+    if directory == ":memory:":
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    return Path(directory)
+
+
+def _cache_name(path: str, frame_rate: int, channels: int, sample_width: int = 2) -> str:
+    st = os.stat(path)
+    key = f"{os.path.realpath(path)}\0{st.st_size}\0{st.st_mtime_ns}\0{frame_rate}\0{channels}"
+    return f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.{_FORMATS[sample_width][0]}"
+
+
+def _sample_width(path: str, ffprobe: str = "ffprobe") -> int:
+    """Bytes per decoded sample: 4 for sources with more than 16 bits of precision, else 2."""
+    cmd = [ffprobe, "-v", "error", "-select_streams", "a:0", "-of", "json"]
+    cmd += ["-show_entries", "stream=codec_name,bits_per_sample,bits_per_raw_sample", path]
+    with span("subprocess", "ffprobe", path=path):
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {proc.stderr.strip()}")
+    stream = (json.loads(proc.stdout or "{}").get("streams") or [{}])[0]
+    if stream.get("codec_name") in _LOSSY_CODECS:
+        return 2  # decoders report float samples, but there is no more than 16-bit precision to keep
+    bits = []
+    for field in ("bits_per_sample", "bits_per_raw_sample"):
+        try:
+            bits.append(int(stream.get(field) or 0))
+        except ValueError:
+            pass
+    return 4 if max(bits, default=0) > 16 else 2
+
+
+def _decode(path: str, output: Path, frame_rate: int, channels: int, ffmpeg: str, sample_width: int = 2) -> None:
+    suffix, codec, _ = _FORMATS[sample_width]
+    cmd = [ffmpeg, "-v", "error", "-y", "-i", path, "-vn", "-f", suffix, "-c:a", codec]
+    cmd += ["-ar", str(frame_rate), "-ac", str(channels), str(output)]
+    with span("decode", path, mode="pcm") as sp:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {path}: {proc.stderr.strip()}")
+        sp.audio_seconds = output.stat().st_size / (sample_width * channels * frame_rate)
+
+
+def _map(path: Path, frame_rate: int, channels: int, sample_width: int = 2) -> AudioBuffer:
+    dtype = np.dtype(_FORMATS[sample_width][2])
+    if path.stat().st_size == 0:
+        return AudioBuffer(np.zeros((0, channels), dtype=dtype), frame_rate)
+    samples = np.memmap(path, dtype=dtype, mode="r")
+    return AudioBuffer(samples[: len(samples) - len(samples) % channels].reshape(-1, channels), frame_rate)
+
+
+def evict(directory: Path, limit_bytes: int, keep: Optional[Path] = None) -> None:
+    """Delete the least recently used decoded files until the directory fits in ``limit_bytes``."""
+    entries = []
+    for entry in directory.iterdir():
+        if entry.suffix[1:] not in {suffix for suffix, _, _ in _FORMATS.values()}:
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total <= limit_bytes:
+            break
+        if entry == keep:
+            continue
+        try:
+            entry.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def open_pcm(source, ffmpeg: str = "ffmpeg") -> AudioBuffer:
+    """Decode ``source`` once and return a memory-mapped, read-only AudioBuffer of its samples."""
+    path = os.fspath(source)
+    info = probe(path)
+    if not info.sample_rate or not info.channels:
+        raise RuntimeError(f"No audio stream found in {path}")
+    frame_rate, channels = info.sample_rate, info.channels
+    limit = _limit_bytes()
+    directory = _cache_directory() if limit > 0 else None
+
+    if directory is None:
+        sample_width = _sample_width(path)
+        fd, tmp = tempfile.mkstemp(suffix="." + _FORMATS[sample_width][0])
+        os.close(fd)
+        try:
+            _decode(path, Path(tmp), frame_rate, channels, ffmpeg, sample_width)
+            return _map(Path(tmp), frame_rate, channels, sample_width)
+        finally:
+            try:
+                os.unlink(tmp)  # the mapping keeps the data alive on POSIX
+            except OSError:
+                pass
+
+    # a hit is found under either width, so only a miss pays for probing the sample format
+    for sample_width in _FORMATS:
+        target = directory / _cache_name(path, frame_rate, channels, sample_width)
+        if target.exists():
+            os.utime(target)  # mark as recently used for eviction
+            return _map(target, frame_rate, channels, sample_width)
+    sample_width = _sample_width(path)
+    target = directory / _cache_name(path, frame_rate, channels, sample_width)
+    fd, tmp = tempfile.mkstemp(suffix=".part", dir=directory)
+    os.close(fd)
+    try:
+        _decode(path, Path(tmp), frame_rate, channels, ffmpeg, sample_width)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    evict(directory, limit, keep=target)
+    return _map(target, frame_rate, channels, sample_width)
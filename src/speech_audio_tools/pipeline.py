@@ -0,0 +1,394 @@
+"""Run a recipe of TTS and post-processing steps as a content-hashed build graph.
+
+A recipe is a JSON file listing steps (``tts``, ``combine``, ``speed``,
+``add-number``, ``tag-album``), each with an ``input`` path (or list of
+paths), an ``output`` path and step options. A step depends on every step
+whose output is, contains or lies inside one of its inputs (plus any ids in
+``after``). Its key hashes the step type, options, output and the content of
+its inputs; a step whose key matches the state file and whose output exists
+is skipped, so a rebuilt step whose output bytes did not change does not
+invalidate the steps below it. Independent steps run in parallel. Steps that
+write one file per input into a directory (speed, add-number, tag-album) are
+rebuilt into a fresh directory that then replaces the old one, so files whose
+input is gone (e.g. a renamed section) do not linger and feed later steps.
+
+Example::
+
+    {
+      "steps": [
+        {"id": "q1", "type": "tts", "input": "text/001-Q.txt", "output": "raw/001-Q-Joanna.mp3",
+         "lang": "en-US", "speaker": "Joanna"},
+        {"id": "a1", "type": "tts", "input": "text/001-A.txt", "output": "raw/001-A-Joanna.mp3",
+         "lang": "en-US", "speaker": "Joanna"},
+        {"id": "sections", "type": "combine", "input": "raw", "output": "sections", "section_unit": 10},
+        {"id": "album", "type": "tag-album", "input": "sections", "output": "album", "album": "Drill 1"}
+      ]
+    }
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .profiling import span
+
+STATE_FILENAME = ".sat-build-state.json"
+UP_TO_DATE = "up-to-date"
+STALE = "stale"
+STALE_UPSTREAM = "stale (upstream)"
+BUILT = "built"
+_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class Step:
+    id: str
+    type: str
+    inputs: List[str]
+    output: str
+    options: Dict[str, object] = field(default_factory=dict)
+    after: List[str] = field(default_factory=list)
+
+
+def _speed_pair(value) -> Tuple[float, float]:
+    if isinstance(value, (list, tuple)):
+        return float(value[0]), float(value[1])
+    if isinstance(value, str) and ":" in value:
+        left, right = value.split(":")
+        return float(left), float(right)
+    return float(value), float(value)
+
+
+def _run_tts(step: Step) -> None:
+    from .tts import synthesize_speech
+
+    options = step.options
+    # make_audio_file skips existing files, so clear the stale output first.
+    if os.path.exists(step.output):
+        os.remove(step.output)
+    synthesize_speech(
+        options["lang"],
+        options.get("speaker"),
+        step.inputs[0],
+        step.output,
+        options.get("engine", "neural"),
+        options.get("speed"),
+        options.get("gain", 0.0),
+    )
+
+
+def _run_combine(step: Step) -> None:
+    from .audio import make_section_mp3_files
+
+    options = dict(step.options)
+    if "speed" in options:
+        options["speed"] = _speed_pair(options["speed"])
+    os.makedirs(step.output, exist_ok=True)
+    make_section_mp3_files(step.inputs[0], step.output, **options)
+
+
+def _run_speed(step: Step) -> None:
+    from .change_speed import process_speed
+
+    speed = float(step.options["speed"])
+    pitch_shift = float(step.options.get("pitch_shift", 0.0))
+    for path in _input_files(step.inputs, suffix=".mp3"):
+        process_speed(Path(path), Path(step.output), speed, pitch_shift)
+
+
+def _run_add_number(step: Step) -> None:
+    from .add_number import process_audio_files
+
+    os.makedirs(step.output, exist_ok=True)
+    process_audio_files(step.inputs[0], step.output)
+
+
+def _run_tag_album(step: Step) -> None:
+    from .tag_album import tag_album
+
+    options = step.options
+    tag_album(
+        step.inputs[0],
+        album=options["album"],
+        output_dir=step.output,
+        title=options.get("title"),
+        artist=options.get("artist", "Homebrew"),
+    )
+
+
+# step type -> (runner, required options, optional options, number of inputs (None: any))
+STEP_TYPES: Dict[str, Tuple[Callable[[Step], None], Tuple[str, ...], Tuple[str, ...], Optional[int]]] = {
+    "tts": (_run_tts, ("lang",), ("speaker", "engine", "speed", "gain"), 1),
+    "combine": (
+        _run_combine,
+        (),
+        (
+            "speed",
+            "gain",
+            "repeat_question",
+            "pause_duration",
+            "add_number_audio",
+            "section_unit",
+            "artist",
+            "album",
+            "preserve_pitch",
+            "backend",
+            "normalize",
+        ),
+        1,
+    ),
+    "speed": (_run_speed, ("speed",), ("pitch_shift",), None),
+    "add-number": (_run_add_number, (), (), 1),
+    "tag-album": (_run_tag_album, ("album",), ("title", "artist"), 1),
+}
+_STEP_KEYS = {"id", "type", "input", "output", "after"}
+# built into a fresh directory that replaces the output (combine cleans up its own renamed sections)
+_FRESH_DIRECTORY_STEPS = {"speed", "add-number", "tag-album"}
+
+
+def _input_files(inputs: List[str], suffix: Optional[str] = None) -> List[str]:
+    """Files named by ``inputs``; directories contribute their (non-hidden) top-level files."""
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                names = sorted(e.path for e in entries if e.is_file() and not e.name.startswith("."))
+            files.extend(names)
+        else:
+            files.append(path)
+    return [f for f in files if suffix is None or f.endswith(suffix)]
+
+
+def _run_into_fresh_directory(runner: Callable[[Step], None], step: Step) -> None:
+    """Run ``step`` into an empty sibling directory, then swap it in for ``step.output``."""
+    parent, name = os.path.split(step.output)
+    tmp = tempfile.mkdtemp(prefix=f".{name}.", suffix=".tmp", dir=parent or ".")
+    try:
+        runner(dataclasses.replace(step, output=tmp))
+        mode = os.stat(step.output).st_mode & 0o777 if os.path.isdir(step.output) else 0o755
+        os.chmod(tmp, mode)  # mkdtemp creates 0700
+        if os.path.isdir(step.output):
+            old = tmp + ".old"
+            os.rename(step.output, old)
+            os.rename(tmp, step.output)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.rename(tmp, step.output)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _contains(outer: str, inner: str) -> bool:
+    return inner == outer or inner.startswith(outer.rstrip(os.sep) + os.sep)
+
+
+def _parse_step(raw: dict, base: Path) -> Step:
+    for key in ("id", "type", "input", "output"):
+        if key not in raw:
+            raise ValueError(f"Recipe step is missing {key!r}: {raw}")
+    step_type = raw["type"]
+    if step_type not in STEP_TYPES:
+        raise ValueError(f'Unknown step type "{step_type}" in step {raw["id"]} (choose from {", ".join(STEP_TYPES)})')
+    _, required, optional, n_inputs = STEP_TYPES[step_type]
+    options = {k: v for k, v in raw.items() if k not in _STEP_KEYS}
+    unknown = set(options) - set(required) - set(optional)
+    missing = set(required) - set(options)
+    if unknown or missing:
+        problems = [f"unknown {sorted(unknown)}" if unknown else "", f"missing {sorted(missing)}" if missing else ""]
+        raise ValueError(f"Step {raw['id']}: options {' and '.join(p for p in problems if p)}")
+    inputs = raw["input"] if isinstance(raw["input"], list) else [raw["input"]]
+    if n_inputs is not None and len(inputs) != n_inputs:
+        raise ValueError(f"Step {raw['id']}: {step_type} takes {n_inputs} input, got {len(inputs)}")
+    return Step(
+        id=str(raw["id"]),
+        type=step_type,
+        inputs=[os.path.normpath(base / p) for p in inputs],
+        output=os.path.normpath(base / raw["output"]),
+        options=options,
+        after=[str(a) for a in raw.get("after", [])],
+    )
+
+
+class Pipeline:
+    """A parsed recipe: steps in dependency order plus the state file of their last build keys."""
+
+    def __init__(self, steps: List[Step], state_path: str):
+        ids = [step.id for step in steps]
+        duplicates = {i for i in ids if ids.count(i) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate step ids: {', '.join(sorted(duplicates))}")
+        self.state_path = state_path
+        self.deps = self._dependencies(steps)
+        self.steps = self._topological(steps)
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+
+    @classmethod
+    def load(cls, recipe_path, state_path: Optional[str] = None) -> "Pipeline":
+        recipe_path = Path(recipe_path)
+        recipe = json.loads(recipe_path.read_text())
+        base = recipe_path.resolve().parent
+        steps = [_parse_step(raw, base) for raw in recipe.get("steps", [])]
+        return cls(steps, state_path or str(base / recipe.get("state", STATE_FILENAME)))
+
+    @staticmethod
+    def _dependencies(steps: List[Step]) -> Dict[str, List[str]]:
+        known = {step.id for step in steps}
+        deps: Dict[str, List[str]] = {}
+        for step in steps:
+            unknown = set(step.after) - known
+            if unknown:
+                raise ValueError(f"Step {step.id}: unknown 'after' ids {sorted(unknown)}")
+            upstream = set(step.after)
+            for other in steps:
+                if other is step:
+                    continue
+                if any(_contains(other.output, p) or _contains(p, other.output) for p in step.inputs):
+                    upstream.add(other.id)
+            deps[step.id] = sorted(upstream)
+        return deps
+
+    def _topological(self, steps: List[Step]) -> List[Step]:
+        by_id = {step.id: step for step in steps}
+        ordered: List[Step] = []
+        marks: Dict[str, str] = {}
+
+        def visit(step_id: str, trail: List[str]) -> None:
+            if marks.get(step_id) == "done":
+                return
+            if marks.get(step_id) == "visiting":
+                raise ValueError(f"Recipe has a dependency cycle: {' -> '.join(trail + [step_id])}")
+            marks[step_id] = "visiting"
+            for dep in self.deps[step_id]:
+                visit(dep, trail + [step_id])
+            marks[step_id] = "done"
+            ordered.append(by_id[step_id])
+
+        for step in steps:
+            visit(step.id, [])
+        return ordered
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault("steps", {})
+        state.setdefault("digests", {})
+        return state
+
+    def save_state(self) -> None:
+        with self._lock:
+            data = json.dumps(self._state, indent=2, sort_keys=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.state_path)
+
+    def _digest(self, path: str) -> str:
+        """SHA-256 of a file, reused from the state file while its size and mtime are unchanged."""
+        st = os.stat(path)
+        with self._lock:
+            known = self._state["digests"].get(path)
+        if known and known[:2] == [st.st_size, st.st_mtime_ns]:
+            return known[2]
+        digest = hashlib.sha256()
+        with span("hash", "sha256", path=path), open(path, "rb") as f:
+            for block in iter(lambda: f.read(_READ_SIZE), b""):
+                digest.update(block)
+        value = digest.hexdigest()
+        with self._lock:
+            self._state["digests"][path] = [st.st_size, st.st_mtime_ns, value]
+        return value
+
+    def step_key(self, step: Step) -> str:
+        """Hash of the step definition and the current content of its inputs."""
+        inputs = [(path, self._digest(path)) for path in _input_files(step.inputs)]
+        raw = json.dumps(
+            {"type": step.type, "options": step.options, "output": step.output, "inputs": inputs},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _is_current(self, step: Step, key: str) -> bool:
+        with self._lock:
+            recorded = self._state["steps"].get(step.id, {}).get("key")
+        return recorded == key and os.path.exists(step.output)
+
+    def plan(self) -> List[Tuple[Step, str]]:
+        """Status of every step in dependency order, without running anything."""
+        statuses: Dict[str, str] = {}
+        for step in self.steps:
+            if any(statuses[dep] != UP_TO_DATE for dep in self.deps[step.id]):
+                statuses[step.id] = STALE_UPSTREAM
+            elif not all(os.path.exists(p) for p in step.inputs):
+                statuses[step.id] = STALE
+            else:
+                statuses[step.id] = UP_TO_DATE if self._is_current(step, self.step_key(step)) else STALE
+        return [(step, statuses[step.id]) for step in self.steps]
+
+    def _build(self, step: Step) -> str:
+        key = self.step_key(step)
+        if self._is_current(step, key):
+            return UP_TO_DATE
+        parent = os.path.dirname(step.output)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with span("process", f"build {step.type}", step=step.id):
+            if step.type in _FRESH_DIRECTORY_STEPS:
+                _run_into_fresh_directory(STEP_TYPES[step.type][0], step)
+            else:
+                STEP_TYPES[step.type][0](step)
+        with self._lock:
+            self._state["steps"][step.id] = {"key": key}
+        return BUILT
+
+    def run(self, max_workers: int = 4) -> Iterator[Tuple[Step, str]]:
+        """Build stale steps, running independent ones concurrently; yields ``(step, status)``.
+
+        Steps downstream of a failure are not started. The state file is saved
+        after every finished step; RuntimeError lists the failures at the end.
+        """
+        pending = list(self.steps)
+        finished: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            running = {}
+            while pending or running:
+                for step in list(pending):
+                    deps = self.deps[step.id]
+                    if any(dep in errors for dep in deps):
+                        errors[step.id] = "upstream step failed"
+                        pending.remove(step)
+                    elif all(dep in finished for dep in deps):
+                        running[pool.submit(self._build, step)] = step
+                        pending.remove(step)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as exc:
+                        errors[step.id] = str(exc) or type(exc).__name__
+                        continue
+                    finished[step.id] = status
+                    self.save_state()
+                    yield step, status
+        self.save_state()
+        if errors:
+            details = "; ".join(f"{step_id}: {reason}" for step_id, reason in errors.items())
+            raise RuntimeError(f"{len(errors)} step(s) failed: {details}")
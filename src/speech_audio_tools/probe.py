@@ -0,0 +1,171 @@
+"""Persistent ffprobe metadata cache keyed by path, size and mtime."""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import cache_path
+from .profiling import span
+
+DB_FILENAME = "probe.sqlite3"
+_SQL_BATCH = 500  # stay well below SQLite's host parameter limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sample_rate INTEGER,
+    channels INTEGER,
+    codec TEXT,
+    bitrate INTEGER,
+    duration REAL
+)
+"""
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    sample_rate: Optional[int]
+    channels: Optional[int]
+    codec: Optional[str]
+    bitrate: Optional[int]
+    duration: Optional[float]
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def run_ffprobe(path: str, ffprobe: str = "ffprobe") -> MediaInfo:
+    """Probe the first audio stream of ``path`` with a single ffprobe call."""
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=sample_rate,channels,codec_name,bit_rate:format=duration,bit_rate",
+        "-of",
+        "json",
+        path,
+    ]
+    with span("subprocess", "ffprobe", path=path):
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {proc.stderr.strip()}")
+    info = json.loads(proc.stdout or "{}")
+    streams = info.get("streams") or [{}]
+    stream = streams[0]
+    fmt = info.get("format") or {}
+    return MediaInfo(
+        sample_rate=_to_int(stream.get("sample_rate")),
+        channels=_to_int(stream.get("channels")),
+        codec=stream.get("codec_name"),
+        bitrate=_to_int(stream.get("bit_rate")) or _to_int(fmt.get("bit_rate")),
+        duration=_to_float(fmt.get("duration")),
+    )
+
+
+class ProbeCache:
+    """SQLite-backed store of media metadata; stale rows are replaced on re-probe."""
+
+    def __init__(self, db_path: Optional[str] = None, ffprobe: str = "ffprobe"):
+        self.db_path = db_path or cache_path(DB_FILENAME)
+        self.ffprobe = ffprobe
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _key(path) -> Tuple[str, int, int]:
+        real = os.path.realpath(path)
+        st = os.stat(real)
+        return real, st.st_size, st.st_mtime_ns
+
+    def get(self, path) -> MediaInfo:
+        return self.get_many([path])[os.fspath(path)]
+
+    def get_many(self, paths: Iterable, max_workers: Optional[int] = None) -> Dict[str, MediaInfo]:
+        """Return metadata for every path, probing cache misses concurrently.
+
+        Cached rows are read with batched queries and new rows are written in one
+        transaction, so large directories cost one round trip per batch.
+        """
+        keys = {os.fspath(p): self._key(p) for p in paths}
+        found = self._lookup(list(keys.values()))
+        missing = sorted({key for key in keys.values() if key not in found})
+        if missing:
+            workers = max_workers or min(8, len(missing))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                probed = list(pool.map(lambda key: run_ffprobe(key[0], self.ffprobe), missing))
+            self._store(list(zip(missing, probed)))
+            found.update(zip(missing, probed))
+        return {name: found[key] for name, key in keys.items()}
+
+    def _lookup(self, keys: List[Tuple[str, int, int]]) -> Dict[Tuple[str, int, int], MediaInfo]:
+        wanted = set(keys)
+        found = {}
+        paths = sorted({key[0] for key in keys})
+        with self._lock:
+            for i in range(0, len(paths), _SQL_BATCH):
+                batch = paths[i : i + _SQL_BATCH]
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns, sample_rate, channels, codec, bitrate, duration "
+                    f"FROM probes WHERE path IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                for path, size, mtime_ns, *fields in rows:
+                    if (path, size, mtime_ns) in wanted:
+                        found[(path, size, mtime_ns)] = MediaInfo(*fields)
+        return found
+
+    def _store(self, entries: List[Tuple[Tuple[str, int, int], MediaInfo]]) -> None:
+        rows = [
+            (*key, info.sample_rate, info.channels, info.codec, info.bitrate, info.duration)
+            for key, info in entries
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+_default_caches: Dict[str, ProbeCache] = {}
+
+
+def default_cache() -> ProbeCache:
+    """Process-wide cache for the current cache directory."""
+    path = cache_path(DB_FILENAME)
+    if path not in _default_caches:
+        _default_caches[path] = ProbeCache(path)
+    return _default_caches[path]
+
+
+def probe(path) -> MediaInfo:
+    """Return cached metadata for ``path`` (sample rate, channels, codec, bitrate, duration)."""
+    return default_cache().get(path)
+
+
+def probe_many(paths: Iterable, max_workers: Optional[int] = None) -> Dict[str, MediaInfo]:
+    """Return cached metadata for many paths, probing misses in one batched step."""
+    return default_cache().get_many(paths, max_workers=max_workers)
@@ -0,0 +1,151 @@
+"""Per-stage timing spans, enabled with `sat --profile trace.json` or $SAT_PROFILE.
+
+Hot call sites wrap their work in ``span(kind, name)``; when profiling is off this is
+a no-op. When on, spans are written as a Chrome trace (chrome://tracing, Perfetto)
+and a per-stage summary with real-time factor is printed to stderr.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PROFILE_ENV = "SAT_PROFILE"
+KINDS = ("decode", "process", "encode", "hash", "network", "subprocess")
+
+
+class Span:
+    __slots__ = ("kind", "name", "start", "end", "tid", "audio_seconds", "args")
+
+    def __init__(self, kind: str, name: str, args: dict):
+        self.kind = kind
+        self.name = name
+        self.args = args
+        self.audio_seconds = 0.0
+        self.tid = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = self.start
+
+
+class _NullSpan:
+    """Accepts the same attribute writes as Span and discards them."""
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Recorder:
+    def __init__(self, path: str):
+        self.path = path
+        self.spans: List[Span] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, dict]:
+        wall = time.perf_counter() - self.started
+        stages: Dict[str, dict] = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.kind, {"count": 0, "seconds": 0.0, "audio_seconds": 0.0})
+            stage["count"] += 1
+            stage["seconds"] += span.end - span.start
+            stage["audio_seconds"] += span.audio_seconds
+        audio_in = stages.get("decode", {}).get("audio_seconds", 0.0)
+        for stage in stages.values():
+            stage["share"] = stage["seconds"] / wall if wall else 0.0
+            stage["realtime_factor"] = stage["audio_seconds"] / stage["seconds"] if stage["seconds"] else None
+        stages["total"] = {
+            "count": len(self.spans),
+            "seconds": wall,
+            "audio_seconds": audio_in,
+            "share": 1.0,
+            "realtime_factor": audio_in / wall if wall else None,
+        }
+        return stages
+
+    def trace(self) -> dict:
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": round((span.start - self.started) * 1e6, 1),
+                "dur": round((span.end - span.start) * 1e6, 1),
+                "pid": pid,
+                "tid": span.tid,
+                "args": dict(span.args, audio_seconds=round(span.audio_seconds, 3)),
+            }
+            for span in self.spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "summary": self.summary()}
+
+
+def format_summary(stages: Dict[str, dict]) -> str:
+    lines = [f"{'stage':<12}{'count':>7}{'wall s':>10}{'share':>8}{'audio s':>10}{'RTF':>9}"]
+    order = [k for k in KINDS if k in stages] + sorted(k for k in stages if k not in KINDS and k != "total") + ["total"]
+    for kind in order:
+        stage = stages[kind]
+        rtf = f"{stage['realtime_factor']:.1f}x" if stage["realtime_factor"] else "-"
+        lines.append(
+            f"{kind:<12}{stage['count']:>7}{stage['seconds']:>10.3f}{stage['share'] * 100:>7.1f}%"
+            f"{stage['audio_seconds']:>10.1f}{rtf:>9}"
+        )
+    return "\n".join(lines)
+
+
+_recorder: Optional[Recorder] = None
+
+
+def enable(path) -> None:
+    """Start recording spans; ``finish()`` writes them to ``path``."""
+    global _recorder
+    _recorder = Recorder(os.fspath(path))
+
+
+def is_enabled() -> bool:
+    return _recorder is not None
+
+
+def finish() -> None:
+    """Write the JSON trace and print the stage summary, then stop recording."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return
+    trace = recorder.trace()
+    with open(recorder.path, "w") as f:
+        json.dump(trace, f, indent=1)
+    print(format_summary(trace["summary"]), file=sys.stderr)
+    print(f"Profile written to {recorder.path}", file=sys.stderr)
+
+
+@contextmanager
+def span(kind: str, name: str = "", **args):
+    """Time the enclosed block as a ``kind`` span; set ``.audio_seconds`` on the yielded span."""
+    recorder = _recorder
+    if recorder is None:
+        yield _NULL_SPAN
+        return
+    current = Span(kind, name or kind, args)
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        recorder.add(current)
+
+
+if os.environ.get(PROFILE_ENV):
+    enable(os.environ[PROFILE_ENV])
+    atexit.register(finish)
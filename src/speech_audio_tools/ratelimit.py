@@ -0,0 +1,332 @@
+"""Adaptive client-side rate limiting for TTS requests.
+
+Every engine call goes through an ``AdaptiveLimiter``: a token bucket paces
+request starts and an AIMD window caps requests in flight. Until the first
+throttle both grow quickly (a success adds 1 to a full window and
+``rate_step`` to a binding rate, roughly doubling them per round trip), like
+TCP slow start; afterwards a success raises the window by ``1/window`` (about
++1 per round trip) when the window was full, and the rate by
+``rate_step/rate`` (about +``rate_step`` req/s per second) when the bucket
+made it wait. A throttling error halves the concurrency that
+was actually in flight, or, for a lone request, the rate actually achieved;
+requests already in flight at that point do not cut again. So concurrent
+synthesis backs off when the service pushes back and climbs back towards the
+highest throughput it sustains. Throttled and transient failures are retried, waiting for the
+server's ``Retry-After`` when it sends one and with exponential backoff and
+jitter otherwise.
+
+Limiters are shared per service (``get_limiter("polly")``), so every engine
+and thread in the process draws from the same budget; ``summaries()`` reports
+what each achieved over the whole process. Starting values can be
+overridden with ``$SAT_TTS_RATE`` (requests/second) and ``$SAT_TTS_CONCURRENCY``.
+"""
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+RATE_ENV = "SAT_TTS_RATE"
+CONCURRENCY_ENV = "SAT_TTS_CONCURRENCY"
+THROTTLE, TRANSIENT = "throttle", "transient"
+_OK, _FAILED = "ok", "failed"
+_DECREASE = 0.5
+_RATE_SAMPLES = 20  # recent completions used to estimate the achieved request rate
+
+# AWS error codes that signal throttling / a transient service failure
+_AWS_THROTTLE_CODES = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "SlowDown",
+    "ProvisionedThroughputExceededException",
+}
+_AWS_TRANSIENT_CODES = {
+    "ServiceFailureException",
+    "InternalFailure",
+    "ServiceUnavailable",
+    "ServiceUnavailableException",
+}
+_HTTP_TRANSIENT = {408, 500, 502, 503, 504}
+_TRANSIENT_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "EndpointConnectionError",
+    "ConnectionClosedError",
+    "ReadTimeoutError",
+    "ConnectTimeoutError",
+}
+
+
+def retry_after(exc: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):  # botocore keeps the HTTP headers in the parsed response
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders") or {}
+    else:
+        headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def classify_error(exc: Exception) -> Optional[str]:
+    """``THROTTLE``, ``TRANSIENT`` or None (do not retry) for an OpenAI or botocore exception."""
+    response = getattr(exc, "response", None)
+    if isinstance(response, dict):  # botocore ClientError
+        code = response.get("Error", {}).get("Code")
+        if code in _AWS_THROTTLE_CODES:
+            return THROTTLE
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if code in _AWS_TRANSIENT_CODES or status in _HTTP_TRANSIENT:
+            return TRANSIENT
+        return None
+    status = getattr(exc, "status_code", None)
+    if status == 429 or type(exc).__name__ == "RateLimitError":
+        # an exhausted quota is reported as 429 too, but waiting will not help
+        return None if getattr(exc, "code", None) == "insufficient_quota" else THROTTLE
+    if status in _HTTP_TRANSIENT or type(exc).__name__ in _TRANSIENT_NAMES:
+        return TRANSIENT
+    return None
+
+
+class TokenBucket:
+    """Paces request starts to ``rate`` per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available; returns the seconds waited.
+
+        Callers queue by reserving future tokens, so concurrent waiters are spaced ``1/rate`` apart.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+@dataclass(frozen=True)
+class LimiterStats:
+    requests: int
+    throttled: int
+    retries: int
+    chars: int
+    seconds: float
+    concurrency: float
+    rate: float
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def chars_per_second(self) -> float:
+        return self.chars / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests ({self.throttled} throttled, {self.retries} retries) in {self.seconds:.1f}s: "
+            f"{self.requests_per_second:.2f} req/s, {self.chars_per_second:.0f} chars/s; "
+            f"settled at {self.rate:.2f} req/s, {self.concurrency:.1f} in flight"
+        )
+
+
+class AdaptiveLimiter:
+    """Token bucket plus AIMD concurrency window around a request function (see module docstring)."""
+
+    def __init__(
+        self,
+        rate: float,
+        concurrency: float,
+        *,
+        min_rate: float = 0.2,
+        max_rate: float = 100.0,
+        max_concurrency: int = 16,
+        rate_step: float = 1.0,
+        retries: int = 6,
+        backoff: float = 1.0,
+        classify: Callable[[Exception], Optional[str]] = classify_error,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.rate_step = rate_step
+        self.retries = retries
+        self.backoff = backoff
+        self.classify = classify
+        self._clock = clock
+        self._sleep = sleep
+        self._bucket = TokenBucket(rate, clock=clock, sleep=sleep)
+        self._window = float(min(concurrency, max_concurrency))
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._slow_start = True
+        self._cond = threading.Condition()
+        self._requests = self._throttled = self._retries = self._chars = 0
+        self._first_start: Optional[float] = None
+        self._last_end: Optional[float] = None
+        self._completions: deque = deque(maxlen=_RATE_SAMPLES)
+
+    @property
+    def rate(self) -> float:
+        return self._bucket.rate
+
+    @property
+    def concurrency(self) -> float:
+        return self._window
+
+    def _enter(self) -> Tuple[float, int]:
+        """Wait for a slot; returns the start time and the number of requests then in flight (this one included)."""
+        with self._cond:
+            while self._in_flight >= max(1, int(self._window)):
+                self._cond.wait()
+            self._in_flight += 1
+            started = self._clock()
+            if self._first_start is None:
+                self._first_start = started
+            return started, self._in_flight
+
+    def _achieved_rate(self) -> float:
+        if len(self._completions) < 2 or self._completions[-1] <= self._completions[0]:
+            return self._bucket.rate
+        return (len(self._completions) - 1) / (self._completions[-1] - self._completions[0])
+
+    def _leave(self, started: float, in_flight: int, waited: bool, outcome: str, chars: int) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._last_end = self._clock()
+            bucket = self._bucket
+            if outcome == THROTTLE:
+                self._throttled += 1
+                # requests already in flight when we backed off report the same congestion; count it once
+                if started > self._last_decrease:
+                    self._last_decrease = self._last_end
+                    self._slow_start = False
+                    if in_flight > 1:
+                        self._window = max(1.0, min(self._window, in_flight) * _DECREASE)
+                    else:
+                        bucket.rate = max(self.min_rate, min(bucket.rate, self._achieved_rate()) * _DECREASE)
+            elif outcome == _OK:
+                self._requests += 1
+                self._chars += chars
+                self._completions.append(self._last_end)
+                if in_flight >= int(self._window):
+                    step = 1.0 if self._slow_start else 1.0 / self._window
+                    self._window = min(float(self.max_concurrency), self._window + step)
+                if waited:
+                    step = self.rate_step if self._slow_start else self.rate_step / bucket.rate
+                    bucket.rate = min(self.max_rate, bucket.rate + step)
+            bucket.burst = max(1.0, bucket.rate)
+            self._cond.notify_all()
+
+    def call(self, fn: Callable[[], T], chars: int = 0) -> T:
+        """Run ``fn`` under the limiter, retrying throttled and transient failures."""
+        for attempt in range(self.retries + 1):
+            waited = self._bucket.acquire() > 0
+            started, in_flight = self._enter()
+            outcome = _OK
+            try:
+                return fn()
+            except Exception as exc:
+                kind = self.classify(exc)
+                outcome = kind or _FAILED
+                if kind is None or attempt == self.retries:
+                    raise
+                delay = retry_after(exc)
+                if delay is None:
+                    delay = self.backoff * 2**attempt + random.uniform(0, self.backoff)
+            finally:
+                self._leave(started, in_flight, waited, outcome, chars)
+            with self._cond:
+                self._retries += 1
+            self._sleep(delay)
+
+    def stats(self) -> LimiterStats:
+        with self._cond:
+            seconds = 0.0
+            if self._first_start is not None and self._last_end is not None:
+                seconds = self._last_end - self._first_start
+            return LimiterStats(
+                requests=self._requests,
+                throttled=self._throttled,
+                retries=self._retries,
+                chars=self._chars,
+                seconds=seconds,
+                concurrency=self._window,
+                rate=self._bucket.rate,
+            )
+
+
+# service -> starting rate (req/s), starting concurrency, ceilings
+SERVICE_DEFAULTS: Dict[str, dict] = {
+    "polly": dict(rate=8.0, concurrency=4, max_rate=80.0, max_concurrency=16),
+    "openai": dict(rate=2.0, concurrency=2, max_rate=50.0, max_concurrency=16),
+}
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_float(name: str) -> Optional[float]:
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def get_limiter(service: str) -> AdaptiveLimiter:
+    """The process-wide limiter for ``service`` ("polly" or "openai")."""
+    with _limiters_lock:
+        if service not in _limiters:
+            options = dict(SERVICE_DEFAULTS.get(service, SERVICE_DEFAULTS["openai"]))
+            rate, concurrency = _env_float(RATE_ENV), _env_float(CONCURRENCY_ENV)
+            if rate:
+                options["rate"] = rate
+            if concurrency:
+                options["concurrency"] = concurrency
+            _limiters[service] = AdaptiveLimiter(**options)
+        return _limiters[service]
+
+
+def summaries() -> Dict[str, str]:
+    """Cumulative ``LimiterStats.summary()`` of each service limiter that has completed requests."""
+    with _limiters_lock:
+        stats = {service: limiter.stats() for service, limiter in _limiters.items()}
+    return {service: s.summary() for service, s in stats.items() if s.requests}
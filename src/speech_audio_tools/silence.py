@@ -0,0 +1,105 @@
+"""Vectorized silence detection on AudioBuffers (same results as ``pydub.silence``).
+
+pydub slices the segment and computes an RMS for every millisecond offset.
+Here the squared samples are summed once per millisecond (in blocks, so a
+memory-mapped buffer is streamed through rather than copied), and every
+window's energy then comes from a cumulative sum.
+"""
+from __future__ import annotations
+
+import math
+from typing import List
+
+import numpy as np
+from pydub.utils import db_to_float
+
+from .buffer import AudioBuffer
+from .profiling import span
+
+_BLOCK_MS = 10_000  # milliseconds of audio squared at a time
+
+
+def _ms_energy(buf: AudioBuffer) -> np.ndarray:
+    """Sum of squared samples (all channels) in each millisecond, with pydub's frame boundaries."""
+    n_ms = len(buf)
+    bounds = np.minimum((np.arange(n_ms + 1) * buf.frame_rate / 1000).astype(np.int64), buf.frame_count)
+    dtype = np.float64 if buf.sample_width > 2 else np.int64
+    energy = np.zeros(n_ms, dtype=dtype)
+    for first in range(0, n_ms, _BLOCK_MS):
+        last = min(first + _BLOCK_MS, n_ms)
+        start, stop = bounds[first], bounds[last]
+        if start >= stop:
+            break
+        block = buf.samples[start:stop].astype(dtype)
+        per_frame = np.einsum("ij,ij->i", block, block)
+        offsets = bounds[first:last] - start
+        valid = offsets < len(per_frame)  # trailing milliseconds may have no frames left
+        energy[first:last][valid] = np.add.reduceat(per_frame, offsets[valid])
+        # reduceat yields the element itself for empty bins; zero them
+        empty = np.diff(bounds[first : last + 1]) == 0
+        energy[first:last][empty] = 0
+    return energy
+
+
+def detect_silence(buf: AudioBuffer, min_silence_len: int = 1000, silence_thresh: float = -16) -> List[List[int]]:
+    """Silent ``[start, end]`` ranges in ms, as ``pydub.silence.detect_silence`` with ``seek_step=1``."""
+    seg_len = len(buf)
+    if seg_len < min_silence_len:
+        return []
+    max_amplitude = 2 ** (8 * buf.sample_width - 1)
+    threshold = db_to_float(silence_thresh) * max_amplitude
+    with span("process", "detect_silence") as sp:
+        sp.audio_seconds = buf.duration_seconds
+        cumulative = np.concatenate(([0], np.cumsum(_ms_energy(buf))))
+        starts = np.arange(seg_len - min_silence_len + 1)
+        window_energy = cumulative[starts + min_silence_len] - cumulative[starts]
+        # pydub pads windows that run past the last frame with zeros, so count requested frames
+        frames = (
+            ((starts + min_silence_len) * buf.frame_rate / 1000).astype(np.int64)
+            - (starts * buf.frame_rate / 1000).astype(np.int64)
+        )
+        samples = np.maximum(frames, 1) * buf.channels
+        # audioop.rms truncates to an integer: int(sqrt(e / n)) <= t  <=>  e < (floor(t) + 1)**2 * n
+        limit = (math.floor(threshold) + 1) ** 2
+        silent = np.flatnonzero(window_energy < limit * samples)
+    if len(silent) == 0:
+        return []
+    # pydub merges silent windows unless the next one starts more than min_silence_len later
+    breaks = np.flatnonzero(np.diff(silent) > min_silence_len)
+    range_starts = np.concatenate(([silent[0]], silent[breaks + 1]))
+    range_ends = np.concatenate((silent[breaks], [silent[-1]])) + min_silence_len
+    return [[int(s), int(e)] for s, e in zip(range_starts, range_ends)]
+
+
+def detect_nonsilent(buf: AudioBuffer, min_silence_len: int = 1000, silence_thresh: float = -16) -> List[List[int]]:
+    """Inverse of ``detect_silence``."""
+    silent_ranges = detect_silence(buf, min_silence_len, silence_thresh)
+    seg_len = len(buf)
+    if not silent_ranges:
+        return [[0, seg_len]]
+    if silent_ranges[0] == [0, seg_len]:
+        return []
+    nonsilent, previous_end = [], 0
+    for start, end in silent_ranges:
+        nonsilent.append([previous_end, start])
+        previous_end = end
+    if previous_end != seg_len:
+        nonsilent.append([previous_end, seg_len])
+    if nonsilent[0] == [0, 0]:
+        nonsilent.pop(0)
+    return nonsilent
+
+
+def split_on_silence(
+    buf: AudioBuffer, min_silence_len: int = 1000, silence_thresh: float = -16, keep_silence=100
+) -> List[AudioBuffer]:
+    """Views of ``buf`` split at silences, as ``pydub.silence.split_on_silence``."""
+    if isinstance(keep_silence, bool):
+        keep_silence = len(buf) if keep_silence else 0
+    nonsilent = detect_nonsilent(buf, min_silence_len, silence_thresh)
+    ranges = [[start - keep_silence, end + keep_silence] for start, end in nonsilent]
+    for current, following in zip(ranges, ranges[1:]):
+        if following[0] < current[1]:
+            current[1] = (current[1] + following[0]) // 2
+            following[0] = current[1]
+    return [buf[max(start, 0) : min(end, len(buf))] for start, end in ranges]
@@ -1,13 +1,14 @@
 import os
 import argparse
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
 
+from .audio_io import export_buffer, load_buffer
+from .silence import split_on_silence
 
-def split_by_silence(input_file, output_dir, min_silence_len, silence_thresh, album=None, title_prefix=None):
+
+def split_by_silence(input_file, output_dir, min_silence_len, silence_thresh, album=None, title_prefix=None, mmap=False):
     """Split audio into chunks by silence."""
     os.makedirs(output_dir, exist_ok=True)
-    audio = AudioSegment.from_file(input_file)
+    audio = load_buffer(input_file, mmap=mmap)
     audio_chunks = split_on_silence(
         audio,
         min_silence_len=min_silence_len,
@@ -24,20 +25,20 @@ def split_by_silence(input_file, output_dir, min_silence_len, silence_thresh, al
             title = f"{stemname}-{index+1:0{padding}d}"
         output_filename = os.path.join(output_dir, f"{title}.mp3")
         tags = {"title": title, "album": album, "artist": "Homebrew"}
-        chunk.export(output_filename, format="mp3", tags=tags, id3v2_version="3")
+        export_buffer(chunk, output_filename, format="mp3", tags=tags, id3v2_version="3")
         outputs.append(output_filename)
         print(f"Created {output_filename}")
     return outputs
 
 
-def split_by_duration(input_file, segment_minutes, output_dir, overlap=5, album=None, title_prefix=None):
+def split_by_duration(input_file, segment_minutes, output_dir, overlap=5, album=None, title_prefix=None, mmap=False):
     """Split audio into fixed-length chunks (minutes)."""
     if segment_minutes <= 0:
         raise ValueError("Segment length must be greater than zero minutes.")
     if overlap < 0:
         raise ValueError("Overlap must be non-negative.")
     os.makedirs(output_dir, exist_ok=True)
-    audio = AudioSegment.from_file(input_file)
+    audio = load_buffer(input_file, mmap=mmap)
     segment_duration_ms = segment_minutes * 60 * 1000
     overlap_ms = overlap * 1000
     total_segments = 1
@@ -60,7 +61,7 @@ def split_by_duration(input_file, segment_minutes, output_dir, overlap=5, album=
             title = f"{stemname}-{index:0{padding}d}"
         output_filename = os.path.join(output_dir, f"{title}.mp3")
         tags = {"title": title, "album": album, "artist": "Homebrew"}
-        segment.export(output_filename, format="mp3", tags=tags, id3v2_version="3")
+        export_buffer(segment, output_filename, format="mp3", tags=tags, id3v2_version="3")
         print(f"Created {output_filename}: start={start_ms}, end={end_ms}")
         outputs.append(output_filename)
         start_ms += segment_duration_ms - overlap_ms
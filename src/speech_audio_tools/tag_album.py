@@ -1,12 +1,17 @@
+import io
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable, Optional
 
 from mutagen import File
+from mutagen.id3 import ID3, ID3NoHeaderError, TALB, TIT2, TPE1
 
 
 SUPPORTED_EXTS = {".mp3", ".m4a", ".wav"}
+DEFAULT_JOBS = 8
+_COPY_BUFFER = 1024 * 1024
 
 
 def _iter_audio_files(input_path: Path) -> Iterable[Path]:
@@ -28,6 +33,42 @@ def _resolve_target(src: Path, output_dir: Optional[Path]) -> Path:
     return dst
 
 
+def _copy_and_tag_mp3(src: Path, dst: Path, album: str, artist: str, title_override: Optional[str]) -> bool:
+    """Write ``dst`` as a new ID3v2 tag followed by the untouched MPEG payload of ``src``.
+
+    Returns False (caller falls back to copy-then-tag) when the file also carries an
+    ID3v1 trailer, which a plain payload copy would leave stale.
+    """
+    try:
+        tags = ID3(src)
+        payload_offset = tags.size
+    except ID3NoHeaderError:
+        tags, payload_offset = ID3(), 0
+    with open(src, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() >= 128:
+            f.seek(-128, os.SEEK_END)
+            if f.read(3) == b"TAG":
+                return False
+
+    existing = tags.get("TIT2")
+    title = title_override or (existing.text[0] if existing and existing.text else None) or src.stem
+    tags.setall("TIT2", [TIT2(encoding=3, text=[title])])
+    tags.setall("TALB", [TALB(encoding=3, text=[album])])
+    tags.setall("TPE1", [TPE1(encoding=3, text=[artist])])
+    header = io.BytesIO()
+    tags.save(header, v1=0)
+
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(src, "rb") as fin, open(tmp, "wb") as fout:
+        fout.write(header.getvalue())
+        fin.seek(payload_offset)
+        shutil.copyfileobj(fin, fout, _COPY_BUFFER)
+    shutil.copymode(src, tmp)
+    os.replace(tmp, dst)
+    return True
+
+
 def _set_tags(filepath: Path, album: str, artist: str, title_override: Optional[str]) -> bool:
     audio = File(filepath, easy=True)
     if audio is None:
@@ -53,7 +94,24 @@ def _set_tags(filepath: Path, album: str, artist: str, title_override: Optional[
     return True
 
 
-def tag_album(input_path: str, album: str, output_dir: Optional[str] = None, title: Optional[str] = None, artist: str = "Homebrew"):
+def _tag_one(src: Path, output_path: Optional[Path], album: str, artist: str, title: Optional[str]) -> Optional[Path]:
+    if output_path is not None and src.suffix.lower() == ".mp3":
+        dest = output_path / src.name
+        if _copy_and_tag_mp3(src, dest, album=album, artist=artist, title_override=title):
+            return dest
+    dest = _resolve_target(src, output_path)
+    return dest if _set_tags(dest, album=album, artist=artist, title_override=title) else None
+
+
+def tag_album(
+    input_path: str,
+    album: str,
+    output_dir: Optional[str] = None,
+    title: Optional[str] = None,
+    artist: str = "Homebrew",
+    jobs: int = DEFAULT_JOBS,
+):
+    """Set title/album/artist tags in place, or on copies in ``output_dir`` (files tagged ``jobs`` at a time)."""
     path = Path(input_path)
     if not path.exists():
         raise ValueError(f'"{input_path}" does not exist')
@@ -62,14 +120,21 @@ def tag_album(input_path: str, album: str, output_dir: Optional[str] = None, tit
         raise ValueError("--title is only supported when tagging a single file")
 
     output_path = Path(output_dir) if output_dir else None
+    if output_path is not None:
+        output_path.mkdir(parents=True, exist_ok=True)
 
-    processed = 0
+    sources = []
     for src in _iter_audio_files(path):
         if src.suffix.lower() not in SUPPORTED_EXTS:
             print(f"Skipping unsupported extension: {src}")
             continue
-        dest = _resolve_target(src, output_path)
-        if _set_tags(dest, album=album, artist=artist, title_override=title):
+        sources.append(src)
+
+    processed = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for dest in pool.map(lambda src: _tag_one(src, output_path, album, artist, title), sources):
+            if dest is None:
+                continue
             if output_path is None:
                 print(f"Tagged in-place: {dest}")
             else:
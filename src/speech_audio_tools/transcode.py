@@ -0,0 +1,128 @@
+"""Stream a speech-grade (mono 16 kHz, low bitrate) transcode of a file from ffmpeg.
+
+Recognisers need no more than mono 16 kHz, so sending a 24-32 kbps Opus/MP3
+rendition instead of the original cuts upload bytes several-fold. The encoded
+bytes are read from ffmpeg's stdout while they are produced, so they can be
+handed straight to an HTTP request body or S3 multipart upload without a
+temporary file.
+"""
+from __future__ import annotations
+
+import io
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .profiling import span
+
+# codec name -> (ffmpeg encoder, container format, file extension, extra encoder args)
+CODECS = {
+    "opus": ("libopus", "ogg", ".ogg", ["-application", "voip"]),
+    "mp3": ("libmp3lame", "mp3", ".mp3", []),
+}
+DEFAULT_BITRATES = {"opus": "24k", "mp3": "32k"}
+SAMPLE_RATE = 16000
+
+
+def _check_codec(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown transcode codec: {codec} (choose from {', '.join(CODECS)})")
+
+
+def output_name(path, codec: str) -> str:
+    """Base name the transcoded stream is uploaded as (``talk.m4a`` -> ``talk.ogg``)."""
+    _check_codec(codec)
+    return Path(path).stem + CODECS[codec][2]
+
+
+def bitrate_bps(codec: str, bitrate: Optional[str] = None) -> int:
+    _check_codec(codec)
+    value = (bitrate or DEFAULT_BITRATES[codec]).lower()
+    return int(float(value[:-1]) * 1000) if value.endswith("k") else int(value)
+
+
+def build_transcode_command(
+    input_file, codec: str = "opus", bitrate: Optional[str] = None, ffmpeg: str = "ffmpeg"
+) -> List[str]:
+    _check_codec(codec)
+    encoder, container, _, extra = CODECS[codec]
+    return [
+        ffmpeg,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        os.fspath(input_file),
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-c:a",
+        encoder,
+        "-b:a",
+        bitrate or DEFAULT_BITRATES[codec],
+        *extra,
+        "-f",
+        container,
+        "pipe:1",
+    ]
+
+
+class TranscodeStream(io.RawIOBase):
+    """Read-only file object over ffmpeg's encoded output.
+
+    It deliberately has no ``fileno`` and cannot seek, so HTTP clients stream it
+    (chunked) and boto3 uses a multipart upload. ``close()`` waits for ffmpeg and
+    raises RuntimeError if the transcode failed; closing before the end of the
+    stream stops ffmpeg instead.
+    """
+
+    def __init__(self, input_file, codec: str = "opus", bitrate: Optional[str] = None, ffmpeg: str = "ffmpeg"):
+        super().__init__()
+        self.name = output_name(input_file, codec)
+        self.bytes_read = 0
+        self._finished = False
+        self._proc = None  # close() (also run on garbage collection) must cope with a failed start
+        self._span = span("subprocess", "ffmpeg transcode", input=os.fspath(input_file), codec=codec)
+        self._span.__enter__()
+        try:
+            self._proc = subprocess.Popen(
+                build_transcode_command(input_file, codec, bitrate, ffmpeg),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except BaseException:
+            self._span.__exit__(*sys.exc_info())
+            raise
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._proc.stdout.readinto(buffer)
+        self.bytes_read += count
+        self._finished = count == 0
+        return count
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._proc is None:
+            super().close()
+            return
+        try:
+            if not self._finished:
+                self._proc.kill()
+            self._proc.stdout.close()
+            stderr = self._proc.stderr.read().decode(errors="replace").strip()
+            self._proc.stderr.close()
+            returncode = self._proc.wait()
+        finally:
+            self._span.__exit__(None, None, None)
+            super().close()
+        if self._finished and returncode != 0:
+            raise RuntimeError(f"ffmpeg transcode failed for {self.name}: {stderr}")
@@ -1,18 +1,29 @@
 from __future__ import annotations
 
+import hashlib
 import io
 import json
 import os
+import random
 import re
-from collections import Counter
-from copy import deepcopy
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
 from time import sleep
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import boto3
 
+from .profiling import span
+
+if TYPE_CHECKING:
+    from .job_ledger import JobLedger
+    from .transcript_cache import TranscriptCache
+
 # Small replacements to normalize transcript wording (carried from callan-transcribe)
 _REPLACE_LIST = [
     ("Less than", "Lesson"),
@@ -20,35 +31,278 @@ _REPLACE_LIST = [
     ("et cetera", "etc"),
     ("etcetera", "etc"),
 ]
+_REPLACEMENTS = dict(_REPLACE_LIST)
+_REPLACE_PATTERN = re.compile("|".join(re.escape(src) for src, _ in _REPLACE_LIST))
+
+# Media formats accepted by AWS Transcribe, keyed by file extension.
+MEDIA_FORMATS = {
+    ".amr": "amr",
+    ".flac": "flac",
+    ".m4a": "m4a",
+    ".mp3": "mp3",
+    ".mp4": "mp4",
+    ".ogg": "ogg",
+    ".wav": "wav",
+    ".webm": "webm",
+}
+DEFAULT_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+DEFAULT_UPLOAD_WORKERS = 8
+CACHE_PROVIDER = "aws"
+CACHE_MODEL = "transcribe"
+DELETE_BATCH_SIZE = 1000  # delete_objects accepts at most 1000 keys per request
+# Stay below the default concurrent-job quota so other users of the account keep headroom.
+DEFAULT_MAX_CONCURRENT_JOBS = 50
+
+
+def iter_s3_objects(
+    bucket: str,
+    prefix: str,
+    *,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_after: Optional[datetime] = None,
+    modified_before: Optional[datetime] = None,
+    s3_client=None,
+) -> Iterator[dict]:
+    """Yield object summaries (Key, Size, LastModified, ETag) under prefix, page by page."""
+    s3 = s3_client or boto3.client("s3")
+    marker = ""
+    while True:
+        with span("network", "s3.list_objects"):
+            resp = s3.list_objects(Bucket=bucket, Prefix=prefix, Marker=marker)
+        contents = resp.get("Contents", [])
+        for obj in contents:
+            if obj["Key"] == prefix:
+                continue
+            size, modified = obj.get("Size"), obj.get("LastModified")
+            if min_size is not None and size is not None and size < min_size:
+                continue
+            if max_size is not None and size is not None and size > max_size:
+                continue
+            if modified_after is not None and modified is not None and modified < modified_after:
+                continue
+            if modified_before is not None and modified is not None and modified >= modified_before:
+                continue
+            yield obj
+        if not resp.get("IsTruncated") or not contents:
+            return
+        marker = resp.get("NextMarker") or contents[-1]["Key"]
 
 
 def list_s3_objects(bucket: str, prefix: str, *, s3_client=None) -> List[str]:
-    s3 = s3_client or boto3.client("s3")
-    resp = s3.list_objects(Bucket=bucket, Prefix=prefix)
-    contents = resp.get("Contents", [])
-    return [f"s3://{bucket}/{obj['Key']}" for obj in contents if obj["Key"] != prefix]
+    return [f"s3://{bucket}/{obj['Key']}" for obj in iter_s3_objects(bucket, prefix, s3_client=s3_client)]
+
 
+def upload_file(
+    bucket: str,
+    prefix: str,
+    filename: str,
+    *,
+    transcode: Optional[str] = None,
+    transcode_bitrate: Optional[str] = None,
+    s3_client=None,
+) -> str:
+    """Upload filename under prefix and return the key.
 
-def upload_file(bucket: str, prefix: str, filename: str, *, s3_client=None) -> str:
+    With ``transcode`` ("opus" or "mp3") ffmpeg's mono 16 kHz output is streamed
+    into a multipart upload instead, stored as ``<stem>.ogg``/``<stem>.mp3``.
+    """
     if not os.path.exists(filename):
         raise FileNotFoundError(filename)
-    basename = os.path.basename(filename)
     s3 = s3_client or boto3.client("s3")
+    if transcode:
+        from .transcode import TranscodeStream
+
+        with TranscodeStream(filename, transcode, transcode_bitrate) as stream:
+            key = os.path.join(prefix, stream.name)
+            with span("network", "s3.upload_fileobj", codec=transcode):
+                s3.upload_fileobj(
+                    stream, bucket, key, Config=_transfer_config(DEFAULT_MULTIPART_CHUNKSIZE, max_concurrency=4)
+                )
+        return key
+    basename = os.path.basename(filename)
     key = os.path.join(prefix, basename)
-    s3.upload_file(filename, bucket, key)
+    with span("network", "s3.upload_file", bytes=os.path.getsize(filename)):
+        s3.upload_file(filename, bucket, key)
     return key
 
 
+def _transfer_config(chunksize: int, max_concurrency: int):
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=chunksize,
+        multipart_chunksize=chunksize,
+        max_concurrency=max_concurrency,
+        use_threads=True,
+    )
+
+
+def _local_etag(path: str, chunksize: int, multipart: bool = False) -> str:
+    """Compute the ETag S3 reports for ``path`` when uploaded with ``chunksize`` parts.
+
+    ``multipart`` gives the ``md5-of-md5s-N`` form even for a single part, as S3
+    reports for a file exactly ``chunksize`` long (it reaches the multipart threshold).
+    """
+    digests = []
+    with open(path, "rb") as f, span("hash", "s3 etag"):
+        while True:
+            part, filled = hashlib.md5(), 0
+            while filled < chunksize:
+                buf = f.read(min(chunksize - filled, 1 << 20))
+                if not buf:
+                    break
+                part.update(buf)
+                filled += len(buf)
+            if filled == 0 and digests:
+                break
+            digests.append(part.digest())
+            if filled < chunksize:
+                break
+    if len(digests) == 1 and not multipart:
+        return digests[0].hex()
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+def _matches_remote(path: str, size: int, etag: str, chunksize: int) -> bool:
+    if os.path.getsize(path) != size:
+        return False
+    if "-" not in etag:
+        return _local_etag(path, max(size, 1)) == etag
+    # Multipart ETag: try our chunk size, then the MiB-aligned size implied by the part count.
+    parts = int(etag.rsplit("-", 1)[1])
+    mib = 1024 * 1024
+    implied = -(-size // parts // mib) * mib
+    return any(_local_etag(path, c, multipart=True) == etag for c in dict.fromkeys((chunksize, implied)) if c > 0)
+
+
+def _list_existing(bucket: str, prefix: str, s3) -> Dict[str, Tuple[int, str]]:
+    """Map keys under prefix to (size, etag) with one paginated listing."""
+    return {
+        obj["Key"]: (obj.get("Size"), obj.get("ETag", "").strip('"'))
+        for obj in iter_s3_objects(bucket, prefix, s3_client=s3)
+    }
+
+
+def sync_directory(
+    bucket: str,
+    prefix: str,
+    directory: str,
+    *,
+    max_workers: int = DEFAULT_UPLOAD_WORKERS,
+    chunksize: int = DEFAULT_MULTIPART_CHUNKSIZE,
+    part_concurrency: int = 4,
+    s3_client=None,
+) -> Tuple[List[str], List[str]]:
+    """Upload files in ``directory`` under prefix, skipping objects whose size/ETag match.
+
+    The destination is listed once; hashing and uploads run concurrently with
+    ``max_workers`` files in flight and ``part_concurrency`` parts per file.
+    Returns (uploaded_keys, skipped_keys).
+    """
+    s3 = s3_client or boto3.client("s3")
+    files = sorted(
+        entry.path for entry in os.scandir(directory) if entry.is_file() and not entry.name.startswith(".")
+    )
+    folder = prefix.strip("/")  # "" uploads to the bucket root
+    existing = _list_existing(bucket, folder + "/" if folder else "", s3)
+    config = _transfer_config(chunksize, part_concurrency)
+
+    def sync_one(path: str) -> Tuple[str, bool]:
+        name = os.path.basename(path)
+        key = f"{folder}/{name}" if folder else name
+        remote = existing.get(key)
+        if remote and _matches_remote(path, remote[0], remote[1], chunksize):
+            return key, False
+        with span("network", "s3.upload_file", bytes=os.path.getsize(path)):
+            s3.upload_file(path, bucket, key, Config=config)
+        return key, True
+
+    uploaded, skipped = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for key, did_upload in pool.map(sync_one, files):
+            (uploaded if did_upload else skipped).append(key)
+    return uploaded, skipped
+
+
 def delete_file(bucket: str, prefix: str, filename: str, *, s3_client=None) -> None:
     s3 = s3_client or boto3.client("s3")
     s3.delete_object(Bucket=bucket, Key=os.path.join(prefix, filename))
 
 
+def _delete_batch(s3, bucket: str, keys: List[str]) -> List[str]:
+    with span("network", "s3.delete_objects", keys=len(keys)):
+        resp = s3.delete_objects(
+            Bucket=bucket, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        )
+    return [f"{err.get('Key')}: {err.get('Code')} {err.get('Message', '')}".rstrip() for err in resp.get("Errors", [])]
+
+
+def delete_prefix(
+    bucket: str,
+    prefix: str,
+    *,
+    include_transcripts: bool = True,
+    max_workers: int = 4,
+    s3_client=None,
+) -> int:
+    """Delete every object under prefix (and its ``-transcript/`` outputs); return the count.
+
+    Keys are streamed from the paginated listing into 1000-key ``delete_objects``
+    batches, with up to ``max_workers`` batches in flight.
+    """
+    folder = prefix.strip("/")
+    if not folder:
+        raise ValueError("Refusing to delete an empty prefix (the whole bucket)")
+    s3 = s3_client or boto3.client("s3")
+    prefixes = [folder + "/"] + ([folder + "-transcript/"] if include_transcripts else [])
+
+    deleted, errors = 0, []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = set()
+
+        def submit(batch):
+            nonlocal in_flight
+            if len(in_flight) >= max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    errors.extend(future.result())
+            in_flight.add(pool.submit(_delete_batch, s3, bucket, batch))
+
+        batch: List[str] = []
+        for listed_prefix in prefixes:
+            for obj in iter_s3_objects(bucket, listed_prefix, s3_client=s3):
+                batch.append(obj["Key"])
+                if len(batch) == DELETE_BATCH_SIZE:
+                    submit(batch)
+                    deleted += len(batch)
+                    batch = []
+        if batch:
+            submit(batch)
+            deleted += len(batch)
+        for future in in_flight:
+            errors.extend(future.result())
+
+    if errors:
+        raise RuntimeError(f"Failed to delete {len(errors)} objects:\n" + "\n".join(errors))
+    return deleted
+
+
 def _encode_filename(filename: str) -> str:
     replacer = lambda match: hex(ord(match.group(0)))[2:]
     return re.sub(r"[^0-9a-zA-Z._-]", replacer, filename)
 
 
+def _job_name(object_name: str) -> str:
+    return "transcribe-job-" + _encode_filename(object_name.replace(" ", "_"))
+
+
+def _error_code(exc: Exception) -> Optional[str]:
+    """Return the AWS error code of a botocore ClientError (None for other errors)."""
+    response = getattr(exc, "response", None) or {}
+    return response.get("Error", {}).get("Code")
+
+
 def start_transcription_job(
     *,
     job_name: str,
@@ -79,20 +333,22 @@ def start_transcription_job(
         kwargs["IdentifyMultipleLanguages"] = True
         kwargs["LanguageOptions"] = languages
 
-    return client.start_transcription_job(**kwargs)
+    with span("network", "transcribe.start_transcription_job"):
+        return client.start_transcription_job(**kwargs)
 
 
 def wait_for_job(job_name: str, *, region: str, wait_seconds: int = 5, transcribe_client=None):
     client = transcribe_client or boto3.client("transcribe", region_name=region)
-    while True:
-        resp = client.get_transcription_job(TranscriptionJobName=job_name)
-        status = resp["TranscriptionJob"]["TranscriptionJobStatus"]
-        if status == "COMPLETED":
-            client.delete_transcription_job(TranscriptionJobName=job_name)
-            return resp
-        if status == "FAILED":
-            raise RuntimeError(f"Transcription job failed: {resp['TranscriptionJob'].get('FailureReason')}")
-        sleep(wait_seconds)
+    with span("network", "transcribe.wait_for_job", job=job_name):
+        while True:
+            resp = client.get_transcription_job(TranscriptionJobName=job_name)
+            status = resp["TranscriptionJob"]["TranscriptionJobStatus"]
+            if status == "COMPLETED":
+                client.delete_transcription_job(TranscriptionJobName=job_name)
+                return resp
+            if status == "FAILED":
+                raise RuntimeError(f"Transcription job failed: {resp['TranscriptionJob'].get('FailureReason')}")
+            sleep(wait_seconds)
 
 
 def fetch_transcript(transcript_uri: str, *, s3_client=None) -> dict:
@@ -101,56 +357,90 @@ def fetch_transcript(transcript_uri: str, *, s3_client=None) -> dict:
     bucket = path_components[1]
     transcript_path = "/".join(path_components[2:])
 
-    with io.BytesIO() as buf:
+    with io.BytesIO() as buf, span("network", "s3.download_transcript"):
         s3.download_fileobj(bucket, transcript_path, buf)
         return json.loads(buf.getvalue().decode("utf-8"))
 
 
-def _make_items_dict(data: dict) -> dict:
-    items_dict = {}
-    for item in data["results"]["items"]:
-        if item["type"] == "punctuation":
-            # append punctuation to previous token content
-            punctuation = item["alternatives"][0]["content"]
-            if not items_dict:
-                continue
-            last_key = list(items_dict.keys())[-1]
-            items_dict[last_key]["content"] = items_dict[last_key]["content"] + punctuation
-        else:
-            start_time = item["start_time"]
-            contents = [alt["content"] for alt in item["alternatives"]]
-            item["content"] = " ".join(contents)
-            items_dict[start_time] = item
-    return items_dict
+class TranscriptItems:
+    """Pronunciation items in columns: start/end times, speaker code and token text.
 
+    Punctuation is folded into the preceding token, so index ``i`` in every column
+    refers to the same spoken word. Items sharing a start time are all kept.
+    """
 
-def _get_segment_content_from_items(segment: dict, items: dict) -> str:
-    contents = [items[itm["start_time"]]["content"] for itm in segment["items"]]
-    content = " ".join(contents)
-    for src, dst in _REPLACE_LIST:
-        content = content.replace(src, dst)
-    return content
+    __slots__ = ("start", "end", "speaker", "tokens", "speakers")
 
+    def __init__(self):
+        self.start = array("d")
+        self.end = array("d")
+        self.speaker = array("h")  # index into self.speakers, -1 when unlabelled
+        self.tokens: List[str] = []
+        self.speakers: List[str] = []
 
-def prepare_segments(data: dict) -> List[dict]:
-    items = _make_items_dict(data)
-    segments = deepcopy(data["results"]["speaker_labels"]["segments"])
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    @classmethod
+    def parse(cls, items: Iterable[dict]) -> "TranscriptItems":
+        columns = cls()
+        codes: Dict[str, int] = {}
+        tokens = columns.tokens
+        for item in items:
+            if item["type"] == "punctuation":
+                if tokens:
+                    tokens[-1] += item["alternatives"][0]["content"]
+                continue
+            label = item.get("speaker_label")
+            if label is not None and label not in codes:
+                codes[label] = len(columns.speakers)
+                columns.speakers.append(label)
+            columns.start.append(float(item["start_time"]))
+            columns.end.append(float(item.get("end_time", item["start_time"])))
+            columns.speaker.append(codes[label] if label is not None else -1)
+            tokens.append(" ".join(alt["content"] for alt in item["alternatives"]))
+        return columns
+
+    def segment_text(self, segment_items: Iterable[dict], cursor: int = 0) -> Tuple[str, int]:
+        """Join the tokens a diarization segment refers to; return (text, next cursor).
+
+        Segment items are matched by start time walking forward from ``cursor``, so
+        consecutive segments cost O(items) overall; out-of-order segments fall back
+        to a binary search from the beginning.
+        """
+        start, tokens = self.start, self.tokens
+        words = []
+        for ref in segment_items:
+            t = float(ref["start_time"])
+            lo = cursor if cursor == 0 or start[cursor - 1] <= t else 0
+            index = bisect_left(start, t, lo)
+            if index < len(tokens) and start[index] == t:
+                words.append(tokens[index])
+                cursor = index + 1
+        return _normalize_wording(" ".join(words)), cursor
+
+
+def _normalize_wording(text: str) -> str:
+    return _REPLACE_PATTERN.sub(lambda m: _REPLACEMENTS[m.group(0)], text)
 
-    speakers = Counter()
-    for seg in segments:
-        speakers[seg["speaker_label"]] += 1
-    labels = list(speakers.keys())
+
+def prepare_segments(data: dict) -> List[dict]:
+    raw_segments = data["results"]["speaker_labels"]["segments"]
+    labels = list(Counter(seg["speaker_label"] for seg in raw_segments))
     if not labels:
         return []
     teacher = labels[0]
-    student = labels[1] if len(labels) > 1 else labels[0]
+    items = TranscriptItems.parse(data["results"]["items"])
 
+    segments = []
+    cursor = 0
     prev_teacher_seg = None
-    for seg in segments:
-        content = _get_segment_content_from_items(seg, items)
+    for raw in raw_segments:
+        content, cursor = items.segment_text(raw.get("items", ()), cursor)
+        seg = {key: value for key, value in raw.items() if key != "items"}
         seg["content"] = content
-        seg["speaker_label"] = "teacher" if seg["speaker_label"] == teacher else "student"
-        seg.pop("items", None)
+        seg["speaker_label"] = "teacher" if raw["speaker_label"] == teacher else "student"
+        segments.append(seg)
 
         if seg["speaker_label"] == "student":
             if len(content.split()) >= 3:
@@ -217,30 +507,308 @@ def transcribe_s3_object(
     wait_seconds: int = 5,
     transcribe_client=None,
     s3_client=None,
+    use_cache: bool = True,
+    cache: Optional[TranscriptCache] = None,
+    use_ledger: bool = True,
+    ledger: Optional[JobLedger] = None,
 ) -> str:
+    """Transcribe one S3 object and return the text.
+
+    The job ledger makes reruns resume: a job recorded as running is polled
+    rather than started again, and a completed one is fetched from its recorded
+    transcript URI.
+    """
+    from .job_ledger import COMPLETED, FAILED, SUBMITTED
+
     languages = [lang.strip() for lang in languages if lang.strip()]
     output_prefix = f"{prefix.rstrip('/')}-transcript/"
-    media_file = f"s3://{bucket}/{prefix}/{object_name}"
-    job_name = "transcribe-job-" + _encode_filename(object_name.replace(" ", "_"))
-
-    start_transcription_job(
-        job_name=job_name,
-        languages=languages,
-        media_file_uri=media_file,
-        media_format=media_format,
-        output_bucket=bucket,
-        output_key_prefix=output_prefix,
-        region=region,
-        transcribe_client=transcribe_client,
-    )
+    key = f"{prefix}/{object_name}"
+    media_file = f"s3://{bucket}/{key}"
+    job_name = _job_name(object_name)
+    client = transcribe_client or boto3.client("transcribe", region_name=region)
 
-    resp = wait_for_job(job_name, region=region, wait_seconds=wait_seconds, transcribe_client=transcribe_client)
+    etag = None
+    if use_cache or use_ledger:
+        s3_client = s3_client or boto3.client("s3")
+        etag = _object_etag(s3_client.head_object(Bucket=bucket, Key=key))
+    store = (cache or _default_transcript_cache()) if use_cache else None
+    cached = _cached_transcript(store, etag, languages)
+    if cached is not None:
+        return cached
+
+    book = (ledger or _default_job_ledger()) if use_ledger else None
+    record = book.get(job_name) if book else None
+    superseded = record is not None and not record.matches(bucket, key, languages, etag)
+    if superseded:
+        record = None  # another (or a changed) object under the same job name
+    if record is not None and record.status == COMPLETED:
+        try:
+            transcript_data = fetch_transcript(record.transcript_uri, s3_client=s3_client)
+        except Exception:  # noqa: BLE001 - output removed since; transcribe again
+            record = None
+        else:
+            text = _transcript_text(transcript_data, languages)
+            _cache_transcript(store, etag, languages, text)
+            return text
+
+    def start():
+        start_transcription_job(
+            job_name=job_name,
+            languages=languages,
+            media_file_uri=media_file,
+            media_format=media_format,
+            output_bucket=bucket,
+            output_key_prefix=output_prefix,
+            region=region,
+            transcribe_client=client,
+        )
+
+    def submit():
+        try:
+            start()
+        except Exception as exc:  # noqa: BLE001 - classified by AWS error code
+            if _error_code(exc) != "ConflictException":
+                raise
+            if superseded:
+                # The existing job transcribes what the ledger recorded, not the current
+                # content: let it finish, remove it and start over.
+                try:
+                    wait_for_job(job_name, region=region, wait_seconds=wait_seconds, transcribe_client=client)
+                except RuntimeError:
+                    pass
+                _delete_job_quietly(client, job_name)
+                start()
+            # Otherwise it is already running under this name (started outside the ledger): wait for it.
+        if book:
+            book.submitted(job_name, bucket, key, languages, etag)
+
+    def wait():
+        try:
+            return wait_for_job(job_name, region=region, wait_seconds=wait_seconds, transcribe_client=client)
+        except RuntimeError as exc:
+            if book:
+                book.failed(job_name, str(exc))
+            raise
+
+    resuming = record is not None and record.status == SUBMITTED
+    if not resuming:
+        if record is not None and record.status == FAILED:
+            _delete_job_quietly(client, job_name)
+        submit()
+    try:
+        resp = wait()
+    except Exception as exc:  # noqa: BLE001
+        if not (resuming and _error_code(exc) == "BadRequestException"):
+            raise
+        submit()  # the recorded job no longer exists on AWS
+        resp = wait()
     transcript_uri = resp["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]
+    if book:
+        book.completed(job_name, transcript_uri)
 
     transcript_data = fetch_transcript(transcript_uri, s3_client=s3_client)
+    text = _transcript_text(transcript_data, languages)
+    _cache_transcript(store, etag, languages, text)
+    return text
+
+
+def _delete_job_quietly(client, job_name: str) -> None:
+    try:
+        client.delete_transcription_job(TranscriptionJobName=job_name)
+    except Exception:  # noqa: BLE001 - already gone
+        pass
+
+
+def _default_job_ledger() -> JobLedger:
+    from .job_ledger import default_ledger
+
+    return default_ledger()
+
+
+def _default_transcript_cache() -> TranscriptCache:
+    from .transcript_cache import default_cache
+
+    return default_cache()
+
+
+def _object_etag(obj: dict) -> Optional[str]:
+    etag = obj.get("ETag")
+    return etag.strip('"') if isinstance(etag, str) and etag else None
+
+
+def _cached_transcript(store: Optional[TranscriptCache], etag: Optional[str], languages: List[str]) -> Optional[str]:
+    if store is None or etag is None:
+        return None
+    return store.get(f"etag:{etag}", CACHE_PROVIDER, CACHE_MODEL, languages)
+
+
+def _cache_transcript(store: Optional[TranscriptCache], etag: Optional[str], languages: List[str], text: str) -> None:
+    if store is not None and etag is not None:
+        store.put(f"etag:{etag}", CACHE_PROVIDER, CACHE_MODEL, languages, "text", text)
+
+
+def _transcript_text(transcript_data: dict, languages: List[str]) -> str:
     if len(languages) == 1:
         scripts = transcript_data.get("results", {}).get("transcripts", [])
         return "\n".join(script.get("transcript", "") for script in scripts)
 
     items = transcript_data.get("results", {}).get("items", [])
     return _stitch_multi_language_items(items)
+
+
+def _list_media_objects(bucket: str, prefix: str, s3_client) -> List[Tuple[str, str, Optional[str]]]:
+    """Return (object_name, media_format, etag) for transcribable objects directly under prefix."""
+    folder = prefix.rstrip("/") + "/"
+    media = []
+    for obj in iter_s3_objects(bucket, folder, s3_client=s3_client):
+        object_name = obj["Key"][len(folder) :]
+        media_format = MEDIA_FORMATS.get(os.path.splitext(object_name)[1].lower())
+        if "/" not in object_name and media_format:
+            media.append((object_name, media_format, _object_etag(obj)))
+    return media
+
+
+def transcribe_s3_prefix(
+    *,
+    bucket: str,
+    prefix: str,
+    languages: Iterable[str],
+    media_format: Optional[str] = None,
+    region: str = "ap-northeast-1",
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_JOBS,
+    min_wait: float = 2.0,
+    max_wait: float = 60.0,
+    transcribe_client=None,
+    s3_client=None,
+    use_cache: bool = True,
+    cache: Optional[TranscriptCache] = None,
+    use_ledger: bool = True,
+    ledger: Optional[JobLedger] = None,
+) -> Iterator[Tuple[str, str]]:
+    """Transcribe every media object under prefix, yielding (object_name, text) as jobs finish.
+
+    Objects whose ETag already has a cached transcript, or whose job the ledger
+    records as completed, are yielded first without starting a job; jobs the
+    ledger records as running (an interrupted earlier run) are polled again.
+    At most ``max_concurrent`` jobs are in flight. A single poller checks all
+    outstanding jobs per round and sleeps with exponential backoff and jitter,
+    resetting to ``min_wait`` whenever a job finishes. Failed jobs do not stop
+    the batch; they are reported in a RuntimeError once everything else is done.
+    """
+    from .job_ledger import COMPLETED, FAILED, SUBMITTED
+
+    languages = [lang.strip() for lang in languages if lang.strip()]
+    client = transcribe_client or boto3.client("transcribe", region_name=region)
+    s3 = s3_client or boto3.client("s3")
+    prefix = prefix.rstrip("/")
+    store = (cache or _default_transcript_cache()) if use_cache else None
+    book = (ledger or _default_job_ledger()) if use_ledger else None
+
+    pending = deque()
+    outstanding: Dict[str, Tuple[str, str, Optional[str]]] = {}
+    superseded = set()  # job names the ledger recorded for other (or older) content
+    for object_name, detected_format, etag in _list_media_objects(bucket, prefix, s3):
+        cached = _cached_transcript(store, etag, languages)
+        if cached is not None:
+            yield object_name, cached
+            continue
+        job_name = _job_name(object_name)
+        record = book.get(job_name) if book else None
+        if record is not None and record.matches(bucket, f"{prefix}/{object_name}", languages, etag):
+            if record.status == SUBMITTED:
+                outstanding[job_name] = (object_name, detected_format, etag)
+                continue
+            if record.status == COMPLETED:
+                try:
+                    transcript_data = fetch_transcript(record.transcript_uri, s3_client=s3)
+                except Exception:  # noqa: BLE001 - output removed since; transcribe again
+                    pass
+                else:
+                    text = _transcript_text(transcript_data, languages)
+                    _cache_transcript(store, etag, languages, text)
+                    yield object_name, text
+                    continue
+            if record.status == FAILED:
+                _delete_job_quietly(client, job_name)
+        elif record is not None:
+            superseded.add(job_name)
+        pending.append((object_name, detected_format, etag))
+    failures: List[str] = []
+    delay = min_wait
+    while pending or outstanding:
+        while pending and len(outstanding) < max_concurrent:
+            object_name, detected_format, etag = pending[0]
+            job_name = _job_name(object_name)
+            try:
+                start_transcription_job(
+                    job_name=job_name,
+                    languages=languages,
+                    media_file_uri=f"s3://{bucket}/{prefix}/{object_name}",
+                    media_format=media_format or detected_format,
+                    output_bucket=bucket,
+                    output_key_prefix=f"{prefix}-transcript/",
+                    region=region,
+                    transcribe_client=client,
+                )
+            except Exception as exc:  # noqa: BLE001 - classified by AWS error code
+                code = _error_code(exc)
+                if code == "LimitExceededException":
+                    break  # account quota reached; retry after some jobs finish
+                if code != "ConflictException":
+                    raise
+                # A job with this name already exists (e.g. an earlier interrupted run): track it.
+                # If it was started for other content, it is only polled until it can be removed.
+            else:
+                superseded.discard(job_name)
+            pending.popleft()
+            outstanding[job_name] = (object_name, detected_format, etag)
+            if book and job_name not in superseded:
+                book.submitted(job_name, bucket, f"{prefix}/{object_name}", languages, etag)
+
+        finished = False
+        with span("network", "transcribe.poll", jobs=len(outstanding)):
+            for job_name, (object_name, detected_format, etag) in list(outstanding.items()):
+                try:
+                    resp = client.get_transcription_job(TranscriptionJobName=job_name)
+                except Exception as exc:  # noqa: BLE001
+                    code = _error_code(exc)
+                    if code in ("ThrottlingException", "LimitExceededException"):
+                        break  # back off and poll the remaining jobs next round
+                    if code != "BadRequestException":
+                        raise
+                    # A job recorded in the ledger no longer exists on AWS: submit it again.
+                    del outstanding[job_name]
+                    superseded.discard(job_name)
+                    pending.append((object_name, detected_format, etag))
+                    continue
+                job = resp["TranscriptionJob"]
+                status = job["TranscriptionJobStatus"]
+                if status not in ("COMPLETED", "FAILED"):
+                    continue
+                finished = True
+                del outstanding[job_name]
+                if job_name in superseded:
+                    # finished transcribing the old content: remove it and submit the current object
+                    superseded.discard(job_name)
+                    _delete_job_quietly(client, job_name)
+                    pending.append((object_name, detected_format, etag))
+                    continue
+                if status == "FAILED":
+                    failures.append(f"{object_name}: {job.get('FailureReason')}")
+                    if book:
+                        book.failed(job_name, job.get("FailureReason"))
+                    continue
+                if book:
+                    book.completed(job_name, job["Transcript"]["TranscriptFileUri"])
+                client.delete_transcription_job(TranscriptionJobName=job_name)
+                transcript_data = fetch_transcript(job["Transcript"]["TranscriptFileUri"], s3_client=s3)
+                text = _transcript_text(transcript_data, languages)
+                _cache_transcript(store, etag, languages, text)
+                yield object_name, text
+
+        if pending or outstanding:
+            delay = min_wait if finished else min(delay * 2, max_wait)
+            sleep(random.uniform(delay / 2, delay))
+
+    if failures:
+        raise RuntimeError("Transcription jobs failed:\n" + "\n".join(failures))
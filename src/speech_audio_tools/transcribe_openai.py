@@ -1,14 +1,39 @@
 from __future__ import annotations
 
+import glob
+import io
+import json
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from time import sleep
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from openai import OpenAI
+from .profiling import span
+from .ratelimit import retry_after as _retry_after
+
+if TYPE_CHECKING:  # the SDK is slow to import; load it only when a request is made
+    from openai import OpenAI
+
+    from .transcript_cache import TranscriptCache
 
 
 DEFAULT_MODEL = "gpt-4o-mini-transcribe"
 DEFAULT_RESPONSE_FORMAT = "text"
 
+# Long-file mode: the API rejects uploads over 25 MB, so bigger inputs are split.
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+DEFAULT_CHUNK_SECONDS = 600
+DEFAULT_CHUNK_WORKERS = 4
+DEFAULT_RETRIES = 3
+CHUNK_FRAME_RATE = 16000  # speech recognition needs no more than mono 16 kHz
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Directory mode
+DEFAULT_FILE_WORKERS = 4
+AUDIO_EXTENSIONS = (".flac", ".m4a", ".mp3", ".mp4", ".mpeg", ".mpga", ".oga", ".ogg", ".wav", ".webm")
+
 
 def transcribe_file(
     input_file: Path,
@@ -18,37 +43,452 @@ def transcribe_file(
     response_format: str = DEFAULT_RESPONSE_FORMAT,
     output_path: Optional[Path] = None,
     client: Optional[OpenAI] = None,
+    chunked: Optional[bool] = None,
+    max_chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    max_workers: int = DEFAULT_CHUNK_WORKERS,
+    transcode: Optional[str] = None,
+    transcode_bitrate: Optional[str] = None,
+    use_cache: bool = True,
+    cache: Optional[TranscriptCache] = None,
     **kwargs,
 ) -> Path:
     """Transcribe a local audio file with OpenAI Whisper API and save text.
 
+    Files over the upload limit go through ``transcribe_long_file`` unless
+    ``chunked`` is False; ``chunked=True`` forces it. With ``transcode``
+    ("opus" or "mp3") a mono 16 kHz rendition is streamed from ffmpeg as the
+    request body instead of the original bytes. Transcripts are looked up in
+    the content-hash transcript cache first unless ``use_cache`` is False.
+
     Returns the path to the written transcript file.
     """
 
     if not input_file.exists():
         raise FileNotFoundError(input_file)
+    out_path = output_path or transcript_path(input_file)
+
+    store = content_hash = None
+    options = ""
+    if use_cache:
+        from .transcript_cache import default_cache, options_key
+
+        store = cache or default_cache()
+        content_hash = store.file_digest(input_file)
+        options = options_key(transcode=transcode, transcode_bitrate=transcode_bitrate, **kwargs)
+        cached = store.get(content_hash, "openai", model, [language or ""], response_format, options)
+        if cached is not None:
+            out_path.write_text(cached)
+            return out_path
+
+    client = client or _default_client()
+    if chunked is None:
+        chunked = _upload_size(input_file, transcode, transcode_bitrate) > MAX_UPLOAD_BYTES
+    if chunked:
+        text = _long_file_text(
+            input_file,
+            language=language,
+            model=model,
+            response_format=response_format,
+            client=client,
+            max_chunk_seconds=max_chunk_seconds,
+            max_workers=max_workers,
+            **({"chunk_format": transcode, "chunk_bitrate": transcode_bitrate} if transcode else {}),
+            **kwargs,
+        )
+    else:
+        text = _request_text(input_file, client, model, language, response_format, transcode, transcode_bitrate, **kwargs)
+
+    if store is not None:
+        store.put(content_hash, "openai", model, [language or ""], response_format, text, options)
+    out_path.write_text(text)
+    return out_path
 
-    client = client or OpenAI()
-    request_kwargs = {
-        "model": model,
-        "file": open(input_file, "rb"),
-        "response_format": response_format,
-    }
+
+def _request_text(
+    input_file: Path,
+    client,
+    model: str,
+    language: Optional[str],
+    response_format: str,
+    transcode: Optional[str],
+    transcode_bitrate: Optional[str],
+    retries: int = DEFAULT_RETRIES,
+    **kwargs,
+) -> str:
+    """Send the whole file (or its transcode) in one request and return the text.
+
+    verbose_json responses are serialized like a one-chunk ``stitch_chunks`` result,
+    so segments and timestamps look the same whether or not the file was chunked.
+    """
+
+    def open_file():
+        if transcode:
+            from .transcode import TranscodeStream
+
+            return TranscodeStream(input_file, transcode, transcode_bitrate)
+        return open(input_file, "rb")
+
+    request_kwargs = {"model": model, "response_format": response_format}
     if language:
         request_kwargs["language"] = language
     request_kwargs.update(kwargs)
+    result = _create_with_retries(client, request_kwargs, retries, open_file=open_file)
+    payload = _result_payload(result, response_format)
+    if isinstance(payload, dict):
+        return stitch_chunks([payload], [0.0], response_format)
+    return payload
+
+
+def _default_client() -> OpenAI:
+    from openai import OpenAI
+
+    return OpenAI()
 
-    try:
-        result = client.audio.transcriptions.create(**request_kwargs)
-    finally:
-        request_kwargs["file"].close()
 
-    # For response_format="text" the SDK returns a plain string; otherwise expect .text
+def _upload_size(input_file: Path, transcode: Optional[str], bitrate: Optional[str]) -> float:
+    """Bytes that would be sent: the file size, or the transcoded size estimated from duration."""
+    if not transcode:
+        return input_file.stat().st_size
+    from .probe import probe
+    from .transcode import bitrate_bps
+
+    duration = probe(input_file).duration
+    if duration is None:
+        return input_file.stat().st_size
+    return duration * bitrate_bps(transcode, bitrate) / 8
+
+
+def _result_payload(result, response_format: str):
+    """Return the response as text, or as a dict for verbose_json."""
     if isinstance(result, str):
-        text = result
+        return result
+    if response_format == "verbose_json":
+        if isinstance(result, dict):
+            return result
+        return result.model_dump() if hasattr(result, "model_dump") else {"text": getattr(result, "text", str(result))}
+    return getattr(result, "text", str(result))
+
+
+#
+# Long-file mode
+#
+def plan_chunks(duration_ms: int, silences: Sequence[Tuple[int, int]], max_ms: int) -> List[Tuple[int, int]]:
+    """Split [0, duration_ms) into spans of at most ``max_ms``, cutting mid-silence where possible.
+
+    Spans lying entirely inside a silence are dropped (silence-only uploads tend to
+    come back as hallucinated text).
+    """
+    if max_ms <= 0:
+        raise ValueError("Chunk length must be greater than zero.")
+    cut_points = sorted((start + end) // 2 for start, end in silences)
+    chunks = []
+    start = 0
+    index = 0
+    while duration_ms - start > max_ms:
+        limit = start + max_ms
+        cut = None
+        while index < len(cut_points) and cut_points[index] <= limit:
+            if cut_points[index] > start:
+                cut = cut_points[index]
+            index += 1
+        cut = cut or limit
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, duration_ms))
+    return [
+        (start, end)
+        for start, end in chunks
+        if not any(quiet_start <= start and end <= quiet_end for quiet_start, quiet_end in silences)
+    ]
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if getattr(exc, "status_code", None) in _RETRY_STATUS:
+        return True
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError")
+
+
+def _create_with_retries(
+    client, request_kwargs: dict, retries: int, backoff: float = 1.0, open_file: Optional[Callable] = None
+):
+    """Call transcriptions.create, retrying transient errors.
+
+    Waits follow the server's Retry-After when given, else exponential backoff
+    with jitter. ``open_file`` supplies a fresh upload for every attempt (file
+    objects are consumed by a request) and is closed afterwards.
+    """
+    for attempt in range(retries + 1):
+        if open_file is not None:
+            request_kwargs["file"] = open_file()
+        try:
+            with span("network", "openai.audio.transcriptions.create", model=request_kwargs["model"]):
+                return client.audio.transcriptions.create(**request_kwargs)
+        except Exception as exc:
+            if attempt == retries or not _is_retryable(exc):
+                raise
+            delay = _retry_after(exc)
+            sleep(delay if delay is not None else backoff * 2**attempt + random.uniform(0, backoff))
+        finally:
+            if open_file is not None:
+                request_kwargs["file"].close()
+
+
+def _format_timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+_CUE_TIME = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})")
+
+
+def _shift_cues(text: str, offset: float, separator: str) -> str:
+    def shift(match):
+        h, m, s, ms = (int(g) for g in match.groups())
+        return _format_timestamp(h * 3600 + m * 60 + s + ms / 1000 + offset, separator)
+
+    return _CUE_TIME.sub(shift, text)
+
+
+def stitch_chunks(payloads: Sequence, offsets: Sequence[float], response_format: str) -> str:
+    """Join per-chunk responses in order, moving timestamps by each chunk's start offset."""
+    if response_format == "verbose_json":
+        segments = []
+        for payload, offset in zip(payloads, offsets):
+            for seg in payload.get("segments") or []:
+                seg = dict(seg, id=len(segments), start=seg["start"] + offset, end=seg["end"] + offset)
+                segments.append(seg)
+        text = "\n".join(payload.get("text", "").strip() for payload in payloads)
+        return json.dumps({"text": text, "segments": segments}, ensure_ascii=False, indent=2)
+    if response_format == "srt":
+        cues = []
+        for payload, offset in zip(payloads, offsets):
+            for block in payload.strip().split("\n\n"):
+                lines = block.strip().splitlines()
+                if len(lines) >= 2:
+                    cues.append("\n".join([str(len(cues) + 1), _shift_cues(lines[1], offset, ",")] + lines[2:]))
+        return "\n\n".join(cues) + "\n"
+    if response_format == "vtt":
+        bodies = [_shift_cues(re.sub(r"^WEBVTT[^\n]*\n+", "", p.strip()), o, ".") for p, o in zip(payloads, offsets)]
+        return "WEBVTT\n\n" + "\n\n".join(body for body in bodies if body) + "\n"
+    return "\n".join(payload.strip() for payload in payloads if payload.strip())
+
+
+def _chunk_extension(chunk_format: str) -> str:
+    from .transcode import CODECS
+
+    return CODECS[chunk_format][2] if chunk_format in CODECS else f".{chunk_format}"
+
+
+def _export_chunk(audio, chunk_format: str, bitrate: Optional[str] = None) -> bytes:
+    """Encode a chunk; "opus"/"mp3" use the speech-grade transcode settings."""
+    from .audio_io import export_segment
+    from .transcode import CODECS, DEFAULT_BITRATES
+
+    buf = io.BytesIO()
+    if chunk_format in CODECS:
+        encoder, container, _, extra = CODECS[chunk_format]
+        bitrate = bitrate or DEFAULT_BITRATES[chunk_format]
+        export_segment(audio, buf, format=container, codec=encoder, bitrate=bitrate, parameters=extra)
     else:
-        text = getattr(result, "text", str(result))
+        export_segment(audio, buf, format=chunk_format)
+    return buf.getvalue()
+
 
-    out_path = output_path or input_file.with_suffix(".txt")
+def _encode_chunks(
+    audio, spans: List[Tuple[int, int]], chunk_format: str, max_bytes: int, bitrate: Optional[str] = None
+):
+    """Yield (start_ms, payload) per span, halving spans whose encoding is still too big."""
+    pending = list(reversed(spans))
+    while pending:
+        start, end = pending.pop()
+        payload = _export_chunk(audio[start:end], chunk_format, bitrate)
+        if len(payload) > max_bytes and end - start > 1000:
+            middle = (start + end) // 2
+            pending.extend([(middle, end), (start, middle)])
+            continue
+        yield start, payload
+
+
+def transcribe_long_file(
+    input_file: Path,
+    *,
+    language: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+    response_format: str = DEFAULT_RESPONSE_FORMAT,
+    output_path: Optional[Path] = None,
+    client: Optional[OpenAI] = None,
+    max_chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    max_chunk_bytes: int = MAX_UPLOAD_BYTES,
+    max_workers: int = DEFAULT_CHUNK_WORKERS,
+    retries: int = DEFAULT_RETRIES,
+    chunk_format: str = "mp3",
+    chunk_bitrate: Optional[str] = None,
+    min_silence_len: int = 500,
+    silence_thresh: float = -40,
+    **kwargs,
+) -> Path:
+    """Transcribe a long file in silence-aligned chunks sent concurrently.
+
+    The audio is decoded once and downmixed to mono 16 kHz, split at silences
+    into chunks of at most ``max_chunk_seconds`` (and ``max_chunk_bytes`` once
+    encoded), and the chunk transcripts are stitched back in order. Timestamps
+    of ``verbose_json``/``srt``/``vtt`` responses are shifted to file time.
+
+    ``chunk_format`` is "mp3" or "opus" (speech-grade, see ``transcode``) or any
+    pydub export format such as "wav".
+    """
+    if not input_file.exists():
+        raise FileNotFoundError(input_file)
+    text = _long_file_text(
+        input_file,
+        language=language,
+        model=model,
+        response_format=response_format,
+        client=client or _default_client(),
+        max_chunk_seconds=max_chunk_seconds,
+        max_chunk_bytes=max_chunk_bytes,
+        max_workers=max_workers,
+        retries=retries,
+        chunk_format=chunk_format,
+        chunk_bitrate=chunk_bitrate,
+        min_silence_len=min_silence_len,
+        silence_thresh=silence_thresh,
+        **kwargs,
+    )
+    out_path = output_path or transcript_path(input_file)
     out_path.write_text(text)
     return out_path
+
+
+def _long_file_text(
+    input_file: Path,
+    *,
+    language: Optional[str],
+    model: str,
+    response_format: str,
+    client,
+    max_chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    max_chunk_bytes: int = MAX_UPLOAD_BYTES,
+    max_workers: int = DEFAULT_CHUNK_WORKERS,
+    retries: int = DEFAULT_RETRIES,
+    chunk_format: str = "mp3",
+    chunk_bitrate: Optional[str] = None,
+    min_silence_len: int = 500,
+    silence_thresh: float = -40,
+    **kwargs,
+) -> str:
+    from pydub.silence import detect_silence
+
+    from .audio_io import load_segment
+
+    audio = load_segment(input_file).set_channels(1).set_frame_rate(CHUNK_FRAME_RATE)
+    with span("process", "detect_silence") as sp:
+        sp.audio_seconds = audio.duration_seconds
+        silences = detect_silence(audio, min_silence_len=min_silence_len, silence_thresh=silence_thresh, seek_step=10)
+    spans = plan_chunks(len(audio), silences, int(max_chunk_seconds * 1000))
+
+    def transcribe_span(chunk_span):
+        results = []
+        for start_ms, payload in _encode_chunks(audio, [chunk_span], chunk_format, max_chunk_bytes, chunk_bitrate):
+            request_kwargs = {
+                "model": model,
+                "file": (f"{input_file.stem}-{start_ms:09d}{_chunk_extension(chunk_format)}", payload),
+                "response_format": response_format,
+            }
+            if language:
+                request_kwargs["language"] = language
+            request_kwargs.update(kwargs)
+            result = _create_with_retries(client, request_kwargs, retries)
+            results.append((start_ms / 1000, _result_payload(result, response_format)))
+        return results
+
+    # Each worker encodes and sends its own chunk; map() keeps the results in order.
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = [item for chunk in pool.map(transcribe_span, spans) for item in chunk]
+
+    offsets = [offset for offset, _ in results]
+    return stitch_chunks([payload for _, payload in results], offsets, response_format)
+
+
+#
+# Directory mode
+#
+def expand_inputs(patterns: Iterable[str]) -> List[Path]:
+    """Resolve files, directories (their audio files) and glob patterns, without duplicates."""
+    found = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if any(char in pattern for char in "*?["):
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+        elif path.is_dir():
+            matches = sorted(p for p in path.iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS)
+        elif path.exists():
+            matches = [path]
+        else:
+            raise FileNotFoundError(pattern)
+        for match in matches:
+            if match.is_file():
+                found.setdefault(match, None)
+    return list(found)
+
+
+def transcript_path(input_file: Path, output_dir: Optional[Path] = None) -> Path:
+    """``<input name>.txt`` next to the input (or in ``output_dir``); a.mp3 and a.wav get separate files."""
+    return (output_dir or input_file.parent) / (input_file.name + ".txt")
+
+
+def transcribe_files(
+    input_files: Iterable[Path],
+    *,
+    output_dir: Optional[Path] = None,
+    client: Optional[OpenAI] = None,
+    max_workers: int = DEFAULT_FILE_WORKERS,
+    chunk_workers: int = DEFAULT_CHUNK_WORKERS,
+    force: bool = False,
+    **kwargs,
+) -> Iterator[Tuple[Path, Optional[Path]]]:
+    """Transcribe many files through one client with bounded concurrency.
+
+    Yields (input, transcript path) as files finish, and (input, None) for files
+    whose ``.txt`` is already newer than the audio (unless ``force``). Other
+    keyword arguments go to ``transcribe_file`` (``chunk_workers`` as its
+    ``max_workers``). Failures do not stop the run;
+    they are raised together in a RuntimeError at the end. Inputs that would
+    share a transcript path (same-named files from different directories with
+    one ``output_dir``) raise ValueError before anything is sent.
+    """
+    input_files = list(input_files)
+    outputs: Dict[Path, List[Path]] = {}
+    for path in input_files:
+        outputs.setdefault(transcript_path(path, output_dir), []).append(path)
+    clashes = [" and ".join(map(str, paths)) + f" -> {out}" for out, paths in outputs.items() if len(paths) > 1]
+    if clashes:
+        raise ValueError("Inputs would overwrite each other's transcript:\n" + "\n".join(clashes))
+
+    client = client or _default_client()
+    todo = []
+    for path in input_files:
+        out_path = transcript_path(path, output_dir)
+        if not force and out_path.exists() and out_path.stat().st_mtime >= path.stat().st_mtime:
+            yield path, None
+        else:
+            todo.append((path, out_path))
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(
+                transcribe_file, path, output_path=out_path, client=client, max_workers=chunk_workers, **kwargs
+            ): path
+            for path, out_path in todo
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as exc:  # noqa: BLE001 - reported once the other files are done
+                failures.append(f"{futures[future]}: {exc}")
+    if failures:
+        raise RuntimeError("Transcription failed:\n" + "\n".join(failures))
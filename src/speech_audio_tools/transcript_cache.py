@@ -0,0 +1,170 @@
+"""Persistent cache of finished transcripts keyed by audio content.
+
+Entries are keyed by (content hash, provider, model, languages, response format,
+request options), so re-transcribing the same audio returns instantly. Local
+files are identified by SHA-256 (memoised by path, size and mtime so unchanged
+files are hashed once); S3 objects by their ETag. The store is trimmed to
+``max_bytes`` by evicting the least recently used entries.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from .cache import cache_path
+from .profiling import span
+
+DB_FILENAME = "transcripts.sqlite3"
+MAX_BYTES_ENV = "SAT_TRANSCRIPT_CACHE_MB"
+DEFAULT_MAX_MB = 256
+_READ_SIZE = 1024 * 1024
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS transcripts (
+        key TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        provider TEXT NOT NULL,
+        model TEXT NOT NULL,
+        languages TEXT NOT NULL,
+        response_format TEXT NOT NULL,
+        transcript TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        accessed REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS transcripts_accessed ON transcripts (accessed)",
+    """
+    CREATE TABLE IF NOT EXISTS digests (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        sha256 TEXT NOT NULL
+    )
+    """,
+)
+
+
+def _max_bytes_from_env() -> int:
+    return int(float(os.environ.get(MAX_BYTES_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+def options_key(**options) -> str:
+    """Canonical text for request options that change the transcript (prompt, transcode, ...)."""
+    return json.dumps({k: v for k, v in options.items() if v is not None}, sort_keys=True, default=str)
+
+
+class TranscriptCache:
+    """SQLite store of transcripts with least-recently-used eviction by total size."""
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.db_path = db_path or cache_path(DB_FILENAME)
+        self.max_bytes = _max_bytes_from_env() if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def key(
+        content_hash: str,
+        provider: str,
+        model: str,
+        languages: Iterable[str] = (),
+        response_format: str = "text",
+        options: str = "",
+    ) -> str:
+        langs = ",".join(sorted(lang for lang in languages if lang))
+        raw = "\0".join([content_hash, provider, model, langs, response_format, options])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(
+        self,
+        content_hash: str,
+        provider: str,
+        model: str,
+        languages: Iterable[str] = (),
+        response_format: str = "text",
+        options: str = "",
+    ) -> Optional[str]:
+        key = self.key(content_hash, provider, model, languages, response_format, options)
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT transcript FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE transcripts SET accessed = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(
+        self,
+        content_hash: str,
+        provider: str,
+        model: str,
+        languages: Iterable[str],
+        response_format: str,
+        transcript: str,
+        options: str = "",
+    ) -> None:
+        languages = sorted(lang for lang in languages if lang)
+        key = self.key(content_hash, provider, model, languages, response_format, options)
+        size = len(transcript.encode())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, content_hash, provider, model, ",".join(languages), response_format, transcript, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM transcripts ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM transcripts WHERE key = ?", victims)
+
+    def file_digest(self, path) -> str:
+        """SHA-256 of a file's content, reused while its size and mtime are unchanged."""
+        real = os.path.realpath(path)
+        st = os.stat(real)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256 FROM digests WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (real, st.st_size, st.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0]
+        digest = hashlib.sha256()
+        with span("hash", "sha256", path=real), open(real, "rb") as f:
+            for block in iter(lambda: f.read(_READ_SIZE), b""):
+                digest.update(block)
+        value = digest.hexdigest()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)", (real, st.st_size, st.st_mtime_ns, value)
+            )
+        return value
+
+
+_default_caches: Dict[str, TranscriptCache] = {}
+
+
+def default_cache() -> TranscriptCache:
+    """Return the shared cache for the current cache directory."""
+    path = cache_path(DB_FILENAME)
+    if path not in _default_caches:
+        _default_caches[path] = TranscriptCache(path)
+    return _default_caches[path]
@@ -1,13 +1,14 @@
 import os
-from pydub import AudioSegment
 
+from .audio_io import export_buffer, load_buffer
 
-def clip_audio(input_file, output_file, offset, tail_offset):
+
+def clip_audio(input_file, output_file, offset, tail_offset, mmap=False):
     """Clip an audio file by removing parts from the beginning and end."""
-    audio = AudioSegment.from_file(input_file)
+    audio = load_buffer(input_file, mmap=mmap)
     if offset > 0:
         audio = audio[offset:]
     if tail_offset > 0:
         audio = audio[:-tail_offset]
-    audio.export(output_file, format="mp3")
+    export_buffer(audio, output_file, format="mp3")
 
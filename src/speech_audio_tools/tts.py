@@ -1,10 +1,16 @@
 import boto3
+from botocore.config import Config
 from openai import OpenAI
 import os
 import random
 import io
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
-from pydub import AudioSegment
+
+from .audio_io import export_buffer, load_segment
+from .buffer import AudioBuffer, concatenate
+from .profiling import span
+from .ratelimit import get_limiter
 
 POLLY_MAX_CHARS = 1000  # Max characters per chunk for Amazon Polly
 
@@ -35,9 +41,11 @@ def _split_text_into_chunks(text, max_chars):
 class AmazonPollyEngine(object):
     EXCLUDE_VOICES = ("Ivy", "Justin", "Kevin", "Matthew")
 
-    def __init__(self, engine="neural"):
-        self.polly = boto3.client("polly")
+    def __init__(self, engine="neural", client=None, limiter=None):
+        # botocore's own retries would hide throttling from the limiter, which retries instead
+        self.polly = client or boto3.client("polly", config=Config(retries={"mode": "standard", "max_attempts": 1}))
         self.engine = engine
+        self.limiter = limiter or get_limiter("polly")
 
     def text_to_audio(self, text, lang, voice, speed=None):
         if speed:
@@ -46,17 +54,22 @@ class AmazonPollyEngine(object):
             text_type = "ssml"
         else:
             text_type = "text"
-        resp = self.polly.synthesize_speech(
-            Engine=self.engine,
-            LanguageCode=lang,
-            OutputFormat="mp3",
-            Text=text,
-            TextType=text_type,
-            VoiceId=voice,
-        )
-        with closing(resp["AudioStream"]) as stream:
-            audio_content = stream.read()
-        return AudioSegment.from_file(io.BytesIO(audio_content), format="mp3")
+
+        def request():
+            with span("network", "polly.synthesize_speech", chars=len(text)):
+                resp = self.polly.synthesize_speech(
+                    Engine=self.engine,
+                    LanguageCode=lang,
+                    OutputFormat="mp3",
+                    Text=text,
+                    TextType=text_type,
+                    VoiceId=voice,
+                )
+                with closing(resp["AudioStream"]) as stream:
+                    return stream.read()
+
+        audio_content = self.limiter.call(request, chars=len(text))
+        return load_segment(io.BytesIO(audio_content), format="mp3")
 
     def get_speakers(self, lang):
         resp = self.polly.describe_voices(Engine=self.engine, LanguageCode=lang)
@@ -81,9 +94,10 @@ class AmazonPollyEngine(object):
 
 
 class OpenAISpeechEngine(object):
-    def __init__(self, engine="tts-1"):
+    def __init__(self, engine="tts-1", client=None, limiter=None):
         self.engine = engine
-        self.openai = OpenAI()
+        self.openai = client or OpenAI(max_retries=0)  # retried by the limiter
+        self.limiter = limiter or get_limiter("openai")
 
     def text_to_audio(self, text, lang, voice, speed=None):
         if speed and isinstance(speed, str):
@@ -91,16 +105,20 @@ class OpenAISpeechEngine(object):
                 speed = float(speed)
             except ValueError:
                 speed = None
-        response = self.openai.audio.speech.create(
-            model=self.engine,
-            input=text,
-            voice=voice,
-            response_format="mp3",
-            speed=speed or 1.0,
-        )
 
+        def request():
+            with span("network", "openai.audio.speech.create", chars=len(text)):
+                return self.openai.audio.speech.create(
+                    model=self.engine,
+                    input=text,
+                    voice=voice,
+                    response_format="mp3",
+                    speed=speed or 1.0,
+                )
+
+        response = self.limiter.call(request, chars=len(text))
         audio_content = io.BytesIO(response.content)
-        return AudioSegment.from_file(audio_content, format="mp3")
+        return load_segment(audio_content, format="mp3")
 
     def get_speakers(self, lang):
         return [
@@ -148,18 +166,23 @@ class SimpleTTS(object):
 
         text_chunks = _split_text_into_chunks(text, POLLY_MAX_CHARS) or [text]
 
-        combined_audio = AudioSegment.empty()
-        for i, chunk in enumerate(text_chunks):
+        def synthesize(numbered_chunk):
+            i, chunk = numbered_chunk
             print(
                 f"Synthesizing chunk {i+1}/{len(text_chunks)} for '{os.path.basename(output_filename)}'"
             )
-            audio_segment = self.engine.text_to_audio(chunk, self.lang, self.speaker, speed)
-            combined_audio += audio_segment
+            return AudioBuffer.from_segment(self.engine.text_to_audio(chunk, self.lang, self.speaker, speed))
 
-        if gain != 0.0:
-            combined_audio = combined_audio.apply_gain(gain)
+        # chunks are requested concurrently; the engine's limiter decides how many run at once
+        workers = min(len(text_chunks), self.engine.limiter.max_concurrency)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunk_audio = list(pool.map(synthesize, enumerate(text_chunks)))
+        else:
+            chunk_audio = [synthesize(numbered) for numbered in enumerate(text_chunks)]
 
-        combined_audio.export(output_filename, format="mp3")
+        combined_audio = concatenate(chunk_audio).apply_gain_inplace(gain)
+        export_buffer(combined_audio, output_filename, format="mp3")
         return output_filename
 
 def list_speakers(lang, engine):
@@ -175,4 +198,5 @@ def synthesize_speech(lang, speaker, input_file, output_file, engine=None, speed
             if line.strip().startswith("#"):
                 continue
             text += line
-    SimpleTTS(lang, speaker, engine or "neural").make_audio_file(text, output_file, speed, gain)
+    tts = SimpleTTS(lang, speaker, engine or "neural")
+    tts.make_audio_file(text, output_file, speed, gain)
@@ -0,0 +1,127 @@
+"""Report debounced batches of changed files in a directory.
+
+Uses Linux inotify through ctypes when available and falls back to polling
+directory snapshots (size and mtime) elsewhere.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_MODIFY
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyWatcher:
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.directory = directory
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            start = offset + _EVENT_HEADER.size
+            name = data[start : start + length].rstrip(b"\0")
+            if name:
+                changed.add(os.path.join(self.directory, os.fsdecode(name)))
+            offset = start + length
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _PollingWatcher:
+    def __init__(self, directory: str, stop: Optional[threading.Event] = None):
+        self.directory = directory
+        self.stop = stop or threading.Event()
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        self.stop.wait(timeout)
+        current = self._scan()
+        previous, self.snapshot = self.snapshot, current
+        return {path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)}
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(directory, stop: Optional[threading.Event] = None, force_polling: bool = False):
+    """Return an inotify watcher on Linux (polling if unavailable or ``force_polling``)."""
+    directory = os.fspath(directory)
+    if sys.platform.startswith("linux") and not force_polling:
+        try:
+            return _InotifyWatcher(directory)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return _PollingWatcher(directory, stop)
+
+
+def watch_changes(
+    directory,
+    *,
+    debounce: float = 1.0,
+    poll_interval: float = 1.0,
+    stop: Optional[threading.Event] = None,
+    force_polling: bool = False,
+) -> Iterator[Set[str]]:
+    """Yield sets of changed paths in ``directory``, once changes settle for ``debounce`` seconds.
+
+    Runs until ``stop`` is set (checked every ``poll_interval`` seconds) or the
+    consumer stops iterating.
+    """
+    stop = stop or threading.Event()
+    watcher = open_watcher(directory, stop, force_polling)
+    try:
+        while not stop.is_set():
+            changed = watcher.wait(poll_interval)
+            if not changed:
+                continue
+            while not stop.is_set():
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            yield changed
+    finally:
+        watcher.close()
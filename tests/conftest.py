@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path, monkeypatch):
+    # Keep persistent stores (probe cache etc.) out of the real user cache.
+    monkeypatch.setenv("SAT_CACHE_DIR", str(tmp_path / "sat-cache"))
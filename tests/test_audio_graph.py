@@ -0,0 +1,78 @@
+import json
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from speech_audio_tools import audio_graph
+from speech_audio_tools.audio_graph import join, load, load_recipe, render_many
+from speech_audio_tools.beep import make_beep
+from speech_audio_tools.probe import probe
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+@pytest.fixture
+def clips(tmp_path: Path):
+    a = make_beep(str(tmp_path / "a.mp3"), duration=3.0)
+    b = make_beep(str(tmp_path / "b.mp3"), frequency=440, duration=2.0)
+    return a, b
+
+
+def _counting_loads():
+    return mock.patch.object(audio_graph, "load_segment", side_effect=audio_graph.load_segment)
+
+
+def test_render_decodes_each_input_once(tmp_path: Path, clips):
+    a, b = clips
+    source = load(a)
+    graph = join([source.clip(500, 500).speed(1.25), load(b).gain(-3), source], silence=300)
+    with _counting_loads() as loads:
+        render_many([(graph, tmp_path / "one.mp3", {}), (source.gain(2), tmp_path / "two.mp3", {})])
+    assert sorted(call.args[0] for call in loads.call_args_list) == sorted([a, b])
+    # 2.0 s / 1.25 + 0.3 + 2.0 + 0.3 + 3.0 + 0.3
+    assert probe(tmp_path / "one.mp3").duration == pytest.approx(7.5, abs=0.15)
+    assert probe(tmp_path / "two.mp3").duration == pytest.approx(3.0, abs=0.1)
+
+
+def test_preview_decodes_only_what_it_needs(tmp_path: Path, clips):
+    a, b = clips
+    graph = join([load(a).clip(offset=1000), load(b)], silence=300)
+    with _counting_loads() as loads:
+        graph.render(tmp_path / "preview.mp3", preview=1.0)
+    assert [call.args[0] for call in loads.call_args_list] == [a]
+    assert loads.call_args.kwargs == {"start_second": 1.0, "duration": 1.0}
+    assert probe(tmp_path / "preview.mp3").duration == pytest.approx(1.0, abs=0.1)
+
+
+def test_preview_spans_join_boundaries(tmp_path: Path, clips):
+    a, b = clips
+    graph = join([load(a), load(b)], silence=500)
+    assert graph.render(tmp_path / "p.mp3", preview=4.0) == str(tmp_path / "p.mp3")
+    assert probe(tmp_path / "p.mp3").duration == pytest.approx(4.0, abs=0.1)
+
+
+def test_load_recipe(tmp_path: Path, clips):
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(
+        json.dumps(
+            {
+                "inputs": {"talk": "a.mp3"},
+                "outputs": [
+                    {
+                        "output": "out.mp3",
+                        "tags": {"title": "T"},
+                        "graph": {"join": ["b.mp3", {"speed": {"clip": "talk", "offset": 500}, "factor": 2}]},
+                    }
+                ],
+            }
+        )
+    )
+    [(node, output, export_kwargs)] = load_recipe(recipe)
+    assert output == str(tmp_path / "out.mp3") and export_kwargs == {"tags": {"title": "T"}}
+    assert node.duration_ms() == pytest.approx(2000 + 1250, abs=100)
+
+    recipe.write_text(json.dumps({"outputs": [{"output": "x.mp3", "graph": {"clip": "a.mp3", "gain": "b.mp3"}}]}))
+    with pytest.raises(ValueError, match="exactly one"):
+        load_recipe(recipe)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from speech_audio_tools.buffer import AudioBuffer, concatenate
+
+
+def _tone(seconds: float, frame_rate: int = 16000, channels: int = 1, amplitude: int = 8000) -> AudioSegment:
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    pcm = (np.sin(2 * np.pi * 220.0 * t) * amplitude * (t % 1.0 > 0.3)).astype(np.int16)
+    pcm = np.repeat(pcm[:, None], channels, axis=1)
+    return AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels)
+
+
+def test_from_segment_shares_memory_and_slices_are_views():
+    seg = _tone(2.0)
+    buf = AudioBuffer.from_segment(seg)
+    assert len(buf) == len(seg) and buf.channels == 1 and buf.sample_width == 2
+    part = buf[500:-500]
+    assert np.shares_memory(part.samples, buf.samples)
+    assert len(part) == 1000
+    assert part.to_segment().raw_data == seg[500:1500].raw_data
+
+
+def test_apply_gain_matches_pydub():
+    seg = _tone(1.5, amplitude=20000)
+    buf = AudioBuffer.from_segment(seg)
+    for db in (-6.0, 4.5):
+        assert buf.apply_gain(db).to_segment().raw_data == seg.apply_gain(db).raw_data
+    assert buf.apply_gain(0.0) is buf
+    with pytest.raises(ValueError):
+        buf.apply_gain_inplace(-3.0)
+    owned = concatenate([buf])
+    assert owned.apply_gain_inplace(-3.0) is owned
+    assert owned.to_segment().raw_data == seg.apply_gain(-3.0).raw_data
+
+
+def test_apply_gain_leaves_the_parent_of_a_slice_alone():
+    seg = _tone(1.5, amplitude=20000)
+    whole = AudioBuffer.from_segment(seg).writable()
+    louder = whole[500:1000].apply_gain(-6.0)
+    assert not np.shares_memory(louder.samples, whole.samples)
+    assert whole.to_segment().raw_data == seg.raw_data
+
+
+def test_concatenate_converts_formats_like_pydub():
+    mono = _tone(1.0, frame_rate=16000)
+    stereo = _tone(0.5, frame_rate=22050, channels=2)
+    expected = mono + AudioSegment.silent(duration=250) + stereo
+    result = concatenate([AudioBuffer.from_segment(mono), 250, AudioBuffer.from_segment(stereo)])
+    assert (result.frame_rate, result.channels, result.sample_width) == (22050, 2, 2)
+    assert len(result) == pytest.approx(len(expected), abs=1)
+    with pytest.raises(ValueError):
+        concatenate([100])
+
+
+def test_window_dbfs_matches_segment_loop():
+    seg = _tone(3.2)
+    expected = []
+    for start in range(0, len(seg), 1000):
+        window = np.array(seg[start : start + 1000].get_array_of_samples(), dtype=np.float64) / 32768
+        window = window[window != 0]
+        expected.append(20 * np.log10(np.sqrt(np.mean(window**2))) if len(window) else -60.0)
+    assert AudioBuffer.from_segment(seg).window_dbfs(1000) == pytest.approx(expected, abs=1e-6)
+    assert AudioBuffer.silent(1500).window_dbfs(1000).tolist() == [-60.0, -60.0]
@@ -0,0 +1,57 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from speech_audio_tools import encoders
+from speech_audio_tools.audio_io import export_segment
+from speech_audio_tools.beep import make_beep
+from speech_audio_tools.encoders import PROFILE_ENV, active_profile, container_for, get_profile, set_profile
+from speech_audio_tools.filtergraph import build_section_command
+from speech_audio_tools.probe import run_ffprobe
+
+
+@pytest.fixture(autouse=True)
+def _reset_profile(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    yield
+    set_profile(None)
+
+
+def test_profile_selection_order(monkeypatch):
+    assert active_profile().name == "default"
+    monkeypatch.setenv(PROFILE_ENV, "mp3-v5")
+    assert active_profile().name == "mp3-v5"
+    set_profile("mp3-fast")
+    assert active_profile().name == "mp3-fast"
+    assert active_profile("opus").name == "opus"
+    with pytest.raises(ValueError, match="Unknown encoder profile"):
+        set_profile("flac-max")
+
+
+def test_profiles_only_target_their_containers():
+    assert get_profile("mp3-v2").export_kwargs("mp3") == {"codec": "libmp3lame", "parameters": ["-q:a", "2"]}
+    assert get_profile("mp3-v2").export_kwargs("wav") == {}
+    assert get_profile("opus").ffmpeg_args("mp3") == []
+    assert get_profile("aac").ffmpeg_args(container_for("x.m4a")) == ["-c:a", "aac", "-b:a", "128k"]
+    assert get_profile("default").ffmpeg_args("mp3") == []
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_export_uses_active_profile(tmp_path: Path):
+    beep = make_beep(str(tmp_path / "beep.mp3"), duration=2.0)
+    from speech_audio_tools.audio_io import load_segment
+
+    seg = load_segment(beep)
+    set_profile("mp3-cbr128")
+    export_segment(seg, tmp_path / "cbr.mp3")
+    export_segment(seg, tmp_path / "explicit.mp3", bitrate="32k")
+    assert run_ffprobe(str(tmp_path / "cbr.mp3")).bitrate == pytest.approx(128000, rel=0.05)
+    assert run_ffprobe(str(tmp_path / "explicit.mp3")).bitrate == pytest.approx(32000, rel=0.05)
+
+    cmd = build_section_command([(beep, beep)], str(tmp_path / "section.mp3"))
+    assert cmd[cmd.index("-c:a") : cmd.index("-c:a") + 4] == ["-c:a", "libmp3lame", "-b:a", "128k"]
+    set_profile(None)
+    cmd = build_section_command([(beep, beep)], str(tmp_path / "section.mp3"))
+    assert cmd[cmd.index("-c:a") + 1] == "libmp3lame"
+    assert encoders.active_profile().name == "default"
@@ -0,0 +1,69 @@
+import math
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+
+from speech_audio_tools import loudness
+from speech_audio_tools.audio import make_section_mp3_files
+from speech_audio_tools.audio_io import load_buffer
+from speech_audio_tools.buffer import AudioBuffer
+from speech_audio_tools.loudness import Loudness, LoudnessCache, integrated_loudness
+
+
+def _sine(level_dbfs: float, seconds: float = 2.0, frame_rate: int = 44100, channels: int = 2) -> AudioBuffer:
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    pcm = (np.sin(2 * np.pi * 997.0 * t) * 10 ** (level_dbfs / 20) * 32767).astype(np.int16)
+    return AudioBuffer(np.repeat(pcm[:, None], channels, axis=1), frame_rate)
+
+
+def test_integrated_loudness_calibration_and_gating():
+    # BS.1770: a 997 Hz sine at -23 dBFS in both channels reads -23 LUFS; mono is 3 dB lower
+    assert integrated_loudness(_sine(-23.0)) == pytest.approx(-23.0, abs=0.1)
+    assert integrated_loudness(_sine(-23.0, frame_rate=16000, channels=1)) == pytest.approx(-26.0, abs=0.1)
+    with_silence = AudioBuffer(np.concatenate([_sine(-23.0).samples, np.zeros((88200, 2), np.int16)]), 44100)
+    assert integrated_loudness(with_silence) == pytest.approx(-23.0, abs=0.5)  # ungated: -26
+    assert integrated_loudness(AudioBuffer.silent(1000)) == float("-inf")
+    assert integrated_loudness(_sine(-23.0, seconds=0.2)) == pytest.approx(-23.0, abs=0.2)
+
+
+def test_gain_to_respects_peak_ceiling():
+    assert Loudness(-30.0, -20.0).gain_to(-16.0) == pytest.approx(14.0)
+    assert Loudness(-30.0, -5.0).gain_to(-16.0) == pytest.approx(4.0)
+    assert Loudness(-10.0, -0.1).gain_to(-16.0) == pytest.approx(-6.0)
+    assert Loudness(float("-inf"), float("-inf")).gain_to(-16.0) == 0.0
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_cache_measures_each_file_once(tmp_path: Path):
+    clip = tmp_path / "clip.wav"
+    _sine(-20.0).to_segment().export(clip, format="wav")
+    silent = tmp_path / "silent.wav"
+    AudioSegment.silent(duration=500).export(silent, format="wav")
+    cache = LoudnessCache(str(tmp_path / "loudness.sqlite3"))
+    with mock.patch.object(loudness, "measure", side_effect=loudness.measure) as measure:
+        first = cache.get(clip)
+        assert cache.get(clip) == first
+        assert cache.get(silent) == cache.get(silent) == Loudness(float("-inf"), float("-inf"))
+    assert measure.call_count == 2
+    assert first.lufs == pytest.approx(-20.0, abs=0.1)
+    assert first.peak_dbfs == pytest.approx(-20.0, abs=0.01)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+@pytest.mark.parametrize("backend", ["pydub", "ffmpeg"])
+def test_combine_normalizes_each_clip(tmp_path: Path, backend):
+    raw, out = tmp_path / "raw", tmp_path / "out"
+    raw.mkdir()
+    out.mkdir()
+    _sine(-32.0, seconds=1.5).to_segment().export(raw / "001-Q-quiet.mp3", format="mp3")
+    _sine(-12.0, seconds=1.5).to_segment().export(raw / "001-A-loud.mp3", format="mp3")
+    make_section_mp3_files(str(raw), str(out), repeat_question=False, backend=backend, normalize=-20.0)
+    section = load_buffer(out / "001-001.mp3")
+    # Q (0-1.5 s), 0.5 s pause, A (2.0-3.5 s); measure inside each clip
+    for start, end in ((200, 1300), (2200, 3300)):
+        level = integrated_loudness(section[start:end])
+        assert math.isfinite(level) and level == pytest.approx(-20.0, abs=0.5)
@@ -0,0 +1,73 @@
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+from pydub import AudioSegment
+from pydub import silence as pydub_silence
+
+from speech_audio_tools import pcm_cache
+from speech_audio_tools.audio_io import load_segment
+from speech_audio_tools.buffer import AudioBuffer
+from speech_audio_tools.pcm_cache import PCM_CACHE_ENV, open_pcm
+from speech_audio_tools.silence import detect_silence, split_on_silence
+
+
+def _speech_like(seconds: float, frame_rate: int = 44100, channels: int = 2) -> AudioSegment:
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    pauses = (t % 2.3 < 1.4) | ((t > 4.0) & (t < 4.05))
+    noise = np.random.default_rng(1).normal(scale=40, size=t.size)
+    pcm = (np.sin(2 * np.pi * 200.0 * t) * 9000 * pauses + noise).astype(np.int16)
+    pcm = np.repeat(pcm[:, None], channels, axis=1)
+    return AudioSegment(pcm.tobytes(), frame_rate=frame_rate, sample_width=2, channels=channels)
+
+
+@pytest.mark.parametrize("frame_rate,channels", [(44100, 2), (16000, 1)])
+def test_silence_detection_matches_pydub(frame_rate, channels):
+    seg = _speech_like(7.3, frame_rate, channels)
+    buf = AudioBuffer.from_segment(seg)
+    for min_silence_len, thresh in ((300, -40), (800, -20), (50, -60)):
+        assert detect_silence(buf, min_silence_len, thresh) == pydub_silence.detect_silence(seg, min_silence_len, thresh)
+    expected = pydub_silence.split_on_silence(seg, min_silence_len=300, silence_thresh=-40, keep_silence=True)
+    chunks = split_on_silence(buf, min_silence_len=300, silence_thresh=-40, keep_silence=True)
+    assert [c.to_segment().raw_data for c in chunks] == [e.raw_data for e in expected]
+    assert all(np.shares_memory(c.samples, buf.samples) for c in chunks)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_open_pcm_decodes_once_and_maps(tmp_path: Path, monkeypatch):
+    source = tmp_path / "talk.mp3"
+    _speech_like(3.0).export(source, format="mp3")
+    with mock.patch.object(pcm_cache, "_decode", side_effect=pcm_cache._decode) as decode:
+        first = open_pcm(source)
+        second = open_pcm(source)
+    assert decode.call_count == 1
+    assert isinstance(first.samples, np.memmap)
+    assert not first.samples.flags.writeable
+    assert np.array_equal(first.samples, second.samples)
+    assert first.to_segment().raw_data == load_segment(source).raw_data
+    assert first[1000:2000].apply_gain(-6).frame_count == second[1000:2000].frame_count
+
+    other = tmp_path / "other.mp3"
+    _speech_like(1.0).export(other, format="mp3")
+    monkeypatch.setenv(PCM_CACHE_ENV, "0.1")
+    open_pcm(other)
+    assert [p.name for p in (tmp_path / "sat-cache" / "pcm").glob("*.s16le")] == [
+        pcm_cache._cache_name(str(other), 44100, 2)
+    ]
+
+    monkeypatch.setenv(PCM_CACHE_ENV, "0")
+    assert len(open_pcm(source)) == len(first)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_open_pcm_keeps_24_bit_precision(tmp_path: Path):
+    source = tmp_path / "hires.wav"
+    pcm = (np.arange(4800, dtype=np.int32) * 1000 - 2_400_000) << 8  # 24-bit values in 32-bit samples
+    AudioSegment(pcm.tobytes(), frame_rate=48000, sample_width=4, channels=1).export(
+        source, format="wav", parameters=["-c:a", "pcm_s24le"]
+    )
+    buf = open_pcm(source)
+    assert buf.sample_width == 4
+    assert np.array_equal(buf.samples[:, 0], pcm)
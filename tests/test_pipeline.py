@@ -0,0 +1,142 @@
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from speech_audio_tools import pipeline
+from speech_audio_tools.beep import make_beep
+from speech_audio_tools.pipeline import BUILT, STALE, STALE_UPSTREAM, UP_TO_DATE, Pipeline
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def _write_recipe(tmp_path: Path, steps) -> Path:
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(json.dumps({"steps": steps}))
+    return recipe
+
+
+def _qa_recipe(tmp_path: Path) -> Path:
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    for number in (1, 2):
+        make_beep(str(raw / f"{number:03d}-Q-test.mp3"), duration=0.2)
+        make_beep(str(raw / f"{number:03d}-A-test.mp3"), frequency=440, duration=0.3)
+    return _write_recipe(
+        tmp_path,
+        [
+            {"id": "album", "type": "tag-album", "input": "fast", "output": "album", "album": "Drill"},
+            {"id": "fast", "type": "speed", "input": "sections", "output": "fast", "speed": 1.25},
+            {"id": "sections", "type": "combine", "input": "raw", "output": "sections", "section_unit": 1},
+        ],
+    )
+
+
+def test_build_runs_in_dependency_order_and_skips_unchanged(tmp_path: Path):
+    recipe = _qa_recipe(tmp_path)
+    built = [(step.id, status) for step, status in Pipeline.load(recipe).run()]
+    assert built == [("sections", BUILT), ("fast", BUILT), ("album", BUILT)]
+    assert sorted(p.name for p in (tmp_path / "album").glob("*.mp3")) == ["001-001.mp3", "002-002.mp3"]
+
+    again = Pipeline.load(recipe)
+    assert [status for _, status in again.plan()] == [UP_TO_DATE] * 3
+    assert [status for _, status in again.run()] == [UP_TO_DATE] * 3
+
+    make_beep(str(tmp_path / "raw" / "002-A-test.mp3"), frequency=660, duration=0.4)
+    assert [status for _, status in Pipeline.load(recipe).plan()] == [STALE, STALE_UPSTREAM, STALE_UPSTREAM]
+
+
+def test_options_change_rebuilds_only_that_step_and_below(tmp_path: Path):
+    recipe = _qa_recipe(tmp_path)
+    list(Pipeline.load(recipe).run())
+    steps = json.loads(recipe.read_text())["steps"]
+    steps[0]["artist"] = "Someone"
+    recipe.write_text(json.dumps({"steps": steps}))
+    statuses = {step.id: status for step, status in Pipeline.load(recipe).run()}
+    assert statuses == {"sections": UP_TO_DATE, "fast": UP_TO_DATE, "album": BUILT}
+
+
+def test_renamed_section_does_not_linger_downstream(tmp_path: Path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    for number in (1, 2):
+        make_beep(str(raw / f"{number:03d}-Q-test.mp3"), duration=0.2)
+        make_beep(str(raw / f"{number:03d}-A-test.mp3"), frequency=440, duration=0.3)
+    recipe = _write_recipe(
+        tmp_path,
+        [
+            {"id": "sections", "type": "combine", "input": "raw", "output": "sections"},
+            {"id": "fast", "type": "speed", "input": "sections", "output": "fast", "speed": 1.25},
+            {"id": "numbered", "type": "add-number", "input": "fast", "output": "numbered"},
+            {"id": "album", "type": "tag-album", "input": "numbered", "output": "album", "album": "Drill"},
+        ],
+    )
+    list(Pipeline.load(recipe).run())
+    assert [p.name for p in (tmp_path / "album").glob("*.mp3")] == ["001-002.mp3"]
+
+    # a third pair renames the section 001-002.mp3 -> 001-003.mp3
+    make_beep(str(raw / "003-Q-test.mp3"), duration=0.2)
+    make_beep(str(raw / "003-A-test.mp3"), frequency=440, duration=0.3)
+    list(Pipeline.load(recipe).run())
+    for directory in ("sections", "fast", "numbered", "album"):
+        assert [p.name for p in (tmp_path / directory).glob("*.mp3")] == ["001-003.mp3"], directory
+    assert not list(tmp_path.glob(".*.tmp*"))
+
+
+def test_independent_steps_run_concurrently(tmp_path: Path, monkeypatch):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_speed(step):
+        with lock:
+            active.append(step.id)
+            peak.append(len(active))
+        time.sleep(0.2)
+        Path(step.output).mkdir(parents=True, exist_ok=True)
+        with lock:
+            active.remove(step.id)
+
+    runner, required, optional, n_inputs = pipeline.STEP_TYPES["speed"]
+    monkeypatch.setitem(pipeline.STEP_TYPES, "speed", (fake_speed, required, optional, n_inputs))
+    make_beep(str(tmp_path / "a.mp3"))
+    recipe = _write_recipe(
+        tmp_path,
+        [{"id": f"s{i}", "type": "speed", "input": "a.mp3", "output": f"out{i}", "speed": 1.5} for i in range(3)],
+    )
+    list(Pipeline.load(recipe).run(max_workers=3))
+    assert max(peak) == 3
+
+
+def test_failure_skips_downstream_and_reports(tmp_path: Path):
+    recipe = _write_recipe(
+        tmp_path,
+        [
+            {"id": "sections", "type": "combine", "input": "missing", "output": "sections"},
+            {"id": "album", "type": "tag-album", "input": "sections", "output": "album", "album": "Drill"},
+        ],
+    )
+    with pytest.raises(RuntimeError, match="2 step"):
+        list(Pipeline.load(recipe).run())
+
+
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([{"id": "x", "type": "mix", "input": "a", "output": "b"}], "Unknown step type"),
+        ([{"id": "x", "type": "speed", "input": "a", "output": "b"}], "missing"),
+        (
+            [
+                {"id": "x", "type": "add-number", "input": "a", "output": "b"},
+                {"id": "y", "type": "add-number", "input": "b", "output": "a"},
+            ],
+            "cycle",
+        ),
+    ],
+)
+def test_invalid_recipes(tmp_path: Path, steps, message):
+    with pytest.raises(ValueError, match=message):
+        Pipeline.load(_write_recipe(tmp_path, steps))
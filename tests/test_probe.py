@@ -0,0 +1,52 @@
+import os
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from speech_audio_tools import probe as pr
+from speech_audio_tools.beep import make_beep
+
+pytestmark = pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobe not installed")
+
+
+def test_probe_cache_reads_metadata_and_reuses_rows(tmp_path: Path):
+    audio = tmp_path / "tone.mp3"
+    make_beep(str(audio), duration=0.3, sampling_rate=22050)
+    cache = pr.ProbeCache(str(tmp_path / "probe.sqlite3"))
+
+    info = cache.get(audio)
+    assert info.sample_rate == 22050
+    assert info.channels == 1
+    assert info.codec == "mp3"
+    assert info.duration and info.duration > 0.2
+
+    with mock.patch.object(pr, "run_ffprobe", side_effect=AssertionError("should hit cache")):
+        assert pr.ProbeCache(cache.db_path).get(audio) == info
+
+
+def test_probe_many_reprobes_only_changed_files(tmp_path: Path):
+    files = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.mp3"
+        make_beep(str(path), duration=0.2)
+        files.append(path)
+    cache = pr.ProbeCache(str(tmp_path / "probe.sqlite3"))
+    cache.get_many(files)
+
+    st = files[1].stat()
+    os.utime(files[1], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    with mock.patch.object(pr, "run_ffprobe", wraps=pr.run_ffprobe) as spy:
+        result = cache.get_many(files)
+    assert spy.call_count == 1
+    assert set(result) == {os.fspath(p) for p in files}
+
+
+def test_default_cache_follows_cache_dir(tmp_path: Path, monkeypatch):
+    first = pr.default_cache()
+    monkeypatch.setenv("SAT_CACHE_DIR", str(tmp_path / "other-cache"))
+    second = pr.default_cache()
+    assert second is not first
+    assert second.db_path.startswith(str(tmp_path / "other-cache"))
+    assert pr.default_cache() is second
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+from unittest import mock
+
+from speech_audio_tools import change_speed, profiling
+
+
+def test_span_is_noop_when_disabled():
+    assert not profiling.is_enabled()
+    with profiling.span("decode", "x") as sp:
+        sp.audio_seconds = 3.0
+
+
+def test_trace_and_summary(tmp_path: Path, capsys):
+    trace_path = tmp_path / "trace.json"
+    profiling.enable(trace_path)
+    try:
+        with profiling.span("decode", "a.mp3") as sp:
+            sp.audio_seconds = 2.0
+        with profiling.span("encode", "out.mp3", format="mp3"):
+            pass
+    finally:
+        profiling.finish()
+
+    trace = json.loads(trace_path.read_text())
+    events = {e["cat"]: e for e in trace["traceEvents"]}
+    assert events["decode"]["args"]["audio_seconds"] == 2.0
+    assert events["encode"]["args"]["format"] == "mp3"
+    assert trace["summary"]["decode"]["count"] == 1
+    assert trace["summary"]["total"]["audio_seconds"] == 2.0
+    err = capsys.readouterr().err
+    assert "decode" in err and "RTF" in err
+    assert not profiling.is_enabled()
+
+
+def test_ffmpeg_spans_skip_probing_when_disabled(tmp_path: Path):
+    with mock.patch.object(change_speed, "probe") as probe, mock.patch.object(change_speed.subprocess, "run"):
+        probe.return_value.duration = 2.0
+        change_speed.run_ffmpeg("ffmpeg", tmp_path / "in.mp3", tmp_path / "out.mp3", ["atempo=1.5"])
+        assert probe.call_count == 0
+        profiling.enable(tmp_path / "trace.json")
+        try:
+            change_speed.run_ffmpeg("ffmpeg", tmp_path / "in.mp3", tmp_path / "out.mp3", ["atempo=1.5"])
+        finally:
+            profiling.finish()
+        assert probe.call_count == 1
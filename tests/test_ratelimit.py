@@ -0,0 +1,140 @@
+import io
+import shutil
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+from botocore.exceptions import ClientError
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from speech_audio_tools import ratelimit, tts
+from speech_audio_tools.ratelimit import THROTTLE, TRANSIENT, AdaptiveLimiter, TokenBucket, classify_error
+
+
+def _aws_error(code, status=400, headers=None):
+    response = {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status, "HTTPHeaders": headers or {}}}
+    return ClientError(response, "SynthesizeSpeech")
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code, code=None):
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.code = code
+
+
+def test_token_bucket_paces_requests():
+    now = [0.0]
+    sleeps = []
+    bucket = TokenBucket(2.0, burst=2, clock=lambda: now[0], sleep=sleeps.append)
+    for _ in range(4):
+        bucket.acquire()
+    assert sleeps == [0.5, 1.0]  # two burst tokens, then callers queue 0.5 s apart
+
+
+def test_classify_error():
+    assert classify_error(_aws_error("ThrottlingException")) == THROTTLE
+    assert classify_error(_aws_error("ServiceFailureException", 500)) == TRANSIENT
+    assert classify_error(_aws_error("ValidationException")) is None
+    assert classify_error(_HTTPError(429)) == THROTTLE
+    assert classify_error(_HTTPError(429, code="insufficient_quota")) is None
+    assert classify_error(_HTTPError(503)) == TRANSIENT
+    assert classify_error(ValueError("bad input")) is None
+
+
+def test_aimd_settles_below_service_capacity():
+    capacity = 3
+    in_flight = [0]
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            in_flight[0] += 1
+            overloaded = in_flight[0] > capacity
+        try:
+            if overloaded:
+                raise _aws_error("ThrottlingException")
+            time.sleep(0.005)
+            return "ok"
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    limiter = AdaptiveLimiter(rate=1000.0, concurrency=8, max_rate=1000.0, retries=20, backoff=0.001)
+    threads = [threading.Thread(target=lambda: [limiter.call(request, chars=10) for _ in range(10)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = limiter.stats()
+    assert stats.requests == 80 and stats.chars == 800
+    assert stats.throttled > 0 and stats.retries == stats.throttled
+    assert stats.concurrency <= capacity + 1.5
+    assert stats.requests_per_second > 0 and "req/s" in stats.summary()
+
+
+def test_summaries_cover_used_limiters_only(monkeypatch):
+    used, idle = AdaptiveLimiter(rate=100.0, concurrency=1), AdaptiveLimiter(rate=100.0, concurrency=1)
+    used.call(lambda: None, chars=5)
+    monkeypatch.setattr(ratelimit, "_limiters", {"polly": used, "openai": idle})
+    assert list(ratelimit.summaries()) == ["polly"]
+    assert ratelimit.summaries()["polly"].startswith("1 requests")
+
+
+def test_limiter_does_not_retry_permanent_errors():
+    limiter = AdaptiveLimiter(rate=100.0, concurrency=1, sleep=mock.Mock())
+    calls = mock.Mock(side_effect=_aws_error("ValidationException"))
+    with pytest.raises(ClientError):
+        limiter.call(calls)
+    assert calls.call_count == 1 and limiter.stats().retries == 0
+
+
+def _mp3_bytes(ms: int) -> bytes:
+    out = io.BytesIO()
+    Sine(440).to_audio_segment(duration=ms).export(out, format="mp3")
+    return out.getvalue()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_polly_engine_retries_throttling_after_retry_after():
+    client = mock.Mock()
+    client.synthesize_speech.side_effect = [
+        _aws_error("ThrottlingException", headers={"retry-after": "0.25"}),
+        {"AudioStream": io.BytesIO(_mp3_bytes(300))},
+    ]
+    sleep = mock.Mock()
+    limiter = AdaptiveLimiter(rate=4.0, concurrency=2, sleep=sleep)
+    engine = tts.AmazonPollyEngine("neural", client=client, limiter=limiter)
+    audio = engine.text_to_audio("Hello.", "en-US", "Joanna")
+    assert len(audio) == pytest.approx(300, abs=60)
+    assert client.synthesize_speech.call_count == 2
+    sleep.assert_called_once_with(0.25)
+    stats = limiter.stats()
+    assert (stats.requests, stats.throttled, stats.chars) == (1, 1, len("Hello."))
+    # a lone request has no concurrency to give up, so the throttle is charged to the rate
+    assert (stats.concurrency, stats.rate) == (2.0, 2.0)
+
+
+def test_chunks_are_synthesized_concurrently_in_order(tmp_path: Path):
+    class FakeEngine:
+        limiter = AdaptiveLimiter(rate=100.0, concurrency=4)
+
+        def get_speakers(self, lang):
+            return ["fake"]
+
+        def text_to_audio(self, text, lang, voice, speed=None):
+            time.sleep(0.05 if text.startswith("a") else 0.0)  # the first chunk finishes last
+            level = {"a": 1000, "b": 2000, "c": 3000}[text[0]]
+            return AudioSegment(np.full(100, level, np.int16).tobytes(), frame_rate=1000, sample_width=2, channels=1)
+
+    text = "a" * 900 + ". " + "b" * 900 + ". " + "c" * 900 + "."
+    with mock.patch.object(tts, "init_tts_engine", return_value=FakeEngine()), mock.patch.object(
+        tts, "export_buffer"
+    ) as export:
+        tts.SimpleTTS("en-US").make_audio_file(text, str(tmp_path / "out.mp3"))
+    samples = export.call_args.args[0].samples[:, 0]
+    assert samples.tolist() == [1000] * 100 + [2000] * 100 + [3000] * 100
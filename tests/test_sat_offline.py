@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import subprocess
 from pathlib import Path
 import pytest
@@ -159,6 +160,31 @@ def test_tag_album_directory_in_place(tmp_path: Path):
         assert tags.get("title") == name
 
 
+def test_tag_album_copy_writes_new_tag_before_untouched_payload(tmp_path: Path):
+    from mutagen.id3 import ID3, TCON
+
+    from speech_audio_tools.tag_album import tag_album
+
+    input_dir = tmp_path / "album"
+    input_dir.mkdir()
+    for name in ("a", "b", "c"):
+        run_cli("audio", "beep", "--output", str(input_dir / f"{name}.mp3"), "--duration", "0.15")
+    tags = ID3(input_dir / "a.mp3")
+    tags.add(TCON(encoding=3, text=["Speech"]))
+    tags.save()
+
+    out_dir = tmp_path / "out"
+    tag_album(str(input_dir), album="Copied", output_dir=str(out_dir), artist="Tester", jobs=3)
+
+    for name in ("a", "b", "c"):
+        src, dest = input_dir / f"{name}.mp3", out_dir / f"{name}.mp3"
+        assert dest.read_bytes()[ID3(dest).size :] == src.read_bytes()[ID3(src).size :]
+        tags = _read_tags(dest)
+        assert (tags["title"], tags["album"], tags["artist"]) == (name, "Copied", "Tester")
+    assert _read_tags(out_dir / "a.mp3")["genre"] == "Speech"
+    assert "album" not in _read_tags(input_dir / "b.mp3")
+
+
 def test_tag_album_directory_title_error(tmp_path: Path):
     input_dir = tmp_path / "album"
     input_dir.mkdir()
@@ -167,3 +193,148 @@ def test_tag_album_directory_title_error(tmp_path: Path):
     proc = run_cli("audio", "tag-album", str(input_dir), "--album", "X", "--title", "Nope", check=False)
     assert proc.returncode != 0
     assert b"--title is only supported when tagging a single file" in proc.stderr
+
+
+def _make_qa_directory(raw_dir: Path, count: int):
+    raw_dir.mkdir()
+    for number in range(1, count + 1):
+        run_cli("audio", "beep", "--output", str(raw_dir / f"{number:03d}-Q-test.mp3"), "--duration", "0.2")
+        run_cli("audio", "beep", "--output", str(raw_dir / f"{number:03d}-A-test.mp3"), "--duration", "0.3", "--frequency", "440")
+
+
+@pytest.mark.parametrize("backend", ["pydub", "ffmpeg"])
+def test_combine_backends(tmp_path: Path, backend: str):
+    raw_dir = tmp_path / "raw"
+    _make_qa_directory(raw_dir, 3)
+    out_dir = tmp_path / "out"
+    run_cli(
+        "audio", "combine", str(raw_dir), str(out_dir),
+        "--speed", "1.25:1.0", "--repeat-question", "--section-unit", "2", "--backend", backend,
+    )
+
+    sections = sorted(p.name for p in out_dir.glob("*.mp3"))
+    assert sections == ["001-002.mp3", "003-003.mp3"]
+    from speech_audio_tools.probe import probe
+
+    # 2 x (Q 0.16s + 0.5s + Q 0.16s + 0.5s + A 0.3s + 2s)
+    assert probe(out_dir / "001-002.mp3").duration == pytest.approx(7.24, abs=0.2)
+    assert _read_tags(out_dir / "001-002.mp3").get("title") == "001-002 Out"
+
+
+def test_section_builder_rebuilds_only_changed_sections(tmp_path: Path):
+    from speech_audio_tools.audio import SectionBuilder
+
+    raw_dir = tmp_path / "raw"
+    _make_qa_directory(raw_dir, 3)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    builder = SectionBuilder(str(raw_dir), str(out_dir), section_unit=2)
+    assert [Path(p).name for p in builder.build()] == ["001-002.mp3", "003-003.mp3"]
+    assert builder.build(set()) == []
+
+    changed = raw_dir / "003-A-test.mp3"
+    run_cli("audio", "beep", "--output", str(changed), "--duration", "0.5", "--frequency", "660")
+    assert [Path(p).name for p in builder.build({str(changed)})] == ["003-003.mp3"]
+
+    added = raw_dir / "004-Q-test.mp3"
+    run_cli("audio", "beep", "--output", str(added), "--duration", "0.2")
+    run_cli("audio", "beep", "--output", str(raw_dir / "004-A-test.mp3"), "--duration", "0.3")
+    created = builder.build({str(added), str(raw_dir / "004-A-test.mp3")})
+    assert [Path(p).name for p in created] == ["003-004.mp3"]
+    assert sorted(p.name for p in out_dir.glob("*.mp3")) == ["001-002.mp3", "003-004.mp3"]
+
+
+def test_interrupted_combine_resumes_with_finished_sections(tmp_path: Path):
+    import json
+    from unittest import mock
+
+    from speech_audio_tools.audio import SectionBuilder, SignatureList, make_section_mp3_files
+
+    raw_dir = tmp_path / "raw"
+    _make_qa_directory(raw_dir, 3)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    real_render = SectionBuilder._render
+
+    def crash_on_third(self, section_filename, qa_files, start, end):
+        if start == "003":
+            Path(section_filename).write_bytes(b"partial")
+            raise KeyboardInterrupt
+        real_render(self, section_filename, qa_files, start, end)
+
+    with mock.patch.object(SectionBuilder, "_render", crash_on_third), pytest.raises(KeyboardInterrupt):
+        make_section_mp3_files(str(raw_dir), str(out_dir), section_unit=1)
+    assert sorted(p.name for p in out_dir.iterdir() if p.suffix == ".mp3") == ["001-001.mp3", "002-002.mp3"]
+    assert not list(out_dir.glob("*.tmp"))
+
+    with mock.patch.object(SectionBuilder, "_render", autospec=True, side_effect=real_render) as render:
+        make_section_mp3_files(str(raw_dir), str(out_dir), section_unit=1)
+    third = [(str(raw_dir / "003-Q-test.mp3"), str(raw_dir / "003-A-test.mp3"))]
+    assert [call.args[2] for call in render.call_args_list] == [third]
+
+    # a legacy .signatures.json is imported once; a second store sees committed rows immediately
+    (out_dir / ".signatures.sqlite3").unlink()
+    signature = SignatureList.signature([str(raw_dir / "001-Q-test.mp3"), str(raw_dir / "001-A-test.mp3")])
+    (out_dir / ".signatures.json").write_text(json.dumps({"001-001.mp3": signature}))
+    first, second = SignatureList(str(out_dir)), SignatureList(str(out_dir))
+    assert not (out_dir / ".signatures.json").exists()
+    assert json.loads((out_dir / ".signatures.json.bak").read_text()) == {"001-001.mp3": signature}
+    assert second.is_current("001-001.mp3", signature)
+    first.record("002-002.mp3", "abc")
+    assert second.get(str(out_dir / "002-002.mp3")) == "abc"
+
+    # the pre-SQLite API still works on top of the store
+    files = [str(raw_dir / "002-Q-test.mp3"), str(raw_dir / "002-A-test.mp3")]
+    assert first.updated("002-002.mp3", files)
+    assert not second.updated("002-002.mp3", files)
+    first.save()
+
+
+def test_atomic_output_keeps_replaced_file_mode(tmp_path: Path):
+    from speech_audio_tools.audio_io import atomic_output
+
+    fresh = tmp_path / "fresh.mp3"
+    with atomic_output(fresh) as tmp:
+        Path(tmp).write_bytes(b"new")
+    assert fresh.stat().st_mode & 0o777 == 0o644
+
+    shared = tmp_path / "shared.mp3"
+    shared.write_bytes(b"old")
+    shared.chmod(0o664)
+    with atomic_output(shared) as tmp:
+        Path(tmp).write_bytes(b"new")
+    assert shared.read_bytes() == b"new" and shared.stat().st_mode & 0o777 == 0o664
+
+
+def test_watch_changes_polling_debounces(tmp_path: Path):
+    import threading
+
+    from speech_audio_tools.watch import watch_changes
+
+    stop = threading.Event()
+    batches = []
+
+    def consume():
+        for changed in watch_changes(tmp_path, debounce=0.2, poll_interval=0.05, stop=stop, force_polling=True):
+            batches.append(changed)
+            stop.set()
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    time.sleep(0.1)
+    (tmp_path / "a.mp3").write_bytes(b"a")
+    time.sleep(0.05)
+    (tmp_path / "b.mp3").write_bytes(b"b")
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert batches == [{str(tmp_path / "a.mp3"), str(tmp_path / "b.mp3")}]
+
+
+def test_profile_option_writes_trace(tmp_path: Path):
+    trace = tmp_path / "trace.json"
+    proc = run_cli("--profile", str(trace), "audio", "beep", "--output", str(tmp_path / "beep.mp3"))
+    assert b"encode" in proc.stderr
+    import json
+
+    kinds = {event["cat"] for event in json.loads(trace.read_text())["traceEvents"]}
+    assert "encode" in kinds
@@ -0,0 +1,30 @@
+import numpy as np
+from pydub import AudioSegment
+
+from speech_audio_tools.time_stretch import stretch_segment, time_stretch
+
+
+def _tone(freq, seconds, frame_rate=22050):
+    t = np.arange(int(seconds * frame_rate)) / frame_rate
+    return np.sin(2 * np.pi * freq * t) * 10000
+
+
+def _peak_hz(samples, frame_rate=22050):
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.fft.rfftfreq(len(samples), 1 / frame_rate)[spectrum.argmax()]
+
+
+def test_time_stretch_keeps_pitch_and_scales_length():
+    source = _tone(440.0, 2.0)
+    for rate in (0.8, 1.5):
+        out = time_stretch(source[None, :], rate, n_fft=1024)[0]
+        assert len(out) == round(len(source) / rate)
+        assert abs(_peak_hz(out) - 440.0) < 2.0
+
+
+def test_stretch_segment_preserves_format():
+    pcm = np.stack([_tone(300.0, 1.0), _tone(600.0, 1.0)], axis=1).astype(np.int16)
+    seg = AudioSegment(pcm.tobytes(), frame_rate=22050, sample_width=2, channels=2)
+    out = stretch_segment(seg, 2.0)
+    assert (out.frame_rate, out.channels, out.sample_width) == (22050, 2, 2)
+    assert abs(len(out) - 500) <= 1
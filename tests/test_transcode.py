@@ -0,0 +1,69 @@
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from speech_audio_tools import transcribe_aws as ta
+from speech_audio_tools.transcode import TranscodeStream, build_transcode_command
+from speech_audio_tools.transcribe_openai import transcribe_file
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+@pytest.fixture
+def stereo_mp3(tmp_path: Path) -> Path:
+    path = tmp_path / "talk.mp3"
+    Sine(220).to_audio_segment(duration=3000).set_channels(2).export(path, format="mp3", bitrate="320k")
+    return path
+
+
+def test_build_transcode_command_selects_codec():
+    cmd = build_transcode_command("in.m4a", "mp3", "48k")
+    assert cmd[cmd.index("-c:a") + 1] == "libmp3lame"
+    assert cmd[cmd.index("-b:a") + 1] == "48k"
+    assert cmd[cmd.index("-ac") + 1] == "1" and cmd[-1] == "pipe:1"
+    with pytest.raises(ValueError):
+        build_transcode_command("in.m4a", "flac")
+
+
+def test_transcode_stream_closes_span_when_ffmpeg_cannot_start(tmp_path: Path):
+    from speech_audio_tools import transcode
+
+    with mock.patch.object(transcode, "span") as span, pytest.raises(FileNotFoundError):
+        TranscodeStream(tmp_path / "in.mp3", "opus", ffmpeg=str(tmp_path / "no-ffmpeg"))
+    span.return_value.__exit__.assert_called_once()
+    assert span.return_value.__exit__.call_args.args[0] is FileNotFoundError
+
+
+@needs_ffmpeg
+def test_transcode_stream_is_smaller_mono_16k(stereo_mp3: Path, tmp_path: Path):
+    with TranscodeStream(stereo_mp3, "opus") as stream:
+        assert stream.name == "talk.ogg"
+        with pytest.raises(OSError):
+            stream.fileno()
+        data = stream.read()
+    assert len(data) < stereo_mp3.stat().st_size / 3
+    (tmp_path / "out.ogg").write_bytes(data)
+    decoded = AudioSegment.from_file(tmp_path / "out.ogg")
+    assert decoded.channels == 1 and abs(decoded.duration_seconds - 3.0) < 0.1
+
+
+@needs_ffmpeg
+def test_transcode_stream_feeds_openai_and_s3(stereo_mp3: Path):
+    client = mock.MagicMock()
+
+    def create(**kwargs):
+        assert kwargs["file"].name == "talk.mp3"
+        return f"{len(kwargs['file'].read())} bytes"
+
+    client.audio.transcriptions.create.side_effect = create
+    out = transcribe_file(stereo_mp3, client=client, transcode="mp3")
+    assert 0 < int(out.read_text().split()[0]) < stereo_mp3.stat().st_size
+
+    s3 = mock.MagicMock()
+    s3.upload_fileobj.side_effect = lambda stream, bucket, key, Config: stream.read()
+    assert ta.upload_file("bucket", "audio", str(stereo_mp3), transcode="opus", s3_client=s3) == "audio/talk.ogg"
+    s3.upload_file.assert_not_called()
@@ -1,3 +1,5 @@
+import hashlib
+from datetime import datetime, timezone
 from pathlib import Path
 from unittest import mock
 
@@ -30,6 +32,48 @@ def test_prepare_segments_handles_empty_labels():
     assert ta.prepare_segments(data) == []
 
 
+def _word(start, content):
+    return {"start_time": start, "end_time": start, "type": "pronunciation", "alternatives": [{"content": content}]}
+
+
+def test_prepare_segments_keeps_items_sharing_a_start_time():
+    items = [
+        _word("0.0", "What"),
+        _word("0.5", "is"),
+        _word("0.5", "this"),
+        {"type": "punctuation", "alternatives": [{"content": "?"}]},
+        _word("1.0", "It's"),
+        _word("1.5", "a"),
+        _word("2.0", "pen"),
+        {"type": "punctuation", "alternatives": [{"content": "."}]},
+    ]
+    refs = [{"start_time": item["start_time"]} for item in items if item["type"] == "pronunciation"]
+    data = {
+        "results": {
+            "items": items,
+            "speaker_labels": {
+                "segments": [
+                    {"speaker_label": "spk_0", "start_time": "0.0", "items": refs[:3]},
+                    {"speaker_label": "spk_1", "start_time": "1.0", "items": refs[3:]},
+                ]
+            },
+        }
+    }
+    segments = ta.prepare_segments(data)
+
+    assert [seg["content"] for seg in segments] == ["What is this?", "It's a pen."]
+    assert segments[0]["QnA"] == "What is this? := It's a pen."
+    assert "items" in data["results"]["speaker_labels"]["segments"][0]  # input left untouched
+
+
+def test_transcript_items_columns_and_wording():
+    columns = ta.TranscriptItems.parse([_word("0.0", "less"), dict(_word("0.4", "than"), speaker_label="spk_1")])
+    assert list(columns.start) == [0.0, 0.4]
+    assert list(columns.speaker) == [-1, 0] and columns.speakers == ["spk_1"]
+    assert columns.segment_text([{"start_time": "0.0"}, {"start_time": "0.4"}]) == ("Lesson", 2)
+    assert ta._normalize_wording("etcetera and et cetera") == "etc and etc"
+
+
 def test_list_s3_objects_happy_path():
     fake_client = mock.MagicMock()
     fake_client.list_objects.return_value = {
@@ -72,3 +116,334 @@ def test_transcribe_s3_object_calls(mock_encode, mock_stitch, mock_boto3, mock_f
         mock_stitch.assert_called_once()
     else:
         mock_stitch.assert_not_called()
+
+
+class _ClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class _StubTranscribe:
+    """Jobs complete after `polls_needed` status checks; tracks jobs in flight."""
+
+    def __init__(self, polls_needed=2, fail=()):
+        self.polls_needed = polls_needed
+        self.fail = set(fail)
+        self.jobs = {}
+        self.max_in_flight = 0
+        self.deleted = []
+
+    def start_transcription_job(self, **kwargs):
+        name = kwargs["TranscriptionJobName"]
+        self.jobs[name] = {"polls": 0, "key": kwargs["Media"]["MediaFileUri"], "format": kwargs["MediaFormat"]}
+        self.max_in_flight = max(self.max_in_flight, len(self.jobs))
+
+    def get_transcription_job(self, TranscriptionJobName):
+        job = self.jobs[TranscriptionJobName]
+        job["polls"] += 1
+        if job["polls"] < self.polls_needed:
+            return {"TranscriptionJob": {"TranscriptionJobStatus": "IN_PROGRESS"}}
+        del self.jobs[TranscriptionJobName]
+        if TranscriptionJobName in self.fail:
+            return {"TranscriptionJob": {"TranscriptionJobStatus": "FAILED", "FailureReason": "bad audio"}}
+        uri = "https://s3.amazonaws.com/b/p-transcript/" + TranscriptionJobName + ".json"
+        return {"TranscriptionJob": {"TranscriptionJobStatus": "COMPLETED", "Transcript": {"TranscriptFileUri": uri}}}
+
+    def delete_transcription_job(self, TranscriptionJobName):
+        self.deleted.append(TranscriptionJobName)
+
+
+def _stub_s3(names):
+    s3 = mock.MagicMock()
+    s3.list_objects.return_value = {"Contents": [{"Key": "p/"}] + [{"Key": f"p/{n}"} for n in names]}
+
+    def download(bucket, key, buf):
+        buf.write(('{"results": {"transcripts": [{"transcript": "%s"}]}}' % key.rsplit("/", 1)[-1]).encode())
+
+    s3.download_fileobj.side_effect = download
+    return s3
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.sleep")
+def test_transcribe_s3_prefix_limits_jobs_in_flight(mock_sleep):
+    names = [f"lecture{i}.mp3" for i in range(5)] + ["notes.txt"]
+    transcribe = _StubTranscribe(polls_needed=3)
+    results = dict(
+        ta.transcribe_s3_prefix(
+            bucket="b", prefix="p", languages=["en-US"], max_concurrent=2,
+            transcribe_client=transcribe, s3_client=_stub_s3(names),
+        )
+    )
+
+    assert sorted(results) == [f"lecture{i}.mp3" for i in range(5)]
+    assert results["lecture0.mp3"] == "transcribe-job-lecture0.mp3.json"
+    assert transcribe.max_in_flight == 2
+    assert len(transcribe.deleted) == 5
+    assert mock_sleep.called
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.sleep")
+def test_transcribe_s3_prefix_reports_failures_after_other_jobs(mock_sleep):
+    transcribe = _StubTranscribe(polls_needed=1, fail={"transcribe-job-b.wav"})
+    results = []
+    with pytest.raises(RuntimeError, match="b.wav: bad audio"):
+        for item in ta.transcribe_s3_prefix(
+            bucket="b", prefix="p/", languages=["en-US"],
+            transcribe_client=transcribe, s3_client=_stub_s3(["a.mp3", "b.wav"]),
+        ):
+            results.append(item[0])
+    assert results == ["a.mp3"]
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.sleep")
+def test_transcribe_s3_prefix_backs_off_while_jobs_run(mock_sleep):
+    transcribe = _StubTranscribe(polls_needed=5)
+    list(
+        ta.transcribe_s3_prefix(
+            bucket="b", prefix="p", languages=["en-US"], min_wait=1.0, max_wait=4.0,
+            transcribe_client=transcribe, s3_client=_stub_s3(["a.mp3"]),
+        )
+    )
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 4
+    assert all(0.5 <= d <= 4.0 for d in delays)
+    assert delays[-1] >= 2.0  # grew from min_wait towards the ceiling
+
+
+def test_sync_directory_skips_unchanged_objects(tmp_path: Path):
+    (tmp_path / "same.mp3").write_bytes(b"unchanged audio")
+    (tmp_path / "changed.mp3").write_bytes(b"new audio")
+    (tmp_path / "new.mp3").write_bytes(b"fresh")
+    (tmp_path / ".DS_Store").write_bytes(b"x")
+
+    s3 = mock.MagicMock()
+    s3.list_objects.return_value = {
+        "Contents": [
+            {"Key": "lectures/same.mp3", "Size": 15, "ETag": '"%s"' % hashlib.md5(b"unchanged audio").hexdigest()},
+            {"Key": "lectures/changed.mp3", "Size": 9, "ETag": '"%s"' % hashlib.md5(b"old audio").hexdigest()},
+        ]
+    }
+    uploaded, skipped = ta.sync_directory("bucket", "lectures", str(tmp_path), s3_client=s3)
+
+    assert sorted(uploaded) == ["lectures/changed.mp3", "lectures/new.mp3"]
+    assert skipped == ["lectures/same.mp3"]
+    s3.list_objects.assert_called_once()
+    assert all("Config" in call.kwargs for call in s3.upload_file.call_args_list)
+
+
+@pytest.mark.parametrize("prefix", ["", "/"])
+def test_sync_directory_to_bucket_root(tmp_path: Path, prefix):
+    (tmp_path / "same.mp3").write_bytes(b"unchanged audio")
+    s3 = mock.MagicMock()
+    s3.list_objects.return_value = {
+        "Contents": [{"Key": "same.mp3", "Size": 15, "ETag": '"%s"' % hashlib.md5(b"unchanged audio").hexdigest()}]
+    }
+    uploaded, skipped = ta.sync_directory("bucket", prefix, str(tmp_path), s3_client=s3)
+
+    assert (uploaded, skipped) == ([], ["same.mp3"])
+    assert s3.list_objects.call_args.kwargs["Prefix"] == ""
+
+
+def test_matches_remote_understands_multipart_etags(tmp_path: Path):
+    path = tmp_path / "big.bin"
+    path.write_bytes(b"a" * 25)
+    etag = ta._local_etag(str(path), 10)
+    assert etag.endswith("-3")
+    assert ta._matches_remote(str(path), 25, etag, chunksize=10)
+    assert not ta._matches_remote(str(path), 25, etag.replace("-3", "-2"), chunksize=10)
+
+
+def test_matches_remote_single_part_multipart_etag(tmp_path: Path):
+    # a file exactly chunksize long reaches the multipart threshold and is uploaded as one part
+    path = tmp_path / "exact.bin"
+    path.write_bytes(b"a" * 10)
+    part = hashlib.md5(b"a" * 10).digest()
+    etag = f"{hashlib.md5(part).hexdigest()}-1"
+    assert ta._local_etag(str(path), 10, multipart=True) == etag
+    assert ta._matches_remote(str(path), 10, etag, chunksize=10)
+    assert ta._matches_remote(str(path), 10, part.hex(), chunksize=10)
+
+
+def _paged_s3(keys, page_size=2):
+    """Stub s3 whose list_objects pages through keys (with sizes/dates) like the real API."""
+    objects = [
+        {"Key": key, "Size": i * 100, "LastModified": datetime(2024, 1, 1 + i, tzinfo=timezone.utc), "ETag": '"e"'}
+        for i, key in enumerate(keys)
+    ]
+    s3 = mock.MagicMock()
+
+    def list_objects(Bucket, Prefix, Marker=""):
+        matching = [obj for obj in objects if obj["Key"].startswith(Prefix) and obj["Key"] > Marker]
+        page = matching[:page_size]
+        return {"Contents": page, "IsTruncated": len(matching) > page_size}
+
+    s3.list_objects.side_effect = list_objects
+    s3.delete_objects.return_value = {}
+    return s3
+
+
+def test_iter_s3_objects_paginates_and_filters():
+    s3 = _paged_s3([f"audio/{i}.mp3" for i in range(5)])
+    keys = [obj["Key"] for obj in ta.iter_s3_objects("b", "audio/", s3_client=s3)]
+    assert keys == [f"audio/{i}.mp3" for i in range(5)]
+    assert s3.list_objects.call_count == 3
+
+    filtered = ta.iter_s3_objects(
+        "b",
+        "audio/",
+        min_size=100,
+        max_size=300,
+        modified_before=datetime(2024, 1, 4, tzinfo=timezone.utc),
+        s3_client=s3,
+    )
+    assert [obj["Key"] for obj in filtered] == ["audio/1.mp3", "audio/2.mp3"]
+
+
+def test_delete_prefix_batches_keys_and_transcripts(monkeypatch):
+    monkeypatch.setattr(ta, "DELETE_BATCH_SIZE", 3)
+    keys = [f"audio/{i}.mp3" for i in range(5)] + ["audio-transcript/0.json", "audio2/x.mp3"]
+    s3 = _paged_s3(keys)
+
+    assert ta.delete_prefix("b", "audio", max_workers=2, s3_client=s3) == 6
+    deleted = [o["Key"] for call in s3.delete_objects.call_args_list for o in call.kwargs["Delete"]["Objects"]]
+    assert sorted(deleted) == sorted(keys[:-1])
+    assert all(len(call.kwargs["Delete"]["Objects"]) <= 3 for call in s3.delete_objects.call_args_list)
+
+    with pytest.raises(ValueError):
+        ta.delete_prefix("b", "/", s3_client=s3)
+
+
+def test_delete_prefix_reports_errors():
+    s3 = _paged_s3(["audio/a.mp3"])
+    s3.delete_objects.return_value = {"Errors": [{"Key": "audio/a.mp3", "Code": "AccessDenied"}]}
+    with pytest.raises(RuntimeError, match="AccessDenied"):
+        ta.delete_prefix("b", "audio", s3_client=s3)
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.sleep")
+def test_transcribe_s3_prefix_resumes_jobs_from_ledger(mock_sleep, tmp_path: Path):
+    from speech_audio_tools.job_ledger import COMPLETED, JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    running, done = ta._job_name("a.mp3"), ta._job_name("b.mp3")
+    ledger.submitted(running, "b", "p/a.mp3", ["en-US"])
+    ledger.submitted(done, "b", "p/b.mp3", ["en-US"])
+    ledger.completed(done, "https://s3.amazonaws.com/b/p-transcript/b.json")
+    stub = _StubTranscribe(polls_needed=1)
+    stub.jobs[running] = {"polls": 0}  # still running on AWS from the interrupted run
+    stub.start_transcription_job = mock.MagicMock(side_effect=stub.start_transcription_job)
+
+    results = dict(
+        ta.transcribe_s3_prefix(
+            bucket="b",
+            prefix="p",
+            languages=["en-US"],
+            transcribe_client=stub,
+            s3_client=_stub_s3(["a.mp3", "b.mp3", "c.mp3"]),
+            use_cache=False,
+            ledger=ledger,
+        )
+    )
+
+    assert sorted(results) == ["a.mp3", "b.mp3", "c.mp3"]
+    assert results["b.mp3"] == "b.json"  # fetched from the recorded URI, no new job
+    started = [call.kwargs["TranscriptionJobName"] for call in stub.start_transcription_job.call_args_list]
+    assert started == [ta._job_name("c.mp3")]
+    assert all(ledger.get(ta._job_name(name)).status == COMPLETED for name in ("a.mp3", "b.mp3", "c.mp3"))
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.sleep")
+def test_transcribe_s3_prefix_replaces_job_for_changed_object(mock_sleep, tmp_path: Path):
+    from speech_audio_tools.job_ledger import COMPLETED, JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    job_name = ta._job_name("a.mp3")
+    ledger.submitted(job_name, "b", "p/a.mp3", ["en-US"], etag="old")
+    stub = _StubTranscribe(polls_needed=2)
+    stub.jobs[job_name] = {"polls": 0}  # still transcribing the old upload
+    start = stub.start_transcription_job
+
+    def start_or_conflict(**kwargs):
+        if kwargs["TranscriptionJobName"] in stub.jobs:
+            raise _ClientError("ConflictException")
+        start(**kwargs)
+
+    stub.start_transcription_job = mock.MagicMock(side_effect=start_or_conflict)
+    s3 = _stub_s3(["a.mp3"])
+    s3.list_objects.return_value["Contents"][1]["ETag"] = '"new"'
+
+    results = list(
+        ta.transcribe_s3_prefix(
+            bucket="b", prefix="p", languages=["en-US"],
+            transcribe_client=stub, s3_client=s3, use_cache=False, ledger=ledger,
+        )
+    )
+
+    assert [name for name, _ in results] == ["a.mp3"]
+    assert stub.start_transcription_job.call_count == 2  # conflict, then a fresh job once the old one finished
+    assert stub.deleted.count(job_name) == 2
+    record = ledger.get(job_name)
+    assert record.status == COMPLETED and record.etag == "new"
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.fetch_transcript")
+@mock.patch("speech_audio_tools.transcribe_aws.wait_for_job")
+@mock.patch("speech_audio_tools.transcribe_aws.start_transcription_job")
+def test_transcribe_s3_object_replaces_job_for_changed_object(mock_start, mock_wait, mock_fetch, tmp_path: Path):
+    from speech_audio_tools.job_ledger import JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    job_name = ta._job_name("f.mp3")
+    ledger.submitted(job_name, "b", "p/f.mp3", ["en-US"], etag="e1")
+    mock_start.side_effect = [_ClientError("ConflictException"), None]
+    mock_wait.return_value = {"TranscriptionJob": {"Transcript": {"TranscriptFileUri": "s3://b/out.json"}}}
+    mock_fetch.return_value = {"results": {"transcripts": [{"transcript": "new"}]}}
+    s3 = mock.MagicMock()
+    s3.head_object.return_value = {"ETag": '"e2"'}
+    client = mock.MagicMock()
+
+    text = ta.transcribe_s3_object(
+        bucket="b", prefix="p", object_name="f.mp3", languages=["en-US"], media_format="mp3",
+        transcribe_client=client, s3_client=s3, use_cache=False, ledger=ledger,
+    )
+
+    assert text == "new"
+    # the job for e1 is waited out and removed before the job for e2 starts
+    assert mock_start.call_count == 2 and mock_wait.call_count == 2
+    client.delete_transcription_job.assert_called_once_with(TranscriptionJobName=job_name)
+    assert ledger.get(job_name).etag == "e2"
+
+
+@mock.patch("speech_audio_tools.transcribe_aws.fetch_transcript")
+@mock.patch("speech_audio_tools.transcribe_aws.wait_for_job")
+@mock.patch("speech_audio_tools.transcribe_aws.start_transcription_job")
+def test_transcribe_s3_object_resumes_recorded_job(mock_start, mock_wait, mock_fetch, tmp_path: Path):
+    from speech_audio_tools.job_ledger import JobLedger
+
+    ledger = JobLedger(str(tmp_path / "jobs.sqlite3"))
+    job_name = ta._job_name("f.mp3")
+    ledger.submitted(job_name, "b", "p/f.mp3", ["en-US"], etag="e1")
+    mock_wait.return_value = {"TranscriptionJob": {"Transcript": {"TranscriptFileUri": "s3://b/out.json"}}}
+    mock_fetch.return_value = {"results": {"transcripts": [{"transcript": "hi"}]}}
+    s3 = mock.MagicMock()
+    s3.head_object.return_value = {"ETag": '"e1"'}
+    kwargs = dict(bucket="b", prefix="p", object_name="f.mp3", languages=["en-US"], media_format="mp3")
+
+    def run():
+        return ta.transcribe_s3_object(
+            **kwargs, transcribe_client=mock.MagicMock(), s3_client=s3, use_cache=False, ledger=ledger
+        )
+
+    assert run() == "hi"
+    mock_start.assert_not_called()
+    assert ledger.get(job_name).transcript_uri == "s3://b/out.json"
+
+    # a rerun fetches the finished transcript without touching Transcribe
+    assert run() == "hi"
+    assert mock_wait.call_count == 1 and mock_start.call_count == 0
+
+    # the object changed since: start a new job
+    s3.head_object.return_value = {"ETag": '"e2"'}
+    run()
+    mock_start.assert_called_once()
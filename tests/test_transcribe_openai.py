@@ -1,7 +1,17 @@
+import json
 from pathlib import Path
 from unittest import mock
 
-from speech_audio_tools.transcribe_openai import transcribe_file, DEFAULT_MODEL
+import pytest
+
+from speech_audio_tools.transcribe_openai import (
+    DEFAULT_MODEL,
+    expand_inputs,
+    plan_chunks,
+    stitch_chunks,
+    transcribe_file,
+    transcribe_files,
+)
 
 
 def test_transcribe_file_writes_output(tmp_path: Path):
@@ -29,3 +39,131 @@ def test_transcribe_file_uses_language(tmp_path: Path):
     transcribe_file(audio, language="es", client=mock_client)
     _, kwargs = mock_client.audio.transcriptions.create.call_args
     assert kwargs["language"] == "es"
+
+
+def test_transcribe_file_verbose_json_keeps_segments(tmp_path: Path):
+    audio = tmp_path / "sample.mp3"
+    audio.write_bytes(b"dummy")
+
+    mock_client = mock.MagicMock()
+    mock_client.audio.transcriptions.create.return_value.model_dump.return_value = {
+        "text": " Hello there. ",
+        "segments": [{"id": 0, "start": 0.5, "end": 1.5, "text": "Hello there."}],
+    }
+
+    out = transcribe_file(audio, response_format="verbose_json", chunked=False, client=mock_client)
+    expected = stitch_chunks([mock_client.audio.transcriptions.create.return_value.model_dump()], [0.0], "verbose_json")
+    assert out.read_text() == expected
+    assert json.loads(expected)["segments"][0]["start"] == 0.5
+
+
+def _speech_like_wav(path: Path, bursts=4, burst_ms=1500, gap_ms=800):
+    from pydub import AudioSegment
+    from pydub.generators import Sine
+
+    audio = AudioSegment.silent(duration=0, frame_rate=16000)
+    for i in range(bursts):
+        audio += Sine(300 + 50 * i).to_audio_segment(duration=burst_ms, volume=-10).set_frame_rate(16000)
+        audio += AudioSegment.silent(duration=gap_ms, frame_rate=16000)
+    audio.export(path, format="wav")
+    return path
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+def test_plan_chunks_cuts_inside_silences():
+    silences = [(900, 1100), (1900, 2100), (2900, 3100)]
+    assert plan_chunks(4000, silences, 2500) == [(0, 2000), (2000, 4000)]
+    # no silence in range: hard cut at the limit
+    assert plan_chunks(5000, [], 2000) == [(0, 2000), (2000, 4000), (4000, 5000)]
+
+
+@mock.patch("speech_audio_tools.transcribe_openai.sleep")
+def test_transcribe_long_file_stitches_chunks_in_order(mock_sleep, tmp_path: Path):
+    audio = _speech_like_wav(tmp_path / "lecture.wav")
+    failed = []
+
+    def create(**kwargs):
+        name, payload = kwargs["file"]
+        if not failed:
+            failed.append(name)
+            raise _RateLimited()
+        return f"<{int(name.rsplit('-', 1)[1].split('.')[0])}>"
+
+    client = mock.MagicMock()
+    client.audio.transcriptions.create.side_effect = create
+
+    out = transcribe_file(audio, client=client, chunked=True, max_chunk_seconds=2.5, chunk_format="wav")
+
+    starts = [int(line[1:-1]) for line in out.read_text().splitlines()]
+    assert len(starts) == 4 and starts == sorted(starts) and starts[0] == 0
+    assert mock_sleep.call_count == 1  # one retry after the rate limit
+
+
+def test_stitch_chunks_offsets_timestamps():
+    srt = "1\n00:00:01,000 --> 00:00:02,500\nhello\n"
+    assert stitch_chunks([srt, srt], [0.0, 60.0], "srt").splitlines()[4:6] == [
+        "2",
+        "00:01:01,000 --> 00:01:02,500",
+    ]
+    verbose = {"text": "hi", "segments": [{"id": 0, "start": 1.0, "end": 2.0, "text": "hi"}]}
+    stitched = json.loads(stitch_chunks([verbose, verbose], [0.0, 30.0], "verbose_json"))
+    assert [(s["id"], s["start"]) for s in stitched["segments"]] == [(0, 1.0), (1, 31.0)]
+
+
+class _Throttled(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        self.response = mock.MagicMock(headers={"retry-after": retry_after})
+
+
+@mock.patch("speech_audio_tools.transcribe_openai.sleep")
+def test_transcribe_files_skips_fresh_outputs_and_shares_client(mock_sleep, tmp_path: Path):
+    import os
+
+    for name in ("a.mp3", "b.wav", "c.mp3", "notes.md"):
+        (tmp_path / name).write_bytes(name.encode())
+    done = tmp_path / "a.mp3.txt"
+    done.write_text("old")
+    os.utime(tmp_path / "a.mp3", (1, 1))
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs["file"].name)
+        if len(calls) == 1:
+            raise _Throttled("7")
+        return "text"
+
+    client = mock.MagicMock()
+    client.audio.transcriptions.create.side_effect = create
+    files = expand_inputs([str(tmp_path)])
+    assert [p.name for p in files] == ["a.mp3", "b.wav", "c.mp3"]
+
+    results = dict(transcribe_files(files, client=client, max_workers=2))
+
+    assert results[tmp_path / "a.mp3"] is None and done.read_text() == "old"
+    assert results[tmp_path / "b.wav"].read_text() == "text" and (tmp_path / "c.mp3.txt").exists()
+    assert len(calls) == 3  # two files, one of them retried
+    mock_sleep.assert_called_once_with(7.0)  # server's Retry-After honoured
+    assert expand_inputs([str(tmp_path / "*.mp3")]) == [tmp_path / "a.mp3", tmp_path / "c.mp3"]
+
+
+def test_transcribe_files_keeps_same_stem_inputs_apart(tmp_path: Path):
+    for name in ("a.mp3", "a.wav", "x/a.mp3"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(name.encode())
+
+    client = mock.MagicMock()
+    client.audio.transcriptions.create.side_effect = lambda **kwargs: kwargs["file"].name
+    results = dict(transcribe_files([tmp_path / "a.mp3", tmp_path / "a.wav"], client=client, use_cache=False))
+    assert results[tmp_path / "a.mp3"] == tmp_path / "a.mp3.txt"
+    assert (tmp_path / "a.mp3.txt").read_text().endswith("a.mp3")
+    assert (tmp_path / "a.wav.txt").read_text().endswith("a.wav")
+
+    # same-named files from different directories cannot share one output directory
+    with pytest.raises(ValueError, match="overwrite"):
+        list(transcribe_files([tmp_path / "a.mp3", tmp_path / "x" / "a.mp3"], output_dir=tmp_path / "out", client=client))
+    assert client.audio.transcriptions.create.call_count == 2
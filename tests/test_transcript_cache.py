@@ -0,0 +1,62 @@
+from pathlib import Path
+from unittest import mock
+
+from speech_audio_tools import transcribe_aws as ta
+from speech_audio_tools.transcribe_openai import transcribe_file
+from speech_audio_tools.transcript_cache import TranscriptCache
+
+
+def test_cache_key_separates_model_languages_and_format(tmp_path: Path):
+    cache = TranscriptCache(str(tmp_path / "t.sqlite3"))
+    cache.put("abc", "openai", "m1", ["ja", "en"], "text", "hello")
+
+    assert cache.get("abc", "openai", "m1", ["en", "ja"], "text") == "hello"
+    assert cache.get("abc", "openai", "m2", ["en", "ja"], "text") is None
+    assert cache.get("abc", "openai", "m1", ["en"], "text") is None
+    assert cache.get("abc", "openai", "m1", ["en", "ja"], "srt") is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = TranscriptCache(str(tmp_path / "t.sqlite3"), max_bytes=10)
+    with mock.patch("speech_audio_tools.transcript_cache.time.time", side_effect=[1, 2, 3, 4]):
+        cache.put("a", "p", "m", [], "text", "aaaa")
+        cache.put("b", "p", "m", [], "text", "bbbb")
+        assert cache.get("a", "p", "m") == "aaaa"  # now more recent than "b"
+        cache.put("c", "p", "m", [], "text", "cccc")
+
+    assert cache.get("b", "p", "m") is None
+    assert cache.get("a", "p", "m") == "aaaa" and cache.get("c", "p", "m") == "cccc"
+
+
+def test_transcribe_file_reuses_cached_transcript(tmp_path: Path):
+    first, copy = tmp_path / "a.mp3", tmp_path / "b.mp3"
+    first.write_bytes(b"same audio")
+    copy.write_bytes(b"same audio")
+    client = mock.MagicMock()
+    client.audio.transcriptions.create.return_value = "hello"
+
+    transcribe_file(first, client=client)
+    out = transcribe_file(copy, client=client)
+    assert out.read_text() == "hello"
+    assert client.audio.transcriptions.create.call_count == 1
+
+    transcribe_file(copy, client=client, use_cache=False)
+    transcribe_file(copy, client=client, prompt="Lecture")
+    assert client.audio.transcriptions.create.call_count == 3
+
+
+def test_transcribe_s3_prefix_skips_cached_objects(tmp_path: Path):
+    cache = TranscriptCache(str(tmp_path / "t.sqlite3"))
+    cache.put("etag:e1", ta.CACHE_PROVIDER, ta.CACHE_MODEL, ["ja-JP"], "text", "cached text")
+    s3 = mock.MagicMock()
+    s3.list_objects.return_value = {"Contents": [{"Key": "audio/one.mp3", "ETag": '"e1"'}]}
+    client = mock.MagicMock()
+
+    results = list(
+        ta.transcribe_s3_prefix(
+            bucket="b", prefix="audio", languages=["ja-JP"], transcribe_client=client, s3_client=s3, cache=cache
+        )
+    )
+
+    assert results == [("one.mp3", "cached text")]
+    client.start_transcription_job.assert_not_called()